@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Measure the cost of a non-tail call on each evaluation engine, by timing a
+recursive count to ``--depth``, which the recursive ``tree`` engine can
+still do without running out of Python stack. Hot functions are not
+compiled by the ``tree`` engine here (see ``slyther.jit``), so that it is
+compared as the recursive evaluator. Run from the base directory::
+
+    $ python benchmarks/calls.py
+    $ python benchmarks/calls.py --depth 200 --engine tree --engine stackless
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slyther.interpreter import Interpreter, engines  # noqa: E402
+from slyther import jit                               # noqa: E402
+
+program = '''
+    (define (count-up n)
+      (if (= n 0) 0 (+ 1 (count-up (- n 1)))))'''
+
+
+def run(engine, depth, times):
+    """
+    Count to ``depth`` ``times`` times on ``engine``, returning the time
+    each call took on average.
+    """
+    interp = Interpreter(engine=engine)
+    interp.exec(program)
+    code = '(count-up {})'.format(depth)
+    start = time.perf_counter()
+    for _ in range(times):
+        interp.exec(code)
+    return (time.perf_counter() - start) / (times * (depth + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--engine',
+        action='append',
+        choices=sorted(engines),
+        help='Engine to time (default: all of them)')
+    parser.add_argument(
+        '--depth',
+        type=int,
+        default=500,
+        help='Depth of the recursion')
+    parser.add_argument(
+        '--calls',
+        type=int,
+        default=100000,
+        help='Number of calls to time, roughly')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of times to time each engine')
+    args = parser.parse_args()
+    names = args.engine or sorted(engines, key=lambda e: e != 'tree')
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20 * args.depth))
+    jit.threshold = None
+    times = max(1, args.calls // args.depth)
+
+    print('{:<12}{:>14}'.format('engine', 'per call'))
+    for engine in names:
+        best = min(run(engine, args.depth, times)
+                   for _ in range(args.repeat))
+        print('{:<12}{:>12.2f}us'.format(engine, best * 1e6))
+
+
+if __name__ == '__main__':
+    main()
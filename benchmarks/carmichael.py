@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Time ``examples/carmichael.scm`` against the equivalent C program,
+``examples/carmichael.c``, until each has printed the first ``--count``
+Carmichael numbers. The C program is compiled with ``gcc`` into a
+temporary directory. Times are followed by the speedup over C. Run from
+the base directory::
+
+    $ python benchmarks/carmichael.py
+    $ python benchmarks/carmichael.py --count 6 --engine closure
+"""
+import os
+import pty
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slyther.types import BuiltinFunction             # noqa: E402
+from slyther.interpreter import Interpreter, engines  # noqa: E402
+
+examples_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+
+class OutputLimitError(Exception):
+    pass
+
+
+def run_slyther(name, engine, count):
+    """
+    Run the example ``name`` on ``engine`` until it has printed ``count``
+    lines, returning the time it took and the lines.
+    """
+    output = []
+
+    @BuiltinFunction('print')
+    def print_(*args):
+        output.append(' '.join(map(str, args)))
+        if len(output) == count:
+            raise OutputLimitError
+
+    interp = Interpreter(engine=engine)
+    interp.stg['print'].set(print_)
+    with open(os.path.join(examples_dir, name)) as f:
+        code = f.read()
+    start = time.perf_counter()
+    try:
+        interp.exec(code)
+    except OutputLimitError:
+        pass
+    return time.perf_counter() - start, output
+
+
+def run_c(count):
+    """
+    Compile and run ``carmichael.c`` until it has printed ``count`` lines,
+    returning the time it took and the lines. Its output goes to a pseudo
+    terminal, so that ``printf`` flushes each line as it is printed.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        exe = os.path.join(tmp, 'carmichael')
+        subprocess.run(
+            ['gcc', os.path.join(examples_dir, 'carmichael.c'),
+             '-o', exe, '-lm', '-O2'],
+            check=True, stderr=subprocess.DEVNULL)
+        start = time.perf_counter()
+        master, slave = pty.openpty()
+        proc = subprocess.Popen([exe], stdout=slave)
+        os.close(slave)
+        with open(master, errors='replace') as out:
+            output = [out.readline().strip() for _ in range(count)]
+            elapsed = time.perf_counter() - start
+            proc.kill()
+            proc.wait()
+    return elapsed, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--engine',
+        action='append',
+        choices=sorted(engines),
+        help='Engine to time (default: all of them)')
+    parser.add_argument(
+        '--count',
+        type=int,
+        default=5,
+        help='Number of Carmichael numbers to find')
+    parser.add_argument(
+        'examples',
+        nargs='*',
+        default=['carmichael.scm', 'carmichael-stream.scm'],
+        help='Examples to run')
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    if shutil.which('gcc'):
+        c_time, expected = run_c(args.count)
+        print('{:<32}{:>10.3f}s'.format('carmichael.c', c_time))
+    else:
+        c_time, expected = None, None
+        print('gcc not found: not timing carmichael.c')
+
+    for example in args.examples:
+        for engine in args.engine or sorted(engines):
+            elapsed, output = run_slyther(example, engine, args.count)
+            if expected is not None and output != expected:
+                sys.exit('{} on {} printed {}, expected {}'.format(
+                    example, engine, output, expected))
+            row = '{:<32}{:>10.3f}s'.format(
+                '{} ({})'.format(example, engine), elapsed)
+            if c_time:
+                row += ' ({:.2f}x C)'.format(c_time / elapsed)
+            print(row)
+
+
+if __name__ == '__main__':
+    main()
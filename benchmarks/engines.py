@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Time each of the evaluation engines on the programs in ``examples/``.
+
+The examples loop forever, so each is stopped once it has printed a fixed
+number of lines. Output is swallowed, and input is faked. Run from the base
+directory::
+
+    $ python benchmarks/engines.py
+    $ python benchmarks/engines.py --engine tree --engine closure is-prime.scm
+
+For each example, the best time out of ``--repeat`` runs is reported, along
+with the speedup over the ``tree`` engine (``lisp_eval``). With ``--stats``,
+the hit rates of the caches are reported instead::
+
+    $ python benchmarks/engines.py --stats prng.scm
+
+The ``tree`` engine compiles functions once they are hot (see
+``slyther.jit``). Pass ``--no-jit`` to time it without doing so::
+
+    $ python benchmarks/engines.py --no-jit --engine tree carmichael.scm
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slyther.types import BuiltinFunction, String     # noqa: E402
+from slyther.interpreter import Interpreter, engines  # noqa: E402
+from slyther import evaluator, jit                    # noqa: E402
+
+examples_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+# lines of output to run each example for, and the input to give it
+workloads = {
+    'carmichael.scm': (2, []),
+    'carmichael-stream.scm': (2, []),
+    'fib-iter.scm': (2000, []),
+    'fib-recursive.scm': (21, []),
+    'gcd.scm': (3000, []),
+    'is-prime.scm': (800, []),
+    'prng.scm': (40, []),
+    'sieve-list.scm': (5, []),
+    'sieve-vector.scm': (5, []),
+    'calculator.scm': (
+        200, ['+', '1', '2', '3', '', '#t'] * 199 + ['+', '1', '', '#f']),
+}
+
+
+class OutputLimitError(Exception):
+    pass
+
+
+def run(name, engine):
+    """
+    Run the example ``name`` on ``engine``, returning the time it took.
+    """
+    lines, inputs = workloads[name]
+    inputs = iter(inputs)
+    count = 0
+
+    @BuiltinFunction('print')
+    def print_(*args):
+        nonlocal count
+        count += 1
+        if count == lines:
+            raise OutputLimitError
+
+    @BuiltinFunction('input')
+    def input_(prompt=''):
+        return String(next(inputs))
+
+    interp = Interpreter(engine=engine)
+    interp.stg['print'].set(print_)
+    interp.stg['input'].set(input_)
+    with open(os.path.join(examples_dir, name)) as f:
+        code = f.read()
+    start = time.perf_counter()
+    try:
+        interp.exec(code)
+    except OutputLimitError:
+        pass
+    return time.perf_counter() - start
+
+
+def report_stats(examples, names):
+    """
+    Run each example once on each engine, reporting the hits and misses of
+    the inline caches and the macro expansion cache.
+    """
+    caches = {'inline': evaluator.inline_caches,
+              'expansion': evaluator.expansions}
+    evaluator.count_hits = True
+    print('{:<20}{:<10}'.format('example', 'engine')
+          + ''.join('{:>28}'.format(c) for c in caches))
+    for example in examples:
+        for e in names:
+            for stats in caches.values():
+                stats.reset()
+            run(example, e)
+            row = '{:<20}{:<10}'.format(example, e)
+            for stats in caches.values():
+                row += '{:>28}'.format('{}/{} ({:.1%})'.format(
+                    stats.hits, stats.hits + stats.misses, stats.hit_rate()))
+            print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--engine',
+        action='append',
+        choices=sorted(engines),
+        help='Engine to time (default: all of them)')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of times to run each example')
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Report the hit rates of the caches, rather than times')
+    parser.add_argument(
+        '--no-jit',
+        action='store_true',
+        help="Do not compile hot functions on the tree engine")
+    parser.add_argument(
+        'examples',
+        nargs='*',
+        default=sorted(workloads),
+        help='Examples to run (default: all that terminate)')
+    args = parser.parse_args()
+    names = args.engine or sorted(engines, key=lambda e: e != 'tree')
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    if args.no_jit:
+        jit.threshold = None
+
+    if args.stats:
+        report_stats(args.examples, names)
+        return
+
+    print('{:<20}'.format('example')
+          + ''.join('{:>18}'.format(e) for e in names))
+    for example in args.examples:
+        times = {e: min(run(example, e) for _ in range(args.repeat))
+                 for e in names}
+        row = '{:<20}'.format(example)
+        for e in names:
+            cell = '{:.3f}s'.format(times[e])
+            if 'tree' in times and e != 'tree':
+                cell += ' ({:.2f}x)'.format(times['tree'] / times[e])
+            row += '{:>18}'.format(cell)
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Compare the environments ``lambda`` gives the functions it creates on the
+tree walking engine: a copy of every visible variable (``fork``), or a
+link to the storage the function was created in (``share``).
+
+Each program below creates many closures. It is run once with each kind of
+environment, reporting the time it took and the peak memory allocated while
+it ran (measured separately, as tracing allocations slows it down). Run
+from the base directory::
+
+    $ python benchmarks/environments.py
+    $ python benchmarks/environments.py --globals 500 let-loop
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slyther.types import LexicalVarStorage    # noqa: E402
+from slyther.interpreter import Interpreter     # noqa: E402
+
+programs = {
+    # each iteration of the loop creates a closure for the let
+    'let-loop': '''
+        (define (loop n acc)
+          (let ((m (- n 1)))
+            (if (= n 0) acc (loop m (+ acc 1)))))
+        (loop 20000 0)''',
+    # an inner helper function, like prime? in examples/carmichael.scm
+    'inner-define': '''
+        (define (outer n)
+          (define (helper x) (+ x n))
+          (helper n))
+        (define (loop n last)
+          (if (= n 0) last (loop (- n 1) (outer n))))
+        (loop 20000 0)''',
+    # keeping each closure alive, so that their memory adds up
+    'adders': '''
+        (define (make-adder n) (lambda (x) (+ x n)))
+        (define (adders n acc)
+          (if (= n 0) acc (adders (- n 1) (cons (make-adder n) acc))))
+        (define kept (adders 5000 NIL))''',
+}
+
+
+share = LexicalVarStorage.share
+
+
+def make_interpreter(nglobals):
+    interp = Interpreter()
+    # some unrelated globals, as a larger program would have
+    for i in range(nglobals):
+        interp.stg.put('global-{}'.format(i), i)
+    return interp
+
+
+def run(name, environments, nglobals, trace=False):
+    """
+    Run the program ``name``, returning the time it took, or if ``trace``
+    is true, the peak memory allocated.
+    """
+    interp = make_interpreter(nglobals)
+    # lambda and define make environments by calling share
+    LexicalVarStorage.share = getattr(LexicalVarStorage, environments)
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        interp.exec(programs[name])
+    finally:
+        LexicalVarStorage.share = share
+    elapsed = time.perf_counter() - start
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--globals',
+        type=int,
+        default=0,
+        help='Number of extra global variables to define')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of times to time each program')
+    parser.add_argument(
+        'programs',
+        nargs='*',
+        default=sorted(programs),
+        help='Programs to run (default: all of them)')
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    print('{:<16}{:>12}{:>12}{:>12}{:>12}'.format(
+        'program', 'fork time', 'share time', 'fork mem', 'share mem'))
+    for name in args.programs:
+        row = '{:<16}'.format(name)
+        for environments in ('fork', 'share'):
+            best = min(run(name, environments, args.globals)
+                       for _ in range(args.repeat))
+            row += '{:>11.3f}s'.format(best)
+        for environments in ('fork', 'share'):
+            peak = run(name, environments, args.globals, trace=True)
+            row += '{:>10.0f}KB'.format(peak / 1024)
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Measure the memory taken by the parsed form of a large generated program,
+with and without sharing identical code (see ``slyther.parser.Interner``).
+The program is made of many small functions and data lists in a few
+shapes, as generated code and data files tend to be. Run from the base
+directory::
+
+    $ python benchmarks/hashcons.py
+    $ python benchmarks/hashcons.py --functions 1000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slyther.parser import lex, parse, Interner  # noqa: E402
+
+shapes = [
+    '''(define (f{n} x y)
+         (cond
+           ((< x 0) (f{m} (- x) y))
+           ((= y 0) (list x y "zero"))
+           (#t (+ (* x x) (* y y) {k}))))''',
+    '''(define (g{n} lst acc)
+         (if (nil? lst)
+             acc
+             (g{n} (cdr lst) (cons (* 2 (car lst)) acc))))''',
+    "(define table{n} '(({k} 1 2) ({k} 3 4) (a b c) (a b c)))",
+]
+
+
+def corpus(functions, seed=0):
+    """
+    Generate a program with ``functions`` definitions.
+    """
+    rng = random.Random(seed)
+    return '\n'.join(
+        rng.choice(shapes).format(
+            n=n, m=rng.randrange(functions), k=rng.randrange(10))
+        for n in range(functions))
+
+
+def measure(code, hashcons):
+    """
+    Lex and parse ``code``, with an ``Interner`` if ``hashcons``. Returns
+    the bytes the result takes with and without the tables of the
+    interner, and the time it took.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    interner = Interner() if hashcons else None
+    exprs = list(parse(lex(code), interner))
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    del interner
+    alone, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del exprs
+    return size, alone, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--functions',
+        type=int,
+        default=5000,
+        help='Number of definitions in the program')
+    args = parser.parse_args()
+    code = corpus(args.functions)
+
+    print('{} definitions, {} bytes of code'.format(
+        args.functions, len(code)))
+    print('{:<10}{:>14}{:>16}{:>10}'.format(
+        'parse', 'bytes', 'without tables', 'time'))
+    for name, hashcons in (('plain', False), ('hashcons', True)):
+        size, alone, elapsed = measure(code, hashcons)
+        print('{:<10}{:>14,}{:>16,}{:>9.2f}s'.format(
+            name, size, alone, elapsed))
+
+
+if __name__ == '__main__':
+    main()
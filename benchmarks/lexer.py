@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Measure the throughput of ``lex`` on a generated source of several
+megabytes, in tokens per second. The source is made of the token sequences
+in ``tests/d2/test_lexer_slow.py``, each written out with random
+whitespace and comments by the generators there, and is checked to lex
+back into the same tokens. Run from the base directory::
+
+    $ python benchmarks/lexer.py
+    $ python benchmarks/lexer.py --megabytes 20
+
+The same source is lexed by ``reference_lex``, which tries the pattern for
+each kind of token in turn, as ``lex`` used to. With ``--check``, the
+script fails if ``lex`` is not at least ``--min-speedup`` times as fast as
+the reference, which guards against regressions independently of the speed
+of the machine it is run on.
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import warnings
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+sys.path.insert(0, os.path.join(base_dir, 'tests', 'd2'))
+
+from slyther.parser import (lex, token_table, shebang_pattern,  # noqa: E402
+                            ControlToken)
+import test_lexer_slow                                        # noqa: E402
+
+patterns = [(re.compile(pattern), emit)
+            for name, pattern, emit in token_table[:-1]]
+
+
+def reference_lex(code):
+    """
+    Lex ``code`` by trying the pattern for each kind of token in turn, at
+    each position.
+    """
+    m = shebang_pattern.match(code)
+    pos = m.end() if m else 0
+    while pos < len(code):
+        for pattern, emit in patterns:
+            m = pattern.match(code, pos)
+            if m:
+                break
+        else:
+            raise SyntaxError("malformed tokens in input")
+        pos = m.end()
+        if isinstance(emit, ControlToken):
+            yield emit
+        elif emit is not None:
+            yield emit(m.group())
+
+
+def generate(megabytes, samples, seed):
+    """
+    Return a source of about ``megabytes`` megabytes, and the tokens in
+    it. ``samples`` different renderings of each token sequence are
+    generated, and repeated in a random order to fill the source.
+    """
+    rng = random.Random(seed)
+    test_lexer_slow.random = rng
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        pieces = [(code, tokens)
+                  for tokens in test_lexer_slow.token_sequences
+                  for code in test_lexer_slow.reprs(tokens, samples)]
+    size = 0
+    codes, tokens = [], []
+    while size < megabytes * 2 ** 20:
+        code, toks = rng.choice(pieces)
+        codes.append(code)
+        tokens.extend(toks)
+        size += len(code.encode('utf-8')) + 1
+    return '\n'.join(codes), tokens
+
+
+def rate(lexer, code, repeat):
+    """
+    Return the best number of tokens per second ``lexer`` lexes ``code``
+    at, out of ``repeat`` runs.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in lexer(code))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--megabytes',
+        type=float,
+        default=4,
+        help='Size of the source to generate')
+    parser.add_argument(
+        '--samples',
+        type=int,
+        default=20,
+        help='Number of renderings of each token sequence')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of times to lex the source')
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed for choosing where whitespace and comments go')
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='Fail if lex is slower than --min-speedup times the reference')
+    parser.add_argument(
+        '--min-speedup',
+        type=float,
+        default=1.25,
+        help='Speedup over the reference lexer required by --check')
+    args = parser.parse_args()
+
+    code, tokens = generate(args.megabytes, args.samples, args.seed)
+    if list(lex(code)) != tokens:
+        sys.exit('lex did not produce the tokens the source was made of')
+    print('{:.1f}MB, {} tokens'.format(
+        len(code.encode('utf-8')) / 2 ** 20, len(tokens)))
+
+    rates = {'lex': rate(lex, code, args.repeat),
+             'reference': rate(reference_lex, code, args.repeat)}
+    for name, r in rates.items():
+        print('{:<12}{:>14,.0f} tokens/s'.format(name, r))
+    speedup = rates['lex'] / rates['reference']
+    print('speedup     {:>14.2f}x'.format(speedup))
+    if args.check and speedup < args.min_speedup:
+        sys.exit('lex is only {:.2f}x as fast as the reference, '
+                 'expected {:.2f}x'.format(speedup, args.min_speedup))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Compare the peak memory (RSS) and time taken to lex a large generated
+source file, read in one of three ways:
+
+:read:   ``f.read()`` into one ``str``, as ``slyther`` used to.
+:stream: the text file object itself, lexed a chunk at a time.
+:mmap:   the file mapped into memory, lexed as UTF-8 bytes.
+
+Each way is run in a process of its own, so that the peaks are separate.
+The file is a data dump of nested lists, strings and numbers. Run from the
+base directory (this writes a 1GB file to a temporary directory, and takes
+a while)::
+
+    $ python benchmarks/mapped.py
+    $ python benchmarks/mapped.py --megabytes 100
+
+The RSS of the ``mmap`` way includes the pages of the file which are
+mapped in, which belong to the page cache: unlike a heap, the OS can drop
+them whenever it needs the memory.
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from slyther.parser import lex, mapped  # noqa: E402
+
+record = '(item {n} "name {n}; λ" {x} (tags alpha beta) \'(1 2 3))\n'
+
+
+def generate(path, megabytes):
+    """
+    Write about ``megabytes`` megabytes of records to ``path``.
+    """
+    size = megabytes * 2 ** 20
+    with open(path, 'w', encoding='utf-8') as f:
+        n = 0
+        while f.tell() < size:
+            f.write(''.join(record.format(n=n + i, x=(n + i) / 7)
+                            for i in range(1000)))
+            n += 1000
+
+
+def child(way, path):
+    """
+    Lex the file at ``path`` in the given way, printing the number of
+    tokens, the time it took and the peak RSS of the process.
+    """
+    start = time.perf_counter()
+    with open(path, encoding='utf-8') as f:
+        if way == 'read':
+            count = sum(1 for _ in lex(f.read()))
+        elif way == 'stream':
+            count = sum(1 for _ in lex(f))
+        else:
+            with mapped(f) as buf:
+                count = sum(1 for _ in lex(buf))
+    elapsed = time.perf_counter() - start
+    # in kB on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(count, elapsed, rss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--megabytes',
+        type=int,
+        default=1024,
+        help='Size of the file to generate')
+    parser.add_argument(
+        '--way',
+        action='append',
+        choices=['read', 'stream', 'mmap'],
+        help='Way to read the file (default: all of them)')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'data.scm')
+        generate(path, args.megabytes)
+        print('{:.0f}MB file'.format(os.path.getsize(path) / 2 ** 20))
+        print('{:<10}{:>14}{:>12}{:>14}'.format(
+            'way', 'tokens', 'time', 'peak RSS'))
+        for way in args.way or ['read', 'stream', 'mmap']:
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', way, path],
+                check=True, stdout=subprocess.PIPE, universal_newlines=True)
+            count, elapsed, rss = out.stdout.split()
+            print('{:<10}{:>14}{:>11.2f}s{:>12.1f}MB'.format(
+                way, count, float(elapsed), int(rss) / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Measure the memory taken by each cell of a long ``ConsList`` (and
+``SExpression``), and by each ``Variable`` and ``Quoted``. The elements are
+created beforehand, so only the objects themselves are counted. Run from
+the base directory::
+
+    $ python benchmarks/memory.py
+    $ python benchmarks/memory.py --length 100000
+"""
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slyther.types import (ConsList, SExpression, Variable,  # noqa: E402
+                           Quoted)
+
+kinds = {
+    'ConsList': ConsList.from_iterable,
+    'SExpression': SExpression.from_iterable,
+    'Variable': lambda items: [Variable(item) for item in items],
+    'Quoted': lambda items: [Quoted(item) for item in items],
+}
+
+
+def measure(make, items):
+    """
+    Return the number of bytes allocated by ``make(items)`` for each item.
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    made = make(items)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del made
+    return (after - before) / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--length',
+        type=int,
+        default=10 ** 6,
+        help='Number of objects to create')
+    args = parser.parse_args()
+    items = list(range(args.length))
+
+    print('{:<14}{:>16}'.format('object', 'bytes each'))
+    for name, make in kinds.items():
+        print('{:<14}{:>16.1f}'.format(name, measure(make, items)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Measure how long the REPL takes to tell, line by line, when a long pasted
+definition is complete: with a ``LexState`` fed each line, as ``repl``
+does, and by lexing and parsing everything typed so far again for each
+line, until it no longer ends early. Run from the base directory::
+
+    $ python benchmarks/repl.py
+    $ python benchmarks/repl.py --lines 500 1000 2000
+"""
+import os
+import sys
+import time
+import argparse
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from slyther.parser import lex, parse, LexState  # noqa: E402
+
+
+def paste(lines):
+    """
+    Return the lines of a definition ``lines`` long, with strings and
+    comments in it.
+    """
+    body = ['  (f "a (string)" x) ; a comment (']
+    return ['(define (f x)'] + body * (lines - 2) + ['  x)']
+
+
+def incremental(lines):
+    """
+    Feed each line to a ``LexState``, returning at which it is complete.
+    """
+    state = LexState()
+    for i, line in enumerate(lines):
+        state.feed(line + '\n')
+        if state.complete:
+            return i
+
+
+def relex(lines):
+    """
+    Parse everything typed so far for each line, returning at which it
+    parses.
+    """
+    buf = ''
+    for i, line in enumerate(lines):
+        buf += line + '\n'
+        try:
+            list(parse(lex(buf)))
+        except SyntaxError:
+            continue
+        return i
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--lines',
+        type=int,
+        nargs='+',
+        default=[250, 500, 1000],
+        help='Lengths of the definitions to paste')
+    args = parser.parse_args()
+
+    print('{:>8}{:>14}{:>14}'.format('lines', 'LexState', 're-lex'))
+    for n in args.lines:
+        lines = paste(n)
+        times = []
+        for check in (incremental, relex):
+            start = time.perf_counter()
+            assert check(lines) == n - 1
+            times.append(time.perf_counter() - start)
+        print('{:>8}{:>13.4f}s{:>13.4f}s'.format(n, *times))
+
+
+if __name__ == '__main__':
+    main()
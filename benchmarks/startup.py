@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Measure the time ``slyther --load lib.scm script.scm`` takes to start, for
+a large generated library (see ``benchmarks/hashcons.py``), without the
+cache of parsed code (``--no-cache``), the first time with it (when the
+cache is written), and then each time after (when it is read). Each run is
+a fresh process. Run from the base directory::
+
+    $ python benchmarks/startup.py
+    $ python benchmarks/startup.py --functions 20000
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(base_dir, 'benchmarks'))
+
+from hashcons import corpus  # noqa: E402
+
+
+def start(lib, script, *options):
+    """
+    Return the time ``slyther`` takes to load ``lib`` and run ``script``.
+    """
+    env = dict(os.environ, PYTHONPATH=base_dir)
+    begin = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-m', 'slyther', '--load', lib, script, *options],
+        check=True, env=env, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--functions',
+        type=int,
+        default=5000,
+        help='Number of definitions in the library')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of times to start each way')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = os.path.join(tmp, 'lib.scm')
+        script = os.path.join(tmp, 'script.scm')
+        with open(lib, 'w') as f:
+            f.write(corpus(args.functions))
+        with open(script, 'w') as f:
+            f.write('(print "ready")\n')
+        print('library: {:.1f}kB'.format(os.path.getsize(lib) / 1024))
+
+        times = {'no cache': [], 'cold cache': [], 'warm cache': []}
+        for _ in range(args.repeat):
+            times['no cache'].append(start(lib, script, '--no-cache'))
+            shutil.rmtree(os.path.join(tmp, '__slycache__'),
+                          ignore_errors=True)
+            times['cold cache'].append(start(lib, script))
+            times['warm cache'].append(start(lib, script))
+        slyc = os.path.join(tmp, '__slycache__', 'lib.slyc')
+        print('cache: {:.1f}kB'.format(os.path.getsize(slyc) / 1024))
+
+    print('{:<14}{:>10}'.format('way', 'best'))
+    for way, ts in times.items():
+        print('{:<14}{:>9.3f}s'.format(way, min(ts)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Measure the throughput of ``parse_strlit``, in string literals per second,
+on generated literals with no escape sequences and on literals made mostly
+of them, against ``reference_parse_strlit``, which decodes a character at
+a time, as ``parse_strlit`` used to. Run from the base directory::
+
+    $ python benchmarks/strlit.py
+    $ python benchmarks/strlit.py --length 200 --count 20000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from string import hexdigits
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from slyther.types import String                      # noqa: E402
+from slyther.parser import parse_strlit, escapes      # noqa: E402
+
+
+def reference_parse_strlit(tok):
+    """
+    Decode the string literal ``tok`` a character at a time.
+    """
+    body = tok[1:-1]
+    result = []
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c != '\\' or i + 1 == len(body):
+            result.append(c)
+            i += 1
+            continue
+        esc = body[i + 1]
+        if esc == '0' and all(d in '01234567' for d in body[i + 2:i + 4]) \
+                and len(body[i + 2:i + 4]) == 2:
+            result.append(chr(int(body[i + 2:i + 4], 8)))
+            i += 4
+        elif esc == 'x' and all(d in hexdigits for d in body[i + 2:i + 4]) \
+                and len(body[i + 2:i + 4]) == 2:
+            result.append(chr(int(body[i + 2:i + 4], 16)))
+            i += 4
+        elif esc in escapes:
+            result.append(escapes[esc])
+            i += 2
+        else:
+            result.append(c)
+            i += 1
+    return String(''.join(result))
+
+
+plain = 'abcdefghijklmnopqrstuvwxyz ABCDEFGHIJ0123456789;()\'λ'
+pieces = [r'\n', r'\t', r'\"', r'\\', r'\e', r'\x41', r'\x7f', r'\012',
+          r'\q', 'a']
+
+
+def generate(length, count, dense, seed):
+    """
+    Return ``count`` literals with bodies ``length`` pieces long: single
+    characters, or, if ``dense``, mostly escape sequences.
+    """
+    rng = random.Random(seed)
+    choices = pieces if dense else plain
+    return ['"{}"'.format(''.join(rng.choice(choices)
+                                  for _ in range(length)))
+            for _ in range(count)]
+
+
+def rate(decode, literals, repeat):
+    """
+    Return the best number of literals per second ``decode`` decodes, out
+    of ``repeat`` runs.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tok in literals:
+            decode(tok)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(literals) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--length',
+        type=int,
+        default=50,
+        help='Number of characters or escapes in each literal')
+    parser.add_argument(
+        '--count',
+        type=int,
+        default=10000,
+        help='Number of literals of each kind')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of times to decode the literals')
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed for generating the literals')
+    args = parser.parse_args()
+
+    print('{:<14}{:>16}{:>16}{:>10}'.format(
+        'literals', 'parse_strlit', 'reference', 'speedup'))
+    for name, dense in (('escape-free', False), ('escape-dense', True)):
+        literals = generate(args.length, args.count, dense, args.seed)
+        for tok in literals:
+            if parse_strlit(tok) != reference_parse_strlit(tok):
+                sys.exit('parse_strlit differs from the reference on '
+                         + tok)
+        new = rate(parse_strlit, literals, args.repeat)
+        old = rate(reference_parse_strlit, literals, args.repeat)
+        print('{:<14}{:>14,.0f}/s{:>14,.0f}/s{:>9.1f}x'.format(
+            name, new, old, new / old))
+
+
+if __name__ == '__main__':
+    main()
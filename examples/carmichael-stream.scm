@@ -0,0 +1,44 @@
+#!/usr/bin/env slyther
+; Prints all Carmichael numbers: 561, 1105, 1729, 2465, ...
+; See https://en.wikipedia.org/wiki/Carmichael_number
+
+; The same as carmichael.scm, but written as a pipeline over the infinite
+; stream of odd numbers. Each element is only computed once, when it is
+; needed, and the elements already printed are not kept.
+
+(define (divides? a b)
+  (= (remainder b a) 0))
+
+(define (prime? n)
+  (define stop (exact-integer-sqrt n))
+  (define (prime-iter x)
+    (and (not (divides? x n))
+         (if (<= x stop)
+             (prime-iter (+ 2 x))
+             #t)))
+  (cond
+    ((> n 3) (and
+               (not (divides? 2 n))
+               (prime-iter 3)))
+    ((>= n 2) #t)
+    (#t #f)))
+
+(define (fermat-prime? n)
+  (define (prime-iter b)
+    (and (= (expt b n n) (remainder b n))
+         (if (< b n)
+             (prime-iter (+ 1 b))
+             #t)))
+  (prime-iter 2))
+
+(define (carmichael? n)
+  (and (fermat-prime? n) (not (prime? n))))
+
+(define (odds-from n)
+  (cons-stream n (odds-from (+ 2 n))))
+
+(define (print-stream s)
+  (print (stream-car s))
+  (print-stream (stream-cdr s)))
+
+(print-stream (stream-filter carmichael? (odds-from 5)))
@@ -9,17 +9,8 @@
   ; return #t if a divides b, #f otherwise
   (= (remainder b a) 0))
 
-(define (isqrt n)
-  ; compute (floor (sqrt n)), but "efficently"
-  (define (isqrt-iter guess)
-    (let ((next (/ (+ guess (/ n guess)) 2)))
-      (if (< (abs (- next guess)) 1)
-          (floor next)
-          (isqrt-iter next))))
-  (isqrt-iter (/ n 2)))
-
 (define (prime? n)
-  (define stop (isqrt n))
+  (define stop (exact-integer-sqrt n))
   (define (prime-iter x)
     (and (not (divides? x n))
          (if (<= x stop)
@@ -32,12 +23,9 @@
     ((>= n 2) #t)
     (#t #f)))
 
-(define (congruent a b m)
-  (= (remainder a m) (remainder b m)))
-
 (define (fermat-prime? n)
   (define (prime-iter b)
-    (and (congruent (expt b n) b n)
+    (and (= (expt b n n) (remainder b n))
          (if (< b n)
              (prime-iter (+ 1 b))
              #t)))
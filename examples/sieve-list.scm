@@ -0,0 +1,41 @@
+#!/usr/bin/env slyther
+; Count the primes below n with the sieve of Eratosthenes, keeping the
+; marks in a list: each is read in O(n), and striking out the multiples
+; of a prime copies the list. Compare with sieve-vector.scm.
+
+(define (list-ref lst k)
+  (if (= k 0) (car lst) (list-ref (cdr lst) (- k 1))))
+
+(define (reverse-onto lst acc)
+  (if (nil? lst) acc (reverse-onto (cdr lst) (cons (car lst) acc))))
+
+(define (make-marks n)
+  (define (iter i acc)
+    (if (= i n) acc (iter (+ i 1) (cons #t acc))))
+  (iter 0 NIL))
+
+(define (strike marks start step)
+  ; strike out start, start + step, ... by copying the list
+  (define (iter lst i acc)
+    (cond ((nil? lst) (reverse-onto acc NIL))
+          ((and (>= i start) (= (remainder (- i start) step) 0))
+           (iter (cdr lst) (+ i 1) (cons #f acc)))
+          (#t (iter (cdr lst) (+ i 1) (cons (car lst) acc)))))
+  (iter marks 0 NIL))
+
+(define (count-primes n)
+  (define (sift marks i)
+    (cond ((> (* i i) n) marks)
+          ((list-ref marks i) (sift (strike marks (* i i) i) (+ i 1)))
+          (#t (sift marks (+ i 1)))))
+  (define (count lst i acc)
+    (cond ((nil? lst) acc)
+          ((and (>= i 2) (car lst)) (count (cdr lst) (+ i 1) (+ acc 1)))
+          (#t (count (cdr lst) (+ i 1) acc))))
+  (count (sift (make-marks n) 2) 0 0))
+
+(define (count-up n stop)
+  (print "primes below" n (count-primes n))
+  (if (< n stop) (count-up (* n 2) stop)))
+
+(count-up 250 4000)
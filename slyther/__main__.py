@@ -3,7 +3,7 @@ import sys
 import importlib
 import argparse
 import traceback
-from slyther.interpreter import Interpreter
+from slyther.interpreter import Interpreter, engines
 
 
 def main():
@@ -15,6 +15,30 @@ def main():
         '--pypy',
         action='store_true',
         help='Run using PyPy (experimental and not required to work)')
+    parser.add_argument(
+        '--engine',
+        choices=sorted(engines),
+        default='tree',
+        help='How to evaluate expressions (default: tree)')
+    parser.add_argument(
+        '--fold',
+        action='store_true',
+        help='Compute calls to pure builtins on constants before evaluating')
+    parser.add_argument(
+        '--hashcons',
+        action='store_true',
+        help='Share identical code between the expressions parsed')
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='Map source files into memory, rather than reading them')
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not cache parsed source files in __slycache__')
+    parser.add_argument(
+        '--cache-dir',
+        help='Cache parsed source files here, rather than next to them')
     parser.add_argument(
         '--load',
         action='append',
@@ -42,13 +66,22 @@ def main():
     # This is just an easy way to allow no exception catching when pdb
     # is loaded. This allows the implementer to use python -m pdb and
     # do easy post-mortem debugging.
-    interp = Interpreter()
+    interp = Interpreter(engine=args.engine, fold=args.fold,
+                         hashcons=args.hashcons)
+
+    def execute(f):
+        if args.mmap:
+            interp.exec_file(f)
+        elif not args.no_cache and os.path.isfile(f.name):
+            interp.exec_cached(f.name, args.cache_dir)
+        else:
+            interp.exec(f)
 
     def run(debug=False):
         for f in args.load:
-            interp.exec(f.read())
+            execute(f)
         if args.source:
-            interp.exec(args.source.read())
+            execute(args.source)
         else:
             from slyther.repl import repl
             repl(interp, debug=debug)
@@ -2,13 +2,14 @@ import operator
 from functools import reduce
 from slyther.types import (BuiltinFunction, BuiltinMacro, Symbol,
                            UserFunction, SExpression, cons, String,
-                           ConsList, NIL, LexicalVarStorage, ConsCell)
+                           ConsList, NIL, LexicalVarStorage, ConsCell,
+                           Quoted, PackedList, Vector, Promise)
 from slyther.evaluator import lisp_eval
 from slyther.parser import lex, parse
-from math import floor, ceil, sqrt
+from math import floor, ceil, sqrt, gcd
 
 
-@BuiltinFunction('+')
+@BuiltinFunction('+', pure=True)
 def add(*args):
     """
     Sum each of the arguments
@@ -22,10 +23,10 @@ def add(*args):
 
         Use ``sum`` or ``reduce``.
     """
-    raise NotImplementedError("Deliverable 3")
+    return reduce(operator.add, args) if args else 0
 
 
-@BuiltinFunction('-')
+@BuiltinFunction('-', pure=True)
 def sub(*args):
     """
     ``(- x y z)`` computes ``x - y - z``, but with only one argument,
@@ -44,10 +45,12 @@ def sub(*args):
 
         Use ``reduce``.
     """
-    raise NotImplementedError("Deliverable 3")
+    if len(args) == 1:
+        return -args[0]
+    return reduce(operator.sub, args) if args else 0
 
 
-@BuiltinFunction('*')
+@BuiltinFunction('*', pure=True)
 def mul(*args):
     """
     Compute the product.
@@ -61,10 +64,10 @@ def mul(*args):
     >>> mul()
     1
     """
-    raise NotImplementedError("Deliverable 3")
+    return reduce(operator.mul, args, 1)
 
 
-@BuiltinFunction('/')
+@BuiltinFunction('/', pure=True)
 def div(*args):
     """
     ``(/ a b c)`` computes ``a / b / c``, but ``(/ a)`` computes
@@ -77,10 +80,12 @@ def div(*args):
     >>> div(2)
     0.5
     """
-    raise NotImplementedError("Deliverable 3")
+    if len(args) == 1:
+        return 1 / args[0]
+    return reduce(operator.truediv, args)
 
 
-@BuiltinFunction
+@BuiltinFunction('floordiv', pure=True)
 def floordiv(*args):
     """
     Equivalent to ``div``, but uses ``operator.floordiv``.
@@ -94,7 +99,9 @@ def floordiv(*args):
     >>> floordiv(2)
     0
     """
-    raise NotImplementedError("Deliverable 3")
+    if len(args) == 1:
+        return 1 // args[0]
+    return reduce(operator.floordiv, args)
 
 
 # IO
@@ -102,71 +109,236 @@ print_ = BuiltinFunction(print)
 input_ = BuiltinFunction(input)
 
 # Type Constructors
-make_int = BuiltinFunction(int, 'make-integer')
-make_float = BuiltinFunction(float, 'make-float')
-make_symbol = BuiltinFunction(Symbol, 'make-symbol')
-make_string = BuiltinFunction(String, 'make-string')
+make_int = BuiltinFunction(int, 'make-integer', pure=True)
+make_float = BuiltinFunction(float, 'make-float', pure=True)
+make_symbol = BuiltinFunction(Symbol, 'make-symbol', pure=True)
+make_string = BuiltinFunction(String, 'make-string', pure=True)
 
 
-@BuiltinFunction('list')
+@BuiltinFunction('list', pure=True)
 def list_(*args) -> ConsList:
     """
-    Create a ``ConsList`` from ``args``.
+    Create a ``ConsList`` from ``args``, packed (see ``PackedList``).
 
     >>> list_(1, 2, 3)
     (list 1 2 3)
     >>> list_()
     NIL
     """
-    raise NotImplementedError("Deliverable 3")
+    return PackedList.from_iterable(args)
 
 
 # Comparators
-lt = BuiltinFunction(operator.lt, '<')
-gt = BuiltinFunction(operator.gt, '>')
-eq = BuiltinFunction(operator.eq, '=')
-le = BuiltinFunction(operator.le, '<=')
-ge = BuiltinFunction(operator.ge, '>=')
-not_ = BuiltinFunction(operator.not_, 'not')
+lt = BuiltinFunction(operator.lt, '<', pure=True)
+gt = BuiltinFunction(operator.gt, '>', pure=True)
+eq = BuiltinFunction(operator.eq, '=', pure=True)
+le = BuiltinFunction(operator.le, '<=', pure=True)
+ge = BuiltinFunction(operator.ge, '>=', pure=True)
+not_ = BuiltinFunction(operator.not_, 'not', pure=True)
 
 # arithmetic
-remainder = BuiltinFunction(operator.mod, 'remainder')
-floor_ = BuiltinFunction(floor)
-ceil_ = BuiltinFunction(ceil)
-sqrt_ = BuiltinFunction(sqrt)
-abs_ = BuiltinFunction(abs)
-expt = BuiltinFunction(operator.pow, 'expt')
+remainder = BuiltinFunction(operator.mod, 'remainder', pure=True)
+floor_ = BuiltinFunction(floor, pure=True)
+ceil_ = BuiltinFunction(ceil, pure=True)
+sqrt_ = BuiltinFunction(sqrt, pure=True)
+abs_ = BuiltinFunction(abs, pure=True)
+
+
+@BuiltinFunction('expt', pure=True)
+def expt(base, exponent, modulus=None):
+    """
+    Raise ``base`` to ``exponent``. With a ``modulus``, compute the power
+    modulo ``modulus`` without ever computing the whole power, which makes
+    a big difference when the power has many digits.
+
+    >>> expt(2, 10)
+    1024
+    >>> expt(3, 10 ** 9, 7)
+    4
+    """
+    return pow(base, exponent, modulus)
+
+
+# number theory
+@BuiltinFunction('exact-integer-sqrt', pure=True)
+def exact_integer_sqrt(n: int) -> int:
+    """
+    Compute ``(floor (sqrt n))`` exactly, even if ``n`` has more digits
+    than a float can hold.
+
+    >>> exact_integer_sqrt(15), exact_integer_sqrt(16)
+    (3, 4)
+    >>> exact_integer_sqrt(10 ** 40 - 1)
+    99999999999999999999
+    """
+    if n < 0:
+        raise ValueError('exact-integer-sqrt of a negative number')
+    if n == 0:
+        return 0
+    # Newton's method from above, starting at a power of two >= sqrt(n)
+    x = 1 << ((n.bit_length() + 1) // 2)
+    while True:
+        y = (x + n // x) // 2
+        if y >= x:
+            return x
+        x = y
+
+
+@BuiltinFunction('gcd', pure=True)
+def gcd_(*args) -> int:
+    """
+    Compute the greatest common divisor of the arguments, which is ``0``
+    if there are none.
+
+    >>> gcd_(12, 18, 8)
+    2
+    >>> gcd_()
+    0
+    """
+    return reduce(gcd, args, 0)
+
+
+@BuiltinFunction('lcm', pure=True)
+def lcm(*args) -> int:
+    """
+    Compute the least common multiple of the arguments, which is ``1``
+    if there are none.
+
+    >>> lcm(4, 6, 10)
+    60
+    >>> lcm(3, 0)
+    0
+    >>> lcm()
+    1
+    """
+    return reduce(lambda a, b: a * b // gcd(a, b) if a and b else 0,
+                  map(abs, args), 1)
+
 
 # string manipulation
 format_ = BuiltinFunction(str.format)
 split = BuiltinFunction(str.split)
 
 # cons cell functions
-cons = BuiltinFunction(cons)
+cons = BuiltinFunction(cons, pure=True)
 
 
-@BuiltinFunction
+@BuiltinFunction('car', pure=True)
 def car(cell: ConsCell):
     """
     Get the ``car`` of a cons cell.
     """
-    raise NotImplementedError("Deliverable 3")
+    return cell.car
 
 
-@BuiltinFunction
+@BuiltinFunction('cdr', pure=True)
 def cdr(cell: ConsCell):
     """
     Get the ``cdr`` of a cons cell.
     """
-    raise NotImplementedError("Deliverable 3")
+    return cell.cdr
 
 
-@BuiltinFunction('nil?')
+@BuiltinFunction('nil?', pure=True)
 def is_nil(cell: ConsCell) -> bool:
     """
     Return ``True`` if the cell is ``NIL``, ``False`` otherwise.
     """
-    raise NotImplementedError("Deliverable 3")
+    return cell is NIL
+
+
+# vectors: none of these are pure, as vectors may be changed
+@BuiltinFunction('vector')
+def vector(*args) -> Vector:
+    """
+    Create a ``Vector`` of ``args``.
+
+    >>> vector(1, 2, 3)
+    (vector 1 2 3)
+    """
+    return Vector(args)
+
+
+@BuiltinFunction('make-vector')
+def make_vector(k, fill=NIL) -> Vector:
+    """
+    Create a ``Vector`` of ``k`` elements, each of them ``fill``.
+
+    >>> make_vector(3, 0)
+    (vector 0 0 0)
+    >>> make_vector(2)
+    (vector NIL NIL)
+    """
+    return Vector([fill] * k)
+
+
+def check_index(vec: Vector, k):
+    """
+    Raise ``IndexError`` unless ``k`` is an index of an element of ``vec``.
+    """
+    if not 0 <= k < len(vec):
+        raise IndexError('vector index {} out of range'.format(k))
+
+
+@BuiltinFunction('vector-ref')
+def vector_ref(vec: Vector, k):
+    """
+    Get element ``k`` of a vector. Unlike a Python list, a negative ``k``
+    is out of range:
+
+    >>> vector_ref(make_vector(3, 0), -1)
+    Traceback (most recent call last):
+        ...
+    IndexError: vector index -1 out of range
+    """
+    check_index(vec, k)
+    return vec[k]
+
+
+@BuiltinFunction('vector-set!')
+def vector_set(vec: Vector, k, value):
+    """
+    Set element ``k`` of a vector to ``value``.
+
+    >>> vec = make_vector(3, 0)
+    >>> vector_set(vec, 1, 5)
+    NIL
+    >>> vec
+    (vector 0 5 0)
+    """
+    check_index(vec, k)
+    vec[k] = value
+
+
+@BuiltinFunction('vector-length')
+def vector_length(vec: Vector) -> int:
+    """
+    Return the number of elements of a vector.
+    """
+    return len(vec)
+
+
+@BuiltinFunction('vector->list')
+def vector_to_list(vec: Vector) -> ConsList:
+    """
+    Create a ``ConsList`` of the elements of a vector, packed (see
+    ``PackedList``).
+
+    >>> vector_to_list(vector(1, 2))
+    (list 1 2)
+    """
+    return PackedList.from_iterable(vec)
+
+
+@BuiltinFunction('list->vector')
+def list_to_vector(lst: ConsList) -> Vector:
+    """
+    Create a ``Vector`` of the elements of a list.
+
+    >>> list_to_vector(list_(1, 2))
+    (vector 1 2)
+    """
+    return Vector(lst)
 
 
 @BuiltinMacro
@@ -216,7 +388,16 @@ def define(se: SExpression, stg: LexicalVarStorage):
         ...
     KeyError: 'x'
     """
-    raise NotImplementedError("Deliverable 4")
+    if isinstance(se.car, SExpression):
+        name = se.car.car
+        value = lambda_func(SExpression(se.car.cdr, se.cdr), stg)
+    else:
+        name = se.car
+        value = lisp_eval(se.cdr.car, stg)
+    stg.put(name, value)
+    if isinstance(value, UserFunction):
+        # make the function visible to itself, so it can recurse
+        value.environ[name] = stg[name]
 
 
 @BuiltinMacro('lambda')
@@ -240,10 +421,10 @@ def lambda_func(se: SExpression, stg: LexicalVarStorage) -> UserFunction:
     >>> f.environ['x'].value
     20
     """
-    raise NotImplementedError("Deliverable 4")
+    return UserFunction(params=se.car, body=se.cdr, environ=stg.share())
 
 
-@BuiltinMacro('let')
+@BuiltinMacro('let', runtime=False)
 def let(se: SExpression, stg: LexicalVarStorage) -> SExpression:
     """
     The ``let`` macro binds variables to a local scope: the expressions
@@ -281,7 +462,10 @@ def let(se: SExpression, stg: LexicalVarStorage) -> SExpression:
     >>> lisp_eval(Symbol('x'), stg)
     10
     """
-    raise NotImplementedError("Deliverable 4")
+    params = SExpression.from_iterable(binding.car for binding in se.car)
+    values = SExpression.from_iterable(binding.cdr.car for binding in se.car)
+    return SExpression(
+        SExpression(Symbol('lambda'), SExpression(params, se.cdr)), values)
 
 
 @BuiltinMacro('if')
@@ -312,7 +496,9 @@ def if_expr(se: SExpression, stg: LexicalVarStorage):
     >>> if_expr(se, stg)
     (print "x is greater than or equal to 10")
     """
-    raise NotImplementedError("Deliverable 4")
+    if lisp_eval(se.car, stg):
+        return se.cdr.car
+    return se.cdr.cdr.car
 
 
 @BuiltinMacro('cond')
@@ -351,7 +537,16 @@ def cond(se: SExpression, stg: LexicalVarStorage):
     >>> test_cond(15)
     (print "x >= 15")
     """
-    raise NotImplementedError("Deliverable 4")
+    for clause in se:
+        value = lisp_eval(clause.car, stg)
+        if value:
+            if clause.cdr is NIL:
+                return Quoted(value)
+            if clause.cdr.cdr is NIL:
+                return clause.cdr.car
+            return SExpression(
+                SExpression(Symbol('lambda'), SExpression(NIL, clause.cdr)))
+    return NIL
 
 
 @BuiltinMacro('and')
@@ -394,7 +589,13 @@ def and_(se: SExpression, stg: LexicalVarStorage):
     >>> lisp_eval(lisp('(and)'), stg)
     NIL
     """
-    raise NotImplementedError("Deliverable 4")
+    for cell in se.cells():
+        if cell.cdr is NIL:
+            return cell.car
+        value = lisp_eval(cell.car, stg)
+        if not value:
+            return Quoted(value)
+    return NIL
 
 
 @BuiltinMacro('or')
@@ -428,7 +629,13 @@ def or_(se: SExpression, stg: LexicalVarStorage):
     >>> lisp_eval(lisp('(or)'), stg)
     NIL
     """
-    raise NotImplementedError("Deliverable 4")
+    for cell in se.cells():
+        if cell.cdr is NIL:
+            return cell.car
+        value = lisp_eval(cell.car, stg)
+        if value:
+            return Quoted(value)
+    return NIL
 
 
 @BuiltinMacro('set!')
@@ -461,7 +668,11 @@ def setbang(se: SExpression, stg: LexicalVarStorage):
         ...
     KeyError: 'Undefined variable baz'
     """
-    raise NotImplementedError("Deliverable 4")
+    try:
+        var = stg[se.car]
+    except KeyError:
+        raise KeyError('Undefined variable {}'.format(se.car)) from None
+    var.set(lisp_eval(se.cdr.car, stg))
 
 
 @BuiltinMacro('eval')
@@ -503,7 +714,24 @@ def eval_(se: SExpression, stg: LexicalVarStorage):
     0
     NIL
     """
-    raise NotImplementedError("Deliverable 4")
+    value = lisp_eval(se.car, stg)
+    if isinstance(value, ConsList):
+        return to_sexpression(value)
+    return value
+
+
+def to_sexpression(lst: ConsList) -> SExpression:
+    """
+    Upgrade a ``ConsList`` (and any ``ConsList`` inside of it) to an
+    ``SExpression``, so that it can be evaluated as code.
+
+    >>> to_sexpression(ConsList.from_iterable(
+    ...     [Symbol('print'), ConsList.from_iterable([Symbol('f'), 1])]))
+    (print (f 1))
+    """
+    return SExpression.from_iterable(
+        to_sexpression(x) if isinstance(x, ConsList) and x is not NIL else x
+        for x in lst)
 
 
 @BuiltinFunction('parse')
@@ -520,4 +748,126 @@ def parse_string(code: String):
     Note that the ``BuiltinFunction`` decorator takes care of downgrading an
     ``SExpression`` to a ``ConsList`` for you.
     """
-    raise NotImplementedError("Deliverable 4")
+    return next(parse(lex(code)))
+
+
+# lazy evaluation and streams
+@BuiltinFunction('make-promise')
+def make_promise(thunk) -> Promise:
+    """
+    Create a ``Promise`` to call ``thunk``, which ``delay`` expands to.
+    """
+    return Promise(thunk)
+
+
+@BuiltinMacro('delay', runtime=False)
+def delay(se: SExpression, stg: LexicalVarStorage) -> SExpression:
+    """
+    Delay the evaluation of an expression, returning a ``Promise`` which
+    evaluates it once, when it is forced::
+
+        (delay (+ 1 2))
+
+    is equivalent to the following, except that the builtin
+    ``make-promise`` is called even if the name is rebound::
+
+        (make-promise (lambda () (+ 1 2)))
+
+    >>> from slyther.types import *
+    >>> from slyther.parser import lisp
+    >>> expr = delay(lisp('((+ 1 2))'), None)
+    >>> expr.car is make_promise, expr.cdr
+    (True, ((lambda NIL (+ 1 2))))
+    """
+    return SExpression(make_promise, SExpression(SExpression(
+        Symbol('lambda'), SExpression(NIL, se))))
+
+
+@BuiltinMacro('cons-stream', runtime=False)
+def cons_stream(se: SExpression, stg: LexicalVarStorage) -> SExpression:
+    """
+    Create a stream: a cons cell whose ``cdr`` is a promise of the rest of
+    the stream (which is another such cell, or ``NIL``)::
+
+        (cons-stream a b)
+
+    is equivalent to::
+
+        (cons a (delay b))
+
+    >>> from slyther.types import *
+    >>> from slyther.parser import lisp
+    >>> expr = cons_stream(lisp('(1 (f 2))'), None)
+    >>> expr.car.__name__, expr.cdr.car, expr.cdr.cdr.car.cdr
+    ('cons', 1, ((lambda NIL (f 2))))
+    """
+    return SExpression(cons, SExpression(
+        se.car, SExpression(delay(se.cdr, stg))))
+
+
+@BuiltinFunction('force')
+def force(obj):
+    """
+    Return the value of a ``Promise``, computing it if it is the first
+    time. Anything else is returned as it is.
+    """
+    if isinstance(obj, Promise):
+        return obj.force()
+    return obj
+
+
+@BuiltinFunction('stream-car')
+def stream_car(stream: ConsCell):
+    """
+    Get the first element of a stream.
+    """
+    return stream.car
+
+
+@BuiltinFunction('stream-cdr')
+def stream_cdr(stream: ConsCell):
+    """
+    Get the rest of a stream, computing it if it is the first time.
+    """
+    return force(stream.cdr)
+
+
+@BuiltinFunction('stream-take')
+def stream_take(stream: ConsCell, n) -> ConsList:
+    """
+    Return a list of the first ``n`` elements of a stream, or all of them
+    if there are fewer. Only the elements taken are computed.
+
+    >>> s = cons(1, Promise(lambda: cons(2, Promise(lambda: 1 / 0))))
+    >>> stream_take(s, 2)
+    (list 1 2)
+    """
+    items = []
+    while n > 0 and stream is not NIL:
+        items.append(stream.car)
+        n -= 1
+        if n:
+            stream = stream_cdr(stream)
+    return PackedList.from_iterable(items)
+
+
+@BuiltinFunction('stream-filter')
+def stream_filter(pred, stream: ConsCell) -> ConsCell:
+    """
+    Return a stream of the elements of a stream for which ``pred`` is
+    truthy. Elements are only looked at as the result is forced, so this
+    works on infinite streams, and the elements skipped are not kept.
+
+    >>> def count(n):
+    ...     return cons(n, Promise(lambda: count(n + 1)))
+    >>> evens = stream_filter(lambda x: x % 2 == 0, count(1))
+    >>> stream_take(evens, 3)
+    (list 2 4 6)
+    """
+    while stream is not NIL and not pred(stream.car):
+        stream = stream_cdr(stream)
+    if stream is NIL:
+        return NIL
+    rest = stream.cdr
+    return cons(stream.car,
+                Promise(lambda: stream_filter(pred, force(rest))))
@@ -0,0 +1,136 @@
+"""
+A cache of parsed programs on disk, like Python's ``.pyc`` files: the
+first time a source file is loaded, its parsed form is written to a
+``.slyc`` file, in its flat encoding (see ``slyther.flat``), and later
+loads of the same source read that rather than lexing and parsing it
+again.
+
+>>> import os, tempfile
+>>> tmp = tempfile.TemporaryDirectory()
+>>> path = os.path.join(tmp.name, 'lib.scm')
+>>> with open(path, 'w') as f:
+...     _ = f.write('(define (square x) (* x x))')
+>>> load(path)
+[(define (square x) (* x x))]
+>>> os.listdir(os.path.join(tmp.name, '__slycache__'))
+['lib.slyc']
+>>> load(path)
+[(define (square x) (* x x))]
+>>> tmp.cleanup()
+
+A ``.slyc`` file starts with a magic number, the version of the format,
+and the SHA-256 hash of the source it was made from. The cached program
+is only used if all of them match, so an edited source (or one from a
+different version of SlytherLisp) is parsed again, and its cache
+rewritten. Failing to write the cache, say to a read only directory, is
+not an error.
+
+Only parsing is cached: macro expansion and constant folding depend on
+the state of the interpreter at the time, so they are done on each run.
+"""
+import os
+import struct
+import hashlib
+from slyther.parser import lex, parse
+from slyther.flat import FlatProgram
+
+__all__ = ['load', 'cache_path', 'read_cache', 'write_cache', 'max_size']
+
+# magic number, version of the format, SHA-256 of the source
+header = struct.Struct('<4sH32s')
+magic = b'SLYC'
+version = 1
+
+# sources larger than this are not cached, as caching them needs the
+# whole program in memory, rather than a chunk at a time (see ``lex``)
+max_size = 64 * 2 ** 20
+
+
+def cache_path(path, cache_dir=None):
+    """
+    Return where the cache for the source file at ``path`` goes: in a
+    ``__slycache__`` directory next to it, or in ``cache_dir``, where the
+    name also has a hash of the full path of the source, as sources from
+    different directories may have the same name.
+
+    >>> cache_path('lib/util.scm')
+    'lib/__slycache__/util.slyc'
+    >>> cache_path('/lib/util.scm', '/tmp/cache')
+    '/tmp/cache/util.fa1efe66d19f241b.slyc'
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    if cache_dir is None:
+        return os.path.join(os.path.dirname(path), '__slycache__',
+                            name + '.slyc')
+    digest = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()
+    return os.path.join(cache_dir, '{}.{}.slyc'.format(name, digest[:16]))
+
+
+def read_cache(slyc, digest):
+    """
+    Return the ``FlatProgram`` cached at ``slyc`` for a source with the
+    SHA-256 ``digest``, or ``None`` if there is none, or it is stale.
+    """
+    try:
+        with open(slyc, 'rb') as f:
+            data = f.read()
+        tag, ver, source_digest = header.unpack_from(data)
+        if tag != magic or ver != version or source_digest != digest:
+            return None
+        return FlatProgram.frombytes(data[header.size:])
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def write_cache(slyc, digest, program):
+    """
+    Write ``program``, parsed from a source with the SHA-256 ``digest``,
+    to ``slyc``. The file is written under another name and then renamed,
+    so that a run reading it at the same time never sees half of it.
+    Returns whether it was written.
+    """
+    tmp = '{}.{}.tmp'.format(slyc, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(slyc) or '.', exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(header.pack(magic, version, digest))
+            f.write(program.tobytes())
+        os.replace(tmp, slyc)
+        return True
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
+def load(path, cache_dir=None, interner=None):
+    """
+    Return the list of expressions in the source file at ``path``, from
+    its cache if it is up to date, and otherwise by parsing it, and
+    caching the result. The expressions are shared with ``interner`` if
+    given. A source larger than ``max_size`` is not cached, and a
+    generator parsing it a chunk at a time is returned instead.
+    """
+    if os.path.getsize(path) > max_size:
+        return stream(path, interner)
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = hashlib.sha256(source).digest()
+    slyc = cache_path(path, cache_dir)
+    program = read_cache(slyc, digest)
+    if program is None:
+        exprs = list(parse(lex(source), interner))
+        write_cache(slyc, digest, FlatProgram.encode(exprs))
+        return exprs
+    return list(program.decode_all(interner))
+
+
+def stream(path, interner=None):
+    """
+    Generate the expressions in the source file at ``path``, parsing it a
+    chunk at a time.
+    """
+    with open(path, encoding='utf-8') as f:
+        yield from parse(lex(f), interner)
@@ -0,0 +1,859 @@
+"""
+An alternative evaluation engine to ``lisp_eval``. Rather than walking the
+abstract syntax tree each time an expression runs, the ``Compiler`` analyzes
+an expression *once*, producing a tree of Python closures. Each closure
+takes the *frame* of the function it is part of, and computes its part of
+the expression.
+
+>>> from slyther.interpreter import Interpreter
+>>> interp = Interpreter(engine='closure')
+>>> interp.exec('(define (square x) (* x x)) (square 12)')
+144
+
+The type of each AST node is only dispatched on during compilation. Special
+forms (``if``, ``let``, ``define``, ...) are recognized ahead of time when
+their name refers to the builtin macro, so the compiled code never needs to
+call a macro and evaluate the expression it returns.
+
+>>> interp.exec('(define (f n) (if (< n 3) (list n) (let ((m 3)) (* n m))))')
+NIL
+>>> interp.exec('(f 2)')
+(list 2)
+>>> interp.exec('(f 4)')
+12
+
+Names are resolved when a function is compiled, rather than looked up in a
+``LexicalVarStorage`` each time they are used. The variables bound by a
+function (its parameters, its internal ``define``s, and the names bound by
+a ``let`` in its body) live in numbered slots of the function's frame, a
+Python list. Slot 0 of a frame is the frame the function was created in,
+so a free variable is found by following a known number of links, and
+creating a closure is just keeping a reference to the current frame.
+
+Names which are not bound lexically are looked up by name when they are
+used, in slot 1 of the frame: the ``Environment`` the function was created
+in, taken with ``LexicalVarStorage.share``. Like a function made by
+``lisp_eval``, a function sees the globals defined before it, and not the
+ones defined after it:
+
+>>> interp.exec('(define x 1) (define (get-x) x) (define x 2) (get-x)')
+1
+
+Each special form is only compiled ahead of time while its name is bound
+to the builtin macro. If the name is rebound, the form is called like any
+other call:
+
+>>> interp.exec('(set! if (lambda (a b c) c)) (f 2)')
+6
+
+Calls in tail position are returned to the caller as a ``TailCall`` rather
+than made directly, and ``call`` runs them in a loop. Like ``lisp_eval``,
+compiled code runs a tail-recursive loop in constant Python stack space.
+"""
+from collections import ChainMap
+from slyther.types import (Quoted, NIL, SExpression, ConsList, Symbol, Macro,
+                           Variable, Environment, LexicalVarStorage,
+                           UserFunction, BuiltinFunction, PackedList)
+from slyther.evaluator import lisp_eval, expansions
+from slyther import evaluator, builtins
+
+__all__ = ['Compiler', 'FunctionCode', 'CompiledFunction', 'TailCall', 'call',
+           'Scope', 'UNBOUND', 'GlobalSite', 'special_forms',
+           'special_form_name', 'compile_toplevel', 'closure_eval']
+
+
+class Unbound:
+    """
+    The value of a slot for a variable which is defined in a function,
+    before the ``define`` has run.
+    """
+    def __repr__(self):
+        return '#<unbound>'
+
+
+UNBOUND = Unbound()
+
+
+def unbound(name):
+    return KeyError("Undefined variable '{}'".format(name))
+
+
+class Scope:
+    """
+    The variables bound by a function, known at compile time. Each
+    variable has a slot in the function's frame.
+
+    The names bound by a ``let`` are only visible in its body, so
+    ``blocks`` is a stack mapping names to slots, the innermost block last.
+    ``parent`` is the scope of the enclosing function, and ``toplevel`` is
+    true if ``define`` creates global variables in this scope. ``nested``
+    is true for code compiled by ``compile_nested``, which ``define``s
+    variables in the block it was run from.
+    """
+    def __init__(self, parent=None, toplevel=False, nested=False):
+        self.parent = parent
+        self.toplevel = toplevel
+        self.nested = nested
+        self.blocks = [{}]
+        # slot 0 is the parent frame, and slot 1 the environment
+        self.names = [None, None]
+
+    def add(self, name):
+        """
+        Bind ``name`` to a new slot in the innermost block, returning the
+        slot.
+        """
+        slot = len(self.names)
+        self.names.append(name)
+        self.blocks[-1][name] = slot
+        return slot
+
+    def resolve(self, name):
+        """
+        Find a lexically bound variable, returning how many frames up it is
+        and its slot there, or ``None`` if it is global.
+        """
+        scope, depth = self, 0
+        while scope is not None:
+            for block in reversed(scope.blocks):
+                if name in block:
+                    return depth, block[name]
+            scope, depth = scope.parent, depth + 1
+        return None
+
+    def defines_globally(self):
+        return self.toplevel and len(self.blocks) == 1
+
+    def defining_scope(self):
+        """
+        Return the scope whose innermost block ``define`` puts variables
+        in, and how many frames up it is.
+        """
+        scope, depth = self, 0
+        while scope.nested and len(scope.blocks) == 1:
+            scope, depth = scope.parent, depth + 1
+        return scope, depth
+
+    def visible(self):
+        """
+        Iterate over each name in scope, with how many frames up it is and
+        its slot there. Inner bindings come before the ones they hide.
+        """
+        scope, depth = self, 0
+        while scope is not None:
+            for block in reversed(scope.blocks):
+                for name, slot in block.items():
+                    yield name, depth, slot
+            scope, depth = scope.parent, depth + 1
+
+    def snapshot(self):
+        """
+        Copy the names in scope right now, for code compiled later on.
+        """
+        copy = Scope(self.parent and self.parent.snapshot(), self.toplevel,
+                     self.nested)
+        copy.blocks = [dict(block) for block in self.blocks]
+        copy.names = list(self.names)
+        return copy
+
+
+class SlotVariable(Variable):
+    """
+    A ``Variable`` for a slot of a frame, so that a macro called by
+    compiled code can see and ``set!`` the local variables in scope.
+    """
+    __slots__ = ('frame', 'slot', 'name')
+
+    def __init__(self, frame, slot, name):
+        self.frame = frame
+        self.slot = slot
+        self.name = name
+
+    @property
+    def value(self):
+        value = self.frame[self.slot]
+        if value is UNBOUND:
+            raise unbound(self.name)
+        return value
+
+    def set(self, value):
+        self.frame[self.slot] = value
+
+
+def frame_storage(frame, scope, stg):
+    """
+    Create a ``LexicalVarStorage`` for the variables in ``scope``, which
+    are in ``frame``, with the environment of the frame behind them.
+    """
+    local = {}
+    for name, depth, slot in scope.visible():
+        if name not in local:
+            f = frame
+            for _ in range(depth):
+                f = f[0]
+            local[name] = SlotVariable(f, slot, name)
+    if frame[1] is None:
+        return LexicalVarStorage(ChainMap(local, stg.local, stg.environ))
+    return LexicalVarStorage(ChainMap(local, frame[1]))
+
+
+def define_in_frame(frame, depth, name, value, stg):
+    """
+    Put a new variable ``name`` in the environment of the frame ``depth``
+    links up from ``frame``, for a ``define`` in code run by ``eval`` or a
+    macro, of a name which has no slot there. The frames in between are
+    the ones of the nested code, which share the environment.
+    """
+    f = frame
+    for _ in range(depth):
+        f = f[0]
+    env = stg.share() if f[1] is None else f[1]
+    var = Variable(value)
+    env = Environment({name: var}, env)
+    for _ in range(depth + 1):
+        frame[1] = env
+        frame = frame[0]
+    return var
+
+
+class GlobalSite:
+    """
+    An inline cache for a name which is not bound lexically, where it is
+    used by compiled code. The name is looked up in the environment in
+    slot 1 of the frame: the ``Environment`` of the function, or ``None``
+    at the top level, where it is looked up in the storage ``stg``.
+
+    ``env`` is the environment the name was last looked up in, and
+    ``var`` is the ``Variable`` found, or ``None`` until it is looked up.
+    An ``Environment`` is never changed by compiled code, and ``set!``
+    changes the value of the variable, so only putting ``name`` in the
+    storage (``define``) clears the cache of a name looked up there.
+    """
+    __slots__ = ('name', 'stg', 'env', 'var', '__weakref__')
+
+    def __init__(self, name, stg: LexicalVarStorage):
+        self.name = name
+        self.stg = stg
+        self.env = None
+        self.var = None
+
+    def find(self, frame) -> Variable:
+        """
+        Return the variable the name refers to in ``frame``.
+        """
+        var = self.var
+        if var is None or frame[1] is not self.env:
+            var = self.lookup(frame[1])
+        return var
+
+    def lookup(self, env) -> Variable:
+        if env is None:
+            var = (self.stg.local.get(self.name)
+                   or self.stg.environ.get(self.name))
+        else:
+            var = env.get(self.name)
+        if var is None:
+            raise unbound(self.name)
+        evaluator.inline_caches.misses += 1
+        self.env = env
+        self.var = var
+        if env is None:
+            self.stg.watch(self.name, self)
+        return var
+
+
+class TailCall:
+    """
+    Returned by compiled code for a call to a ``CompiledFunction`` in tail
+    position, so that ``call`` can make the call without growing the
+    Python stack.
+    """
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+
+class FunctionCode:
+    """
+    A compiled function.
+
+    * ``run`` is the compiled body: a closure taking a frame.
+    * ``names`` is the name of the variable in each slot of the frame.
+    * ``nparams`` is the number of (non-variadic) parameters, and ``rest``
+      is true if the function is variadic.
+    * ``padding`` is the value of the slots following the parameters when
+      the frame is created.
+    * ``params`` and ``body`` are the source of the function.
+    """
+    __slots__ = ('run', 'names', 'nparams', 'rest', 'padding', 'params',
+                 'body')
+
+    def __init__(self, run, names, nparams, rest, params, body):
+        self.run = run
+        self.names = names
+        self.nparams = nparams
+        self.rest = rest
+        self.padding = [UNBOUND] * (len(names) - 2 - nparams - rest)
+        self.params = params
+        self.body = body
+
+    def frame(self, parent, env, args):
+        """
+        Create the frame for a call with the list of arguments ``args``,
+        nested in ``parent``, with the environment ``env``.
+        """
+        n = self.nparams
+        if len(args) != n or self.rest:
+            if not self.rest:
+                raise TypeError("expected {} argument(s), got {}".format(
+                    n, len(args)))
+            if len(args) < n:
+                raise TypeError(
+                    "expected at least {} argument(s), got {}".format(
+                        n, len(args)))
+            args = list(args[:n]) + [PackedList.from_iterable(args[n:])]
+        return [parent, env, *args, *self.padding]
+
+
+class CompiledFunction(UserFunction):
+    """
+    A ``UserFunction`` created by compiled code. ``code`` is the
+    ``FunctionCode`` for the function, ``environ`` is the frame the
+    function was created in, and ``env`` is the ``Environment`` its free
+    names are looked up in.
+    """
+    def __init__(self, code: FunctionCode, environ: list, env: Environment):
+        # The parameters were checked when the code was compiled, so skip
+        # UserFunction.__init__, which is too slow to run on each lambda.
+        self.params = code.params
+        self.body = code.body
+        self.environ = environ
+        self.env = env
+        self.code = code
+
+    def __call__(self, *args):
+        return call(self, args)
+
+    def tail_call(self, args):
+        # When lisp_eval calls this function, the compiled body runs to
+        # completion here, and there is no expression left over for
+        # lisp_eval to evaluate.
+        return Quoted(call(self, args)), None
+
+
+def call(func, args):
+    """
+    Call ``func`` with the list of arguments ``args``. Tail calls made by a
+    ``CompiledFunction`` are made in this loop.
+    """
+    while type(func) is CompiledFunction:
+        code = func.code
+        if len(args) == code.nparams and not code.rest:
+            frame = [func.environ, func.env, *args, *code.padding]
+        else:
+            frame = code.frame(func.environ, func.env, args)
+        result = code.run(frame)
+        if type(result) is not TailCall:
+            return result
+        func, args = result.func, result.args
+    return func(*args)
+
+
+def constant(value):
+    return lambda frame: value
+
+
+def compile_args(args):
+    """
+    Combine the compiled arguments of a call into one closure which
+    evaluates each to a list. The common small cases avoid a loop.
+    """
+    if not args:
+        return lambda frame: []
+    if len(args) == 1:
+        a, = args
+        return lambda frame: [a(frame)]
+    if len(args) == 2:
+        a, b = args
+        return lambda frame: [a(frame), b(frame)]
+    if len(args) == 3:
+        a, b, c = args
+        return lambda frame: [a(frame), b(frame), c(frame)]
+    return lambda frame: [arg(frame) for arg in args]
+
+
+class Compiler:
+    """
+    Compiles the body of one function into closures. ``stg`` is the storage
+    for global variables: it is used at compile time to find which names
+    refer to the builtin special forms, and by the compiled code to look up
+    global variables at the top level. ``scope`` is the function's
+    ``Scope``.
+    """
+    def __init__(self, stg: LexicalVarStorage, scope: Scope):
+        self.stg = stg
+        self.scope = scope
+
+    def compile(self, expr, tail=False):
+        """
+        Compile ``expr``. If ``tail`` is true, the expression is in tail
+        position, and the closure may return a ``TailCall``.
+        """
+        if isinstance(expr, Symbol):
+            return self.compile_symbol(expr)
+        if isinstance(expr, SExpression):
+            form = self.special_form(expr)
+            if form is not None:
+                return self.compile_guard(expr, form, tail)
+            return self.compile_call(expr, tail)
+        if isinstance(expr, Quoted):
+            # quotes don't depend on the storage, just compute them now
+            return constant(lisp_eval(expr, self.stg))
+        return constant(expr)
+
+    def global_value(self, name):
+        if self.scope.resolve(name) is not None:
+            return None
+        try:
+            return self.stg[name].value
+        except KeyError:
+            return None
+
+    def special_form(self, expr):
+        """
+        If ``expr`` is a special form, return the method which compiles it,
+        otherwise return ``None``.
+        """
+        if not isinstance(expr.car, Symbol):
+            return None
+        name = special_form_name(self.global_value(expr.car))
+        if name is None:
+            return None
+        return getattr(Compiler, 'compile_' + name)
+
+    def compile_guard(self, expr, form, tail):
+        """
+        Compile the special form ``expr`` with the method ``form``, guarded
+        by a check that its name is still bound to the builtin macro. If it
+        is not, the form is compiled again as an ordinary call.
+        """
+        macro = self.global_value(expr.car)
+        site = GlobalSite(expr.car, self.stg)
+        scope = self.scope.snapshot()
+        stg = self.stg
+        run = form(self, expr.cdr, tail)
+        fallback = []
+
+        def guarded(frame):
+            var = site.var
+            if var is None or frame[1] is not site.env:
+                var = site.lookup(frame[1])
+            if var.value is macro:
+                return run(frame)
+            if not fallback:
+                fallback.append(compile_plain_call(expr, scope, stg))
+            return run_nested(fallback[0], frame, tail)
+        return guarded
+
+    def declare(self, body):
+        """
+        Give each variable ``define``d in ``body`` a slot, so that code
+        in the body can refer to it before the ``define`` runs.
+        """
+        scope, depth = self.scope.defining_scope()
+        if depth or scope.defines_globally():
+            return
+        define = Compiler.compile_define
+        for expr in body:
+            if (isinstance(expr, SExpression)
+                    and self.special_form(expr) is define):
+                name = expr.cdr.car
+                if isinstance(name, SExpression):
+                    name = name.car
+                if name not in self.scope.blocks[-1]:
+                    self.scope.add(name)
+
+    def compile_symbol(self, name):
+        found = self.scope.resolve(name)
+        if found is None:
+            return self.compile_global(name)
+        depth, slot = found
+        if depth == 0:
+            def load(frame):
+                value = frame[slot]
+                if value is UNBOUND:
+                    raise unbound(name)
+                return value
+        elif depth == 1:
+            def load(frame):
+                value = frame[0][slot]
+                if value is UNBOUND:
+                    raise unbound(name)
+                return value
+        else:
+            def load(frame):
+                for _ in range(depth):
+                    frame = frame[0]
+                value = frame[slot]
+                if value is UNBOUND:
+                    raise unbound(name)
+                return value
+        return load
+
+    def compile_global(self, name):
+        site = GlobalSite(name, self.stg)
+        if evaluator.count_hits:
+            stats = evaluator.inline_caches
+
+            def load(frame):
+                var = site.var
+                if var is None or frame[1] is not site.env:
+                    return site.lookup(frame[1]).value
+                stats.hits += 1
+                return var.value
+        else:
+            def load(frame):
+                var = site.var
+                if var is None or frame[1] is not site.env:
+                    var = site.lookup(frame[1])
+                return var.value
+        return load
+
+    def compile_call(self, expr, tail):
+        func = self.compile(expr.car)
+        args = compile_args([self.compile(arg) for arg in expr.cdr])
+        source = expr.cdr
+        scope = self.scope.snapshot()
+        stg = self.stg
+        # the macro and the compiled expansion, if it may be cached
+        cache = [None, None]
+
+        def expand(macro, frame):
+            if not macro.runtime:
+                if cache[0] is macro:
+                    expansions.hits += 1
+                    return cache[1]
+                expansions.misses += 1
+            code = compile_nested(
+                macro(source, frame_storage(frame, scope, stg)), scope, stg)
+            if not macro.runtime:
+                cache[:] = macro, code
+            return code
+
+        def run(frame):
+            f = func(frame)
+            t = type(f)
+            if t is BuiltinFunction:
+                return f(*args(frame))
+            if t is CompiledFunction:
+                if tail:
+                    return TailCall(f, args(frame))
+                return call(f, args(frame))
+            if isinstance(f, Macro):
+                return run_nested(expand(f, frame), frame, tail)
+            if not callable(f):
+                raise TypeError("{!r} object is not callable".format(
+                    t.__name__))
+            return f(*args(frame))
+        return run
+
+    def compile_body(self, body, tail):
+        """
+        Compile a sequence of expressions, returning the result of the last.
+        """
+        if body is NIL:
+            return constant(NIL)
+        forms = [self.compile(cell.car, tail and cell.cdr is NIL)
+                 for cell in body.cells()]
+        if len(forms) == 1:
+            return forms[0]
+        init, last = forms[:-1], forms[-1]
+
+        def run(frame):
+            for form in init:
+                form(frame)
+            return last(frame)
+        return run
+
+    def compile_function(self, params, body):
+        """
+        Compile a function, returning its ``FunctionCode``.
+        """
+        # checks the parameter list, and splits off a variadic parameter
+        signature = UserFunction(params, body, None)
+        scope = Scope(self.scope)
+        for name in signature.names:
+            scope.add(name)
+        if signature.rest is not None:
+            scope.add(signature.rest)
+        compiler = Compiler(self.stg, scope)
+        compiler.declare(body)
+        run = compiler.compile_body(body, True)
+        return FunctionCode(run, scope.names, len(signature.names),
+                            signature.rest is not None, params, body)
+
+    def compile_store(self, name, value, define=False):
+        """
+        Compile storing the result of the closure ``value`` in the variable
+        ``name``. If ``define`` is true, the variable is created.
+        """
+        found = self.scope.resolve(name)
+        stg = self.stg
+        if define:
+            scope, depth = self.scope.defining_scope()
+            if name in scope.blocks[-1]:
+                found = depth, scope.blocks[-1][name]
+            else:
+                found = None
+        if define and scope.defines_globally():
+            def run(frame):
+                v = value(frame)
+                stg.put(name, v)
+                if type(v) is CompiledFunction:
+                    # make the function visible to itself, so it can recurse
+                    v.env = Environment({name: stg.local[name]}, v.env)
+                return NIL
+        elif define and found is None:
+            def run(frame):
+                v = value(frame)
+                var = define_in_frame(frame, depth, name, v, stg)
+                if type(v) is CompiledFunction:
+                    v.env = Environment({name: var}, v.env)
+                return NIL
+        elif found is None:
+            site = GlobalSite(name, stg)
+
+            def run(frame):
+                try:
+                    var = site.find(frame)
+                except KeyError:
+                    raise KeyError(
+                        'Undefined variable {}'.format(name)) from None
+                var.set(value(frame))
+                return NIL
+        else:
+            depth, slot = found
+
+            def run(frame):
+                v = value(frame)
+                for _ in range(depth):
+                    frame = frame[0]
+                frame[slot] = v
+                return NIL
+        return run
+
+    def compile_define(self, se, tail):
+        name = se.car.car if isinstance(se.car, SExpression) else se.car
+        scope, depth = self.scope.defining_scope()
+        if (not depth and not scope.defines_globally()
+                and name not in self.scope.blocks[-1]):
+            # bind the name first, so a function can refer to itself
+            self.scope.add(name)
+        if isinstance(se.car, SExpression):
+            value = self.compile_lambda(SExpression(se.car.cdr, se.cdr), False)
+        else:
+            value = self.compile(se.cdr.car)
+        return self.compile_store(name, value, define=True)
+
+    def compile_lambda(self, se, tail):
+        code = self.compile_function(se.car, se.cdr)
+        stg = self.stg
+
+        def run(frame):
+            env = frame[1]
+            if env is None:
+                env = stg.share()
+            return CompiledFunction(code, frame, env)
+        return run
+
+    def compile_let(self, se, tail):
+        bindings = list(se.car)
+        values = compile_args([self.compile(binding.cdr.car)
+                               for binding in bindings])
+        self.scope.blocks.append({})
+        slots = [self.scope.add(binding.car) for binding in bindings]
+        self.declare(se.cdr)
+        body = self.compile_body(se.cdr, tail)
+        self.scope.blocks.pop()
+
+        def run(frame):
+            for slot, value in zip(slots, values(frame)):
+                frame[slot] = value
+            return body(frame)
+        return run
+
+    def compile_if(self, se, tail):
+        pred = self.compile(se.car)
+        consequent = self.compile(se.cdr.car, tail)
+        alternative = self.compile(se.cdr.cdr.car, tail)
+
+        def run(frame):
+            if pred(frame):
+                return consequent(frame)
+            return alternative(frame)
+        return run
+
+    def compile_cond(self, se, tail):
+        clauses = [
+            (self.compile(clause.car),
+             None if clause.cdr is NIL
+             else self.compile_body(clause.cdr, tail))
+            for clause in se]
+
+        def run(frame):
+            for pred, body in clauses:
+                value = pred(frame)
+                if value:
+                    return value if body is None else body(frame)
+            return NIL
+        return run
+
+    def compile_and(self, se, tail):
+        if se is NIL:
+            return constant(NIL)
+        init = [self.compile(cell.car) for cell in se.cells()
+                if cell.cdr is not NIL]
+        last = self.compile(se[-1], tail)
+
+        def run(frame):
+            for form in init:
+                value = form(frame)
+                if not value:
+                    return value
+            return last(frame)
+        return run
+
+    def compile_or(self, se, tail):
+        if se is NIL:
+            return constant(NIL)
+        init = [self.compile(cell.car) for cell in se.cells()
+                if cell.cdr is not NIL]
+        last = self.compile(se[-1], tail)
+
+        def run(frame):
+            for form in init:
+                value = form(frame)
+                if value:
+                    return value
+            return last(frame)
+        return run
+
+    def compile_setbang(self, se, tail):
+        return self.compile_store(se.car, self.compile(se.cdr.car))
+
+    def compile_eval(self, se, tail):
+        arg = self.compile(se.car)
+        scope = self.scope.snapshot()
+        stg = self.stg
+
+        def run(frame):
+            expr = arg(frame)
+            if isinstance(expr, ConsList):
+                expr = builtins.to_sexpression(expr)
+            return run_nested(compile_nested(expr, scope, stg), frame, tail)
+        return run
+
+
+# The builtin macros which compiling engines handle themselves. Maps each
+# macro to a name for the form: ``Compiler`` compiles the form with its
+# ``compile_<name>`` method.
+special_forms = {
+    builtins.define: 'define',
+    builtins.lambda_func: 'lambda',
+    builtins.let: 'let',
+    builtins.if_expr: 'if',
+    builtins.cond: 'cond',
+    builtins.and_: 'and',
+    builtins.or_: 'or',
+    builtins.setbang: 'setbang',
+    builtins.eval_: 'eval',
+}
+
+
+def special_form_name(value):
+    """
+    Return the name of the special form ``value`` is the macro for, or
+    ``None`` if it is not one.
+    """
+    try:
+        return special_forms.get(value)
+    except TypeError:
+        # unhashable, certainly not a special form
+        return None
+
+
+def compile_nested(expr, scope: Scope,
+                   stg: LexicalVarStorage) -> FunctionCode:
+    """
+    Compile ``expr``, which was made at run time by a macro or ``eval``, as
+    the body of a function with no parameters nested in ``scope``. The code
+    may use the local variables in scope, and a ``define`` in it puts the
+    variable in the block it was run from, so that the code after it can
+    see it.
+    """
+    scope = Scope(scope, nested=True)
+    compiler = Compiler(stg, scope)
+    body = SExpression(expr)
+    compiler.declare(body)
+    run = compiler.compile_body(body, True)
+    return FunctionCode(run, scope.names, 0, False, NIL, body)
+
+
+def compile_plain_call(expr, scope: Scope,
+                       stg: LexicalVarStorage) -> FunctionCode:
+    """
+    Like ``compile_nested``, but compile the call ``expr`` as an ordinary
+    call, even if its name was the builtin macro for a special form when
+    it was compiled.
+    """
+    scope = Scope(scope, nested=True)
+    run = Compiler(stg, scope).compile_call(expr, True)
+    return FunctionCode(run, scope.names, 0, False, NIL, SExpression(expr))
+
+
+def run_nested(code: FunctionCode, frame, tail):
+    """
+    Run the code made by ``compile_nested`` in a new frame nested in
+    ``frame``.
+    """
+    result = code.run([frame, frame[1], *code.padding])
+    if not tail and type(result) is TailCall:
+        return call(result.func, result.args)
+    return result
+
+
+def compile_toplevel(expr, stg: LexicalVarStorage) -> FunctionCode:
+    """
+    Compile ``expr`` to run at the top level of the storage ``stg``,
+    returning a ``FunctionCode`` with no parameters. ``define`` creates
+    global variables in ``stg``.
+
+    >>> from slyther.interpreter import Interpreter
+    >>> from slyther.parser import lisp
+    >>> stg = Interpreter().stg
+    >>> code = compile_toplevel(lisp('(+ 1 2 3)'), stg)
+    >>> call(CompiledFunction(code, None, None), [])
+    6
+    """
+    scope = Scope(toplevel=True)
+    run = Compiler(stg, scope).compile(expr, True)
+    return FunctionCode(run, scope.names, 0, False, NIL, SExpression(expr))
+
+
+def closure_eval(expr, stg: LexicalVarStorage):
+    """
+    Compile and run a single AST element. This is a drop-in replacement
+    for ``lisp_eval``.
+
+    >>> from slyther.types import *
+    >>> from slyther.parser import lisp
+    >>> stg = LexicalVarStorage({'x': Variable(2), 'NIL': Variable(NIL)})
+    >>> closure_eval(lisp("'(x y z (a b c))"), stg)
+    (list x y z (list a b c))
+    >>> closure_eval(Symbol('x'), stg)
+    2
+    """
+    return call(CompiledFunction(compile_toplevel(expr, stg), None, None),
+                [])
@@ -1,5 +1,129 @@
+from weakref import ref
 from slyther.types import (Quoted, NIL, SExpression, ConsList, Symbol,
-                           Macro, NilType, LexicalVarStorage)
+                           Macro, NilType, LexicalVarStorage, UserFunction,
+                           Environment, PackedList)
+
+
+class CacheStats:
+    """
+    Counts how often a cache had (``hits``) or did not have (``misses``)
+    what was looked up.
+
+    >>> stats = CacheStats()
+    >>> stats.hits += 3
+    >>> stats.misses += 1
+    >>> stats
+    CacheStats(hits=3, misses=1)
+    >>> stats.hit_rate()
+    0.75
+    >>> stats.reset()
+    >>> stats.hit_rate()
+    0.0
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self):
+        return 'CacheStats(hits={}, misses={})'.format(self.hits, self.misses)
+
+
+# the macro expansion cache, see ``expand``
+expansions = CacheStats()
+
+# The inline caches for the variables named where they are used, see
+# ``callee``. Counting each hit costs about as much as the lookup the cache
+# saves, so ``hits`` is only counted while ``count_hits`` is true. The
+# compiling engines check it when code is compiled.
+inline_caches = CacheStats()
+count_hits = False
+
+# how many times each name has been put in an ``Environment``
+changes = Environment.changes
+
+
+def callee(expr: SExpression, stg: LexicalVarStorage):
+    """
+    Find the function called by ``expr``, whose ``car`` is a symbol.
+
+    A name which is not local to ``stg`` is looked up in its ``environ``.
+    If that is an ``Environment``, the variable found is cached on
+    ``expr``: it is the same variable the next time ``expr`` is evaluated
+    in the same environment, unless the name has been put in an
+    environment since. Only a weak reference to the environment is kept.
+
+    >>> from slyther.types import *
+    >>> from slyther.parser import lisp
+    >>> stg = LexicalVarStorage(LexicalVarStorage({}).share())
+    >>> stg.environ['f'] = Variable(1)
+    >>> expr = lisp('(f)')
+    >>> callee(expr, stg)
+    1
+    >>> stg.environ['f'].set(2)
+    >>> callee(expr, stg)
+    2
+    >>> stg.put('f', 3)
+    >>> callee(expr, stg)
+    3
+    """
+    name = expr.car
+    var = stg.local.get(name)
+    if var is not None:
+        return var.value
+    environ = stg.environ
+    cached = expr.callee
+    if (cached is not None and cached[0]() is environ
+            and cached[1] == changes[name]):
+        if count_hits:
+            inline_caches.hits += 1
+        return cached[2].value
+    var = environ.get(name)
+    if var is None:
+        raise KeyError("Undefined variable '{}'".format(name))
+    if type(environ) is Environment:
+        inline_caches.misses += 1
+        expr.callee = (ref(environ), changes[name], var)
+    return var.value
+
+
+def expand(macro: Macro, expr: SExpression, stg: LexicalVarStorage):
+    """
+    Expand the call ``expr`` to ``macro``. Unless the macro depends on the
+    state at runtime, the expansion is cached on ``expr``, and reused each
+    time ``expr`` is evaluated.
+
+    >>> from slyther.types import *
+    >>> from slyther.parser import lisp
+    >>> calls = []
+    >>> @BuiltinMacro('swap', runtime=False)
+    ... def swap(se, stg):
+    ...     calls.append(se)
+    ...     return SExpression(se.cdr.car, SExpression(se.car))
+    >>> expr = lisp('(swap 1 -)')
+    >>> expand(swap, expr, None)
+    (- 1)
+    >>> expand(swap, expr, None) is expand(swap, expr, None)
+    True
+    >>> len(calls)
+    1
+    """
+    if macro.runtime:
+        return macro(expr.cdr, stg)
+    cached = expr.expansion
+    if cached is not None and cached[0] is macro:
+        expansions.hits += 1
+        return cached[1]
+    expansions.misses += 1
+    result = macro(expr.cdr, stg)
+    expr.expansion = (macro, result)
+    return result
 
 
 def lisp_eval(expr, stg: LexicalVarStorage):
@@ -130,5 +254,47 @@ def lisp_eval(expr, stg: LexicalVarStorage):
     2 2
     3
 
+    Tail positions are evaluated in this same loop rather than by a
+    recursive call: the expression a macro returns, and the last
+    expression in the body of a ``UserFunction``. This means a
+    tail-recursive loop runs in constant Python stack space:
+
+    >>> some_stg.put('if', BuiltinMacro(
+    ...     lambda se, stg: se.cdr.car if lisp_eval(se.car, stg)
+    ...                     else se.cdr.cdr.car))
+    >>> some_stg.put('<', BuiltinFunction(operator.lt))
+    >>> count = UserFunction(
+    ...     params=lisp('(n)'),
+    ...     body=lisp('((if (< n 100000) (count (add n 1)) n))'),
+    ...     environ=some_stg.fork())
+    >>> some_stg.put('count', count)
+    >>> count.environ['count'] = some_stg['count']
+    >>> test("(count 0)")
+    100000
     """
-    raise NotImplementedError("Deliverable 3")
+    while True:
+        if isinstance(expr, Symbol):
+            return stg[expr].value
+        if isinstance(expr, Quoted):
+            if isinstance(expr.elem, SExpression):
+                return PackedList.from_iterable(
+                    lisp_eval(Quoted(elem), stg) for elem in expr.elem)
+            return expr.elem
+        if not isinstance(expr, SExpression):
+            return expr
+
+        if isinstance(expr.car, Symbol):
+            func = callee(expr, stg)
+        else:
+            func = lisp_eval(expr.car, stg)
+        if isinstance(func, Macro):
+            expr = expand(func, expr, stg)
+            continue
+        if not callable(func):
+            raise TypeError("{!r} object is not callable".format(
+                type(func).__name__))
+        args = [lisp_eval(arg, stg) for arg in expr.cdr]
+        if isinstance(func, UserFunction):
+            expr, stg = func.tail_call(args)
+            continue
+        return func(*args)
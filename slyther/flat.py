@@ -0,0 +1,303 @@
+"""
+A flat encoding of parsed programs: rather than a graph of ``SExpression``
+cells, ``Quoted`` wrappers and atoms, a program is an array of integers
+and a pool of constants.
+
+>>> from slyther.parser import lex, parse
+>>> program = FlatProgram.encode(
+...     parse(lex("(define (f x) (* x 2)) (f '(1))")))
+>>> print(dis(program))
+    0 LIST            18
+    2 SYMBOL           0 (define)
+    4 LIST            10
+    6 SYMBOL           1 (f)
+    8 SYMBOL           2 (x)
+   10 LIST            18
+   12 SYMBOL           3 (*)
+   14 SYMBOL           2 (x)
+   16 INT              4 (2)
+   18 LIST            28
+   20 SYMBOL           1 (f)
+   22 QUOTE           28
+   24 LIST            28
+   26 INT              5 (1)
+>>> list(program)
+[(define (f x) (* x 2)), (f '(1))]
+
+Each node of the tree is an ``opcode, argument`` pair, written before its
+children (if any), so a node is found by its index in ``ops``. The
+argument of a ``LIST``, ``DOTTED`` or ``QUOTE`` is the index just past the
+last node inside it, so an evaluator can skip over a subtree without
+looking at it; the argument of an atom is the index of its value in
+``consts``. An equal constant is only put in the pool once.
+
+The ops are an ``array`` and the pool holds only ints, floats and strs,
+so ``tobytes`` can store a program, or hand it to another process, without
+pickling any objects, and ``frombytes`` reads it back:
+
+>>> FlatProgram.frombytes(program.tobytes()) == program
+True
+
+Programs folded by ``slyther.optimizer`` may also quote booleans and
+improper lists, which are encoded as well. Anything else, like a function,
+cannot be, and raises ``TypeError``.
+"""
+import sys
+import json
+import struct
+from array import array
+from slyther.types import (ConsCell, SExpression, Quoted, Symbol, String,
+                           Boolean, NIL)
+
+__all__ = ['FlatProgram', 'dis', 'opnames']
+
+# The opcodes. Atoms come first, then the nodes which contain others.
+INT = 0                     # the int consts[arg]
+FLOAT = 1                   # the float consts[arg]
+STRING = 2                  # a String of consts[arg]
+SYMBOL = 3                  # a Symbol of consts[arg]
+NIL_ = 4                    # NIL, the argument is 0
+BOOLEAN = 5                 # #t if arg is 1, #f if it is 0
+QUOTE = 6                   # the node which follows, Quoted
+LIST = 7                    # an SExpression of the nodes up to arg
+DOTTED = 8                  # the same, but the last node is the final cdr
+
+opnames = {value: name.rstrip('_') for name, value in globals().items()
+           if name.isupper() and isinstance(value, int)}
+
+atom_types = {int: INT, float: FLOAT, String: STRING, Symbol: SYMBOL}
+atom_makers = {INT: int, FLOAT: float, STRING: String, SYMBOL: Symbol}
+
+# header of the ``tobytes`` format: magic, version, number of ops
+header = struct.Struct('<4sHQ')
+magic = b'SLYF'
+version = 1
+
+
+class FlatProgram:
+    """
+    A program (a sequence of top-level expressions) encoded as ``ops``, an
+    ``array`` of ``opcode, argument`` pairs, and ``consts``, a list of the
+    values of its atoms. Iterating over it decodes each expression.
+    """
+    __slots__ = ('ops', 'consts')
+
+    def __init__(self, ops=None, consts=None):
+        self.ops = array('q') if ops is None else ops
+        self.consts = [] if consts is None else consts
+
+    @classmethod
+    def encode(cls, exprs):
+        """
+        Encode each of the expressions in ``exprs``. This does not recurse
+        in Python, so deeply nested code can be encoded.
+        """
+        program = cls()
+        ops = program.ops
+        pool = {}
+
+        def const(value):
+            key = (type(value), value.hex() if type(value) is float
+                   else value)
+            index = pool.get(key)
+            if index is None:
+                index = pool[key] = len(program.consts)
+                # only keep plain strs in the pool
+                program.consts.append(
+                    str(value) if isinstance(value, str) else value)
+            return index
+
+        for expr in exprs:
+            # each item is an expression to encode, or a 1-tuple of the
+            # index of a container node whose end is now known
+            stack = [expr]
+            while stack:
+                expr = stack.pop()
+                if type(expr) is tuple:
+                    ops[expr[0] + 1] = len(ops)
+                elif type(expr) in atom_types:
+                    ops.extend((atom_types[type(expr)], const(expr)))
+                elif expr is NIL:
+                    ops.extend((NIL_, 0))
+                elif isinstance(expr, (Boolean.LispTrue, Boolean.LispFalse)):
+                    ops.extend((BOOLEAN, int(bool(expr))))
+                elif isinstance(expr, Quoted):
+                    stack.append((len(ops),))
+                    ops.extend((QUOTE, 0))
+                    stack.append(expr.elem)
+                elif isinstance(expr, ConsCell):
+                    elems = []
+                    while isinstance(expr, ConsCell) and expr is not NIL:
+                        elems.append(expr.car)
+                        expr = expr.cdr
+                    stack.append((len(ops),))
+                    if expr is NIL:
+                        ops.extend((LIST, 0))
+                    else:
+                        ops.extend((DOTTED, 0))
+                        elems.append(expr)
+                    stack.extend(reversed(elems))
+                else:
+                    raise TypeError('cannot encode {!r}'.format(expr))
+        return program
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __eq__(self, other):
+        return (isinstance(other, FlatProgram) and self.ops == other.ops
+                and self.consts == other.consts
+                and list(map(type, self.consts))
+                == list(map(type, other.consts)))
+
+    def end(self, i):
+        """
+        Return the index just past the node at ``i`` and everything in it.
+        """
+        if self.ops[i] >= QUOTE:
+            return self.ops[i + 1]
+        return i + 2
+
+    def children(self, i):
+        """
+        Generate the indices of the nodes directly inside the node at
+        ``i``.
+        """
+        end = self.end(i)
+        i += 2
+        while i < end:
+            yield i
+            i = self.end(i)
+
+    def roots(self):
+        """
+        Generate the indices of the top-level expressions.
+        """
+        i = 0
+        while i < len(self.ops):
+            yield i
+            i = self.end(i)
+
+    def atom(self, i):
+        """
+        Return the value of the atom at ``i``.
+        """
+        op, arg = self.ops[i], self.ops[i + 1]
+        if op in atom_makers:
+            return atom_makers[op](self.consts[arg])
+        if op == NIL_:
+            return NIL
+        if op == BOOLEAN:
+            return Boolean(arg)
+        raise ValueError('{} at {} is not an atom'.format(opnames[op], i))
+
+    def decode(self, i=0, interner=None, atoms=None):
+        """
+        Decode the expression at ``i`` into ``SExpression`` cells and
+        atoms, as ``parse`` would have made it, sharing them with
+        ``interner`` if given. Equal atoms are decoded to the same object,
+        which is kept in ``atoms`` (a dict by pool index, which may be
+        shared between calls).
+        """
+        ops, consts = self.ops, self.consts
+        if atoms is None:
+            atoms = {}
+        stop = self.end(i)
+        result = elems = []
+        # the containers still open: their opcode, end, and the elements
+        # of the container they are in
+        stack = []
+        while i < stop:
+            op, arg = ops[i], ops[i + 1]
+            i += 2
+            if op >= QUOTE:
+                stack.append((op, arg, elems))
+                elems = []
+                if arg > i:
+                    continue
+            elif op < NIL_:
+                value = atoms.get(arg)
+                if value is None:
+                    value = atom_makers[op](consts[arg])
+                    if interner is not None:
+                        value = interner.atom(value)
+                    atoms[arg] = value
+                elems.append(value)
+            else:
+                elems.append(NIL if op == NIL_ else Boolean(arg))
+            while stack and stack[-1][1] == i:
+                op, _, parent = stack.pop()
+                if op == QUOTE:
+                    value = (Quoted(elems[0]) if interner is None
+                             else interner.quote(elems[0]))
+                elif op == LIST:
+                    value = (SExpression.from_iterable(elems)
+                             if interner is None
+                             else interner.sexpression(elems))
+                else:
+                    value = elems.pop()
+                    for elem in reversed(elems):
+                        value = ConsCell(elem, value)
+                parent.append(value)
+                elems = parent
+        return result[0]
+
+    def decode_all(self, interner=None):
+        """
+        Generate each of the top-level expressions, decoded, sharing them
+        with ``interner`` if given.
+        """
+        atoms = {}
+        for i in self.roots():
+            yield self.decode(i, interner, atoms)
+
+    def __iter__(self):
+        return self.decode_all()
+
+    def tobytes(self) -> bytes:
+        """
+        Serialize the program: a header, the ops as little-endian 64-bit
+        integers, then the constant pool as JSON, which keeps ints, floats
+        and strs apart.
+        """
+        ops = array('q', self.ops)
+        if sys.byteorder == 'big':
+            ops.byteswap()
+        return (header.pack(magic, version, len(ops)) + ops.tobytes()
+                + json.dumps(self.consts).encode('utf-8'))
+
+    @classmethod
+    def frombytes(cls, data: bytes):
+        """
+        Read a program written by ``tobytes``. Raises ``ValueError`` if
+        ``data`` is not one.
+        """
+        try:
+            tag, ver, count = header.unpack_from(data)
+        except struct.error:
+            raise ValueError('not a flat program') from None
+        if tag != magic or ver != version:
+            raise ValueError('not a flat program (version {})'.format(
+                version))
+        start = header.size
+        stop = start + 8 * count
+        ops = array('q')
+        ops.frombytes(data[start:stop])
+        if sys.byteorder == 'big':
+            ops.byteswap()
+        consts = json.loads(data[stop:].decode('utf-8'))
+        return cls(ops, consts)
+
+
+def dis(program: FlatProgram) -> str:
+    """
+    List the nodes of ``program``, for debugging.
+    """
+    lines = []
+    for i in range(0, len(program.ops), 2):
+        op, arg = program.ops[i], program.ops[i + 1]
+        line = '{:>5} {:<16}{:>2}'.format(i, opnames[op], arg)
+        if op in atom_makers:
+            line += ' ({!r})'.format(program.atom(i))
+        lines.append(line)
+    return '\n'.join(lines)
@@ -3,7 +3,21 @@ import slyther.builtins
 from slyther.types import (BuiltinCallable, NIL, LexicalVarStorage, Variable,
                            Boolean)
 from slyther.evaluator import lisp_eval
-from slyther.parser import lex, parse
+from slyther.compiler import closure_eval
+from slyther.vm import vm_eval
+from slyther.stackless import stackless_eval
+from slyther.parser import lex, parse, mapped, Interner
+from slyther.optimizer import fold_program
+from slyther import cache
+
+# The available evaluation engines. Each takes an AST element and a
+# ``LexicalVarStorage``, just like ``lisp_eval``.
+engines = {
+    'tree': lisp_eval,
+    'closure': closure_eval,
+    'vm': vm_eval,
+    'stackless': stackless_eval,
+}
 
 
 class Interpreter:
@@ -13,8 +27,40 @@ class Interpreter:
     ``LexicalVarStorage`` for you.
 
     An interpreter gets constructed for you in ``slyther.__main__``.
+
+    ``engine`` selects how expressions are evaluated: ``'tree'`` walks the
+    abstract syntax tree using ``lisp_eval``, ``'closure'`` compiles each
+    expression to closures first (see ``slyther.compiler``), ``'vm'``
+    compiles each expression to bytecode for a virtual machine (see
+    ``slyther.vm``), and ``'stackless'`` walks the tree like ``'tree'``, but
+    keeps its own stack, so that recursion is not limited by Python's (see
+    ``slyther.stackless``).
+
+    With ``fold=True``, each program given to ``exec`` is first passed
+    through ``slyther.optimizer.fold_program``, which computes the calls to
+    pure builtins on constants ahead of time.
+
+    With ``hashcons=True``, the programs given to ``exec`` are parsed with
+    a ``slyther.parser.Interner`` kept for the life of the interpreter, so
+    that identical code shares the same objects.
+
+    >>> Interpreter(engine='closure').exec('(+ 1 2)')
+    3
+    >>> Interpreter(engine='vm').exec('(+ 1 2)')
+    3
+    >>> Interpreter(engine='bogus')
+    Traceback (most recent call last):
+        ...
+    ValueError: unknown engine 'bogus'
     """
-    def __init__(self):
+    def __init__(self, engine='tree', fold=False, hashcons=False):
+        if engine not in engines:
+            raise ValueError("unknown engine {!r}".format(engine))
+        self.engine = engine
+        self.fold = fold
+        self.interner = Interner() if hashcons else None
+        self.evaluate = engines[engine]
+
         # load builtins out of slyther.bulitins
         builtins = {
             x.__name__: Variable(x)
@@ -36,7 +82,7 @@ class Interpreter:
         Eval a single (parsed) lisp expression.
         """
         try:
-            return lisp_eval(expr, self.stg)
+            return self.evaluate(expr, self.stg)
         except RecursionError as e:
             raise RecursionError(
                 "Maximum recursion depth exceeded while evaluating {!r}"
@@ -46,8 +92,45 @@ class Interpreter:
         """
         Execute the string ``code`` on the interpreter,
         returning the result of the last evaluation.
+
+        ``code`` may also be a text file object, or an iterable of
+        strings, which is lexed a chunk at a time, or UTF-8 encoded bytes,
+        like an ``mmap`` (see ``lex``). Each expression is evaluated as
+        soon as it is parsed, unless ``fold`` is set, which needs the whole
+        program first.
+        """
+        return self.run(parse(lex(code), self.interner))
+
+    def run(self, exprs):
+        """
+        Evaluate each of the parsed expressions ``exprs`` on the
+        interpreter, returning the result of the last evaluation.
         """
+        if self.fold:
+            exprs = fold_program(list(exprs), self.stg)
         r = NIL
-        for expr in parse(lex(code)):
+        for expr in exprs:
             r = self.eval(expr)
         return r
+
+    def exec_file(self, f):
+        """
+        Execute the code in the open file ``f``, or the file named ``f``,
+        returning the result of the last evaluation. The file is mapped
+        into memory and lexed as UTF-8 (see ``slyther.parser.mapped``), so
+        that its text is not copied onto the heap.
+        """
+        if isinstance(f, str):
+            with open(f, encoding='utf-8') as f:
+                return self.exec_file(f)
+        with mapped(f) as code:
+            return self.exec(code)
+
+    def exec_cached(self, path, cache_dir=None):
+        """
+        Execute the code in the file named ``path``, returning the result
+        of the last evaluation. The parsed code is cached on disk, and
+        read from there the next time, if the file has not changed (see
+        ``slyther.cache``).
+        """
+        return self.run(cache.load(path, cache_dir, self.interner))
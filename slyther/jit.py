@@ -0,0 +1,656 @@
+r"""
+A tier above ``lisp_eval``: once a ``UserFunction`` has been called more
+than ``threshold`` times by the tree walking engine, its body is translated
+to the source of a Python function, which is compiled with ``compile`` and
+run in place of the body from then on.
+
+>>> from slyther.interpreter import Interpreter
+>>> interp = Interpreter()
+>>> interp.exec('''
+... (define (count n acc)
+...   (if (= n 0) acc (count (- n 1) (+ acc 2))))
+... (count 100 0)''')
+200
+>>> print(interp.stg['count'].value.jitted.source)
+def factory(SELF, v0, v1, v2, v3, v4):
+    def jitted(l0, l1):
+        while True:
+            if not (v0.value is k0 and v1.value is k1 and v3.value is k2 and \
+v4.value is k3):
+                return deopt(SELF, [l0, l1])
+            if ((l0 == 0) if v1.value is k1 else v1.value(l0, 0)):
+                return l1
+            if v2.value is SELF:
+                l0, l1 = ((l0 - 1) if v3.value is k2 else v3.value(l0, 1)), \
+((l1 + 2) if v4.value is k3 else v4.value(l1, 2))
+                continue
+            return tail(v2.value, [((l0 - 1) if v3.value is k2 else \
+v3.value(l0, 1)), ((l1 + 2) if v4.value is k3 else v4.value(l1, 2))])
+    return jitted
+>>> interp.exec('(count 100000 0)')
+200000
+
+Parameters, and the names bound by a ``let``, become Python locals. Any
+other name is resolved to its variable in the function's ``environ`` when
+the function is compiled, and the value of the variable is read when it is
+used, so ``set!`` is seen as usual. ``if``, ``cond``, ``and``, ``or``,
+``let`` and ``set!`` are translated to the Python statements and
+expressions doing the same. Calls to the arithmetic and comparison
+builtins are done with the Python operators, and a call to the function
+itself in tail position jumps back to the start of a ``while`` loop.
+
+All of this assumes the names of the special forms and the builtins are
+still bound to them, so each use is guarded. Before each run of the loop,
+every one of them is checked, and if any has been rebound, the compiled
+code is dropped, and the call is finished by ``lisp_eval``. The function
+may be compiled again once it has been called ``threshold`` more times.
+
+>>> interp.exec('(set! + -)')
+NIL
+>>> interp.exec('(count 5 0)')
+-10
+>>> interp.stg['count'].value.jitted is None
+True
+
+A builtin rebound while the loop runs is caught by the guard on the call
+itself, which calls whatever the name is bound to then.
+
+A function which uses ``define``, ``lambda``, ``eval``, or a macro other
+than the special forms above, or which calls something other than a
+variable which is not local, is not compiled, and is left to ``lisp_eval``.
+It is translated once per body: a new closure created by the same
+``lambda`` is compiled on its first call, reusing the translation made for
+the last one, if its names are bound to the same kinds of values.
+
+Other calls in tail position return a ``TailCall``, which ``tail_call``
+runs in a loop when it is to a compiled function, or hands back to
+``lisp_eval`` when it is not. Either way, a tail call does not grow the
+Python stack.
+"""
+from math import isfinite
+from slyther.types import (Quoted, NIL, SExpression, PackedList, Symbol,
+                           String, Boolean, Macro, UserFunction)
+from slyther.evaluator import lisp_eval
+from slyther.compiler import special_form_name
+from slyther import builtins
+
+__all__ = ['threshold', 'TailCall', 'Translation', 'Translator',
+           'Unsupported', 'compile_function', 'deoptimize', 'tail_call',
+           'call']
+
+# the number of calls after which a function is compiled, or None to never
+# compile functions
+threshold = 20
+
+# the Python operators the builtins are inlined as
+operators = {
+    builtins.add: '+',
+    builtins.sub: '-',
+    builtins.mul: '*',
+    builtins.div: '/',
+    builtins.remainder: '%',
+    builtins.lt: '<',
+    builtins.gt: '>',
+    builtins.eq: '==',
+    builtins.le: '<=',
+    builtins.ge: '>=',
+    builtins.not_: 'not',
+}
+
+comparisons = {'<', '>', '==', '<=', '>='}
+
+# What a name must be bound to for the compiled code to be used: anything
+# at all, anything but a macro (for a name which is called), or the
+# function itself. Otherwise, it is the exact builtin it must be bound to.
+ANY = 'any'
+FUNCTION = 'function'
+SELF = 'self'
+
+
+class Unsupported(Exception):
+    """
+    Raised when a function uses something which cannot be translated.
+    """
+
+
+class TailCall:
+    """
+    A call in tail position, returned by compiled code, to be made by
+    whoever called it.
+    """
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+
+def deoptimize(func: UserFunction):
+    """
+    Drop the compiled code of ``func``, and count its calls from zero.
+    """
+    func.jitted = None
+    func.calls = 0
+
+
+def deopt(func, args):
+    # a guard failed: finish the call with lisp_eval
+    deoptimize(func)
+    return TailCall(func, args)
+
+
+def run(func, args):
+    """
+    Call the compiled function ``func``, and any compiled function it tail
+    calls. Returns the result, or the ``TailCall`` to a function which is
+    not compiled.
+    """
+    while True:
+        func.check_args(args)
+        result = func.jitted(*args)
+        if type(result) is not TailCall:
+            return result
+        func = result.func
+        if type(func) is not UserFunction or func.jitted is None:
+            return result
+        args = result.args
+
+
+def tail_call(func, args):
+    """
+    Like ``UserFunction.tail_call``, for a compiled function.
+    """
+    result = run(func, args)
+    if type(result) is TailCall:
+        return result.func.tail_call(result.args)
+    return Quoted(result), None
+
+
+def call(func, args):
+    """
+    Call ``func`` with ``args``, from compiled code.
+    """
+    if type(func) is UserFunction and func.jitted is not None:
+        result = run(func, args)
+        if type(result) is TailCall:
+            return result.func(*result.args)
+        return result
+    if isinstance(func, Macro):
+        raise TypeError(
+            'cannot call macro {!r} from compiled code'.format(func))
+    if not callable(func):
+        raise TypeError("{!r} object is not callable".format(
+            type(func).__name__))
+    return func(*args)
+
+
+def tail(func, args):
+    if isinstance(func, UserFunction):
+        return TailCall(func, args)
+    return call(func, args)
+
+
+def lisp(result):
+    # the translation BuiltinFunction would do, for + * and remainder
+    if type(result) is str:
+        return String(result)
+    return result
+
+
+class Translation:
+    """
+    The compiled translation of the body of a function. ``factory`` takes
+    the function, and the variables each name in ``bindings`` is bound to,
+    and returns the Python function to run in place of the body.
+    """
+    __slots__ = ('params', 'bindings', 'factory', 'source')
+
+    def __init__(self, params, bindings, factory, source):
+        self.params = params
+        self.bindings = bindings
+        self.factory = factory
+        self.source = source
+
+    def instantiate(self, func: UserFunction):
+        """
+        Return the compiled code for ``func``, or ``None`` if the names in
+        its environment are not bound like the ones this was translated
+        with.
+        """
+        if func.params is not self.params:
+            return None
+        variables = []
+        for name, expected in self.bindings:
+            var = func.environ.get(name)
+            if var is None:
+                return None
+            value = var.value
+            if expected is SELF:
+                if value is not func:
+                    return None
+            elif expected is FUNCTION:
+                if isinstance(value, Macro):
+                    return None
+            elif expected is not ANY and value is not expected:
+                return None
+            variables.append(var)
+        jitted = self.factory(func, *variables)
+        jitted.source = self.source
+        return jitted
+
+
+class Translator:
+    """
+    Translates the body of a ``UserFunction`` to Python source. Raises
+    ``Unsupported`` for a function which cannot be compiled.
+    """
+    def __init__(self, func: UserFunction):
+        self.func = func
+        self.namespace = {
+            'NIL': NIL,
+            'T': Boolean(True),
+            'F': Boolean(False),
+            'PackedList': PackedList,
+            'call': call,
+            'tail': tail,
+            'deopt': deopt,
+            'lisp': lisp,
+        }
+        self.consts = {}
+        self.variables = {}
+        self.expected = {}
+        self.guards = []
+        self.nlocals = 0
+        self.lines = []
+        self.indent = 3
+        self.looped = False
+        self.params = [self.new_local() for _ in func.names]
+        self.rest = None
+        scope = dict(zip(func.names, self.params))
+        if func.rest is not None:
+            self.rest = scope[func.rest] = self.new_local()
+            self.indent = 2
+        self.scopes = [scope]
+
+    def new_local(self):
+        name = 'l{}'.format(self.nlocals)
+        self.nlocals += 1
+        return name
+
+    def emit(self, line):
+        self.lines.append((self.indent, line))
+
+    def const(self, value):
+        """
+        Return the Python expression for the constant ``value``.
+        """
+        if value is NIL:
+            return 'NIL'
+        if type(value) is int or (type(value) is float and isfinite(value)):
+            return '({!r})'.format(value) if value < 0 else repr(value)
+        key = id(value)
+        if key not in self.consts:
+            self.consts[key] = 'k{}'.format(len(self.consts))
+            self.namespace[self.consts[key]] = value
+        return self.consts[key]
+
+    def lookup(self, name):
+        """
+        Return the Python local ``name`` is bound to, if any.
+        """
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def free(self, name, expected=ANY):
+        """
+        Return the Python name of the variable a free ``name`` is bound to,
+        and the value it is bound to now.
+        """
+        var = self.func.environ.get(name)
+        if var is None:
+            raise Unsupported('undefined variable {}'.format(name))
+        if name not in self.variables:
+            self.variables[name] = 'v{}'.format(len(self.variables))
+            self.expected[name] = ANY
+        if expected is not ANY and self.expected[name] in (ANY, FUNCTION):
+            self.expected[name] = expected
+        return self.variables[name], var.value
+
+    def guard(self, name, value):
+        """
+        Guard that ``name`` is still bound to the builtin ``value``,
+        returning the Python name of its variable and of ``value``.
+        """
+        var, _ = self.free(name, value)
+        check = '{}.value is {}'.format(var, self.const(value))
+        if check not in self.guards:
+            self.guards.append(check)
+        return var, self.const(value)
+
+    def form(self, expr: SExpression):
+        """
+        Return what kind of call ``expr`` is: the name of a special form,
+        an operator, ``'self'`` for a call to the function being compiled,
+        or ``'call'``.
+        """
+        head = expr.car
+        if not isinstance(head, Symbol) or self.lookup(head) is not None:
+            raise Unsupported('call to {!r}'.format(head))
+        _, value = self.free(head, FUNCTION)
+        name = special_form_name(value)
+        if name is not None:
+            if name not in ('if', 'cond', 'and', 'or', 'let', 'setbang'):
+                raise Unsupported(name)
+            self.guard(head, value)
+            return name
+        if isinstance(value, Macro):
+            raise Unsupported('macro {}'.format(head))
+        if value is self.func:
+            self.free(head, SELF)
+            return 'self'
+        try:
+            operator = operators.get(value)
+        except TypeError:
+            # unhashable, certainly not a builtin
+            operator = None
+        return operator or 'call'
+
+    def expr(self, expr, test=False):
+        """
+        Return a Python expression computing ``expr``. If ``test`` is true,
+        only its truthiness matters.
+        """
+        if isinstance(expr, Symbol):
+            local = self.lookup(expr)
+            if local is not None:
+                return local
+            return self.free(expr)[0] + '.value'
+        if isinstance(expr, Quoted):
+            return self.const(lisp_eval(expr, None))
+        if not isinstance(expr, SExpression):
+            return self.const(expr)
+
+        form = self.form(expr)
+        se = expr.cdr
+        if form == 'if':
+            return '({} if {} else {})'.format(
+                self.expr(se.cdr.car), self.expr(se.car, test=True),
+                self.expr(se.cdr.cdr.car))
+        if form == 'cond':
+            code = 'NIL'
+            for clause in reversed(list(se)):
+                if clause.cdr is NIL:
+                    code = '({} or {})'.format(self.expr(clause.car), code)
+                else:
+                    code = '({} if {} else {})'.format(
+                        self.sequence(clause.cdr),
+                        self.expr(clause.car, test=True), code)
+            return code
+        if form in ('and', 'or'):
+            if se is NIL:
+                return 'NIL'
+            return '({})'.format(' {} '.format(form).join(
+                self.expr(arg, test) for arg in se))
+        if form == 'let':
+            values = [self.expr(binding.cdr.car) for binding in se.car]
+            self.scopes.append(
+                {binding.car: self.new_local() for binding in se.car})
+            body = self.sequence(se.cdr)
+            names = self.scopes.pop().values()
+            return '(lambda {}: {})({})'.format(
+                ', '.join(names), body, ', '.join(values))
+        if form == 'setbang':
+            if self.lookup(se.car) is not None:
+                raise Unsupported('set! of a local in an expression')
+            var, _ = self.free(se.car)
+            return '({}.set({}) or NIL)'.format(var, self.expr(se.cdr.car))
+        if form in ('self', 'call'):
+            return 'call({}, [{}])'.format(
+                self.expr(expr.car), self.args(se))
+        return self.operator(expr, form, test)
+
+    def args(self, se):
+        return ', '.join(self.expr(arg) for arg in se)
+
+    def sequence(self, body):
+        """
+        Return a Python expression computing each of ``body``, and giving
+        the last.
+        """
+        codes = [self.expr(expr) for expr in body]
+        if not codes:
+            return 'NIL'
+        if len(codes) == 1:
+            return codes[0]
+        return '({})[-1]'.format(', '.join(codes))
+
+    def operator(self, expr, op, test):
+        """
+        Return a Python expression for the call ``expr`` to the builtin for
+        the Python operator ``op``, guarded by a check that its name is
+        still bound to it.
+        """
+        var, value = self.guard(expr.car, self.free(expr.car)[1])
+        args = list(expr.cdr)
+        codes = [self.expr(arg) for arg in args]
+        slow = '{}.value({})'.format(var, ', '.join(codes))
+        numeric = [type(arg) in (int, float) for arg in args]
+        if op == 'not' and len(args) == 1:
+            fast = ('(not {})' if test else '(F if {} else T)').format(
+                self.expr(args[0], test=True))
+        elif op == '-' and len(args) == 1:
+            fast = '(-{})'.format(codes[0])
+        elif len(args) != 2 or op == 'not':
+            return 'call({}.value, [{}])'.format(var, ', '.join(codes))
+        elif op in comparisons:
+            fast = ('({} {} {})' if test else '(T if {} {} {} else F)').format(
+                codes[0], op, codes[1])
+        else:
+            fast = '{} {} {}'.format(codes[0], op, codes[1])
+            # a string, which must be a String to Lisp, can only come out
+            # of an operator with a string operand
+            if ((op == '+' and not any(numeric))
+                    or (op == '*' and not all(numeric))
+                    or (op == '%' and not numeric[0])):
+                fast = 'lisp({})'.format(fast)
+            else:
+                fast = '({})'.format(fast)
+        return '({} if {}.value is {} else {})'.format(fast, var, value, slow)
+
+    def bind(self, bindings):
+        """
+        Emit the assignments for the bindings of a ``let``, and return the
+        scope they are in.
+        """
+        values = [self.expr(binding.cdr.car) for binding in bindings]
+        scope = {binding.car: self.new_local() for binding in bindings}
+        if values:
+            self.emit('{} = {}'.format(
+                ', '.join(scope.values()), ', '.join(values)))
+        return scope
+
+    def effect(self, expr):
+        """
+        Emit statements computing ``expr``, when the result is not used.
+        """
+        if not isinstance(expr, SExpression):
+            self.emit(self.expr(expr))
+            return
+        form = self.form(expr)
+        se = expr.cdr
+        if form == 'if':
+            self.emit('if {}:'.format(self.expr(se.car, test=True)))
+            self.indent += 1
+            self.effect(se.cdr.car)
+            self.indent -= 1
+            self.emit('else:')
+            self.indent += 1
+            self.effect(se.cdr.cdr.car)
+            self.indent -= 1
+        elif form == 'let':
+            self.scopes.append(self.bind(se.car))
+            for expr in se.cdr:
+                self.effect(expr)
+            self.scopes.pop()
+        elif form == 'setbang':
+            value = self.expr(se.cdr.car)
+            local = self.lookup(se.car)
+            if local is not None:
+                self.emit('{} = {}'.format(local, value))
+            else:
+                self.emit('{}.set({})'.format(self.free(se.car)[0], value))
+        else:
+            self.emit(self.expr(expr))
+
+    def tail(self, expr):
+        """
+        Emit statements returning ``expr``, or continuing the loop for a
+        call to the function itself.
+        """
+        if not isinstance(expr, SExpression):
+            self.emit('return {}'.format(self.expr(expr)))
+            return
+        form = self.form(expr)
+        se = expr.cdr
+        if form == 'if':
+            self.emit('if {}:'.format(self.expr(se.car, test=True)))
+            self.indent += 1
+            self.tail(se.cdr.car)
+            self.indent -= 1
+            self.tail(se.cdr.cdr.car)
+        elif form == 'cond':
+            for clause in se:
+                if clause.cdr is NIL:
+                    temp = self.new_local()
+                    self.emit('{} = {}'.format(temp, self.expr(clause.car)))
+                    self.emit('if {}:'.format(temp))
+                    self.emit('    return {}'.format(temp))
+                else:
+                    self.emit('if {}:'.format(
+                        self.expr(clause.car, test=True)))
+                    self.indent += 1
+                    self.tail_sequence(clause.cdr)
+                    self.indent -= 1
+            self.emit('return NIL')
+        elif form in ('and', 'or'):
+            for cell in se.cells():
+                if cell.cdr is NIL:
+                    self.tail(cell.car)
+                    return
+                temp = self.new_local()
+                self.emit('{} = {}'.format(temp, self.expr(cell.car)))
+                self.emit('if {}{}:'.format(
+                    'not ' if form == 'and' else '', temp))
+                self.emit('    return {}'.format(temp))
+            self.emit('return NIL')
+        elif form == 'let':
+            self.scopes.append(self.bind(se.car))
+            self.tail_sequence(se.cdr)
+            self.scopes.pop()
+        elif form == 'setbang':
+            self.effect(expr)
+            self.emit('return NIL')
+        elif form == 'self' and self.rest is None and len(se) == len(
+                self.params):
+            var, _ = self.free(expr.car)
+            args = self.args(se)
+            self.emit('if {}.value is SELF:'.format(var))
+            if self.params:
+                self.emit('    {} = {}'.format(', '.join(self.params), args))
+            self.emit('    continue')
+            self.emit('return tail({}.value, [{}])'.format(var, args))
+            self.looped = True
+        elif form in ('self', 'call'):
+            self.emit('return tail({}, [{}])'.format(
+                self.expr(expr.car), self.args(se)))
+        else:
+            self.emit('return {}'.format(self.expr(expr)))
+
+    def tail_sequence(self, body):
+        if body is NIL:
+            self.emit('return NIL')
+            return
+        for cell in body.cells():
+            if cell.cdr is NIL:
+                self.tail(cell.car)
+            else:
+                self.effect(cell.car)
+
+    def translate(self) -> Translation:
+        """
+        Translate and compile the function.
+        """
+        self.tail_sequence(self.func.body)
+        body = self.lines
+        params = ', '.join(self.params + (
+            ['*' + self.rest] if self.rest is not None else []))
+        names = list(self.variables)
+        self.lines = []
+        self.indent = 0
+        self.emit('def factory({}):'.format(', '.join(
+            ['SELF'] + [self.variables[name] for name in names])))
+        self.indent = 1
+        self.emit('def jitted({}):'.format(params))
+        self.indent = 2
+        if self.looped:
+            self.emit('while True:')
+            self.indent = 3
+        if self.guards:
+            self.emit('if not ({}):'.format(' and '.join(self.guards)))
+            self.emit('    return deopt(SELF, [{}])'.format(params))
+        if self.rest is not None:
+            self.emit('{0} = PackedList.from_iterable({0})'.format(self.rest))
+        dedent = 0 if self.looped or self.rest is not None else 1
+        self.lines.extend((indent - dedent, line) for indent, line in body)
+        self.indent = 1
+        self.emit('return jitted')
+        source = '\n'.join(wrap('    ' * indent + line)
+                           for indent, line in self.lines)
+        exec(compile(source, '<jit>', 'exec'), self.namespace)
+        return Translation(
+            self.func.params,
+            [(name, self.expected[name]) for name in names],
+            self.namespace['factory'], source)
+
+
+def wrap(line, width=79):
+    """
+    Break a long line of generated source with backslashes, so that it can
+    be read.
+    """
+    parts = []
+    while len(line) > width:
+        cut = line.rfind(' ', 0, width - 2)
+        if cut <= len(line) - len(line.lstrip()):
+            break
+        parts.append(line[:cut] + ' \\')
+        line = line[cut + 1:]
+    parts.append(line)
+    return '\n'.join(parts)
+
+
+def compile_function(func: UserFunction) -> bool:
+    """
+    Compile ``func``, setting its ``jitted`` code. Returns ``False`` if it
+    is not compiled: until it has been called more than ``threshold``
+    times, only a translation cached on its body is tried, and after that,
+    if it cannot be translated, it will not be tried again.
+    """
+    translation = func.body.translation
+    jitted = None
+    if translation is not None:
+        jitted = translation.instantiate(func)
+    if jitted is None:
+        if func.calls <= threshold:
+            return False
+        try:
+            translation = Translator(func).translate()
+        except Unsupported:
+            func.calls = None
+            return False
+        func.body.translation = translation
+        jitted = translation.instantiate(func)
+    func.jitted = jitted
+    return True
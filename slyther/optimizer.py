@@ -0,0 +1,240 @@
+"""
+An optional pass over parsed programs, run before they are evaluated:
+calls to pure builtin functions (those created with ``pure=True``) on
+constants are computed ahead of time, and an ``if`` whose predicate is
+constant is replaced by the branch it would take.
+
+>>> from slyther.parser import lisp
+>>> from slyther.interpreter import Interpreter
+>>> interp = Interpreter()
+>>> fold(lisp('(define (day) (* 60 60 24))'), interp.stg)
+(define (day) 86400)
+>>> fold(lisp('(if (< (expt 2 31) 0) (print "no") (print "yes"))'),
+...      interp.stg)
+(print "yes")
+
+Only names which are bound to a pure function now, and which are not
+rebound anywhere in the program, are folded, so a program which redefines
+or ``set!``\\ s a builtin is evaluated as it was written:
+
+>>> fold_program([lisp('(set! + -)'), lisp('(+ 1 2)')], interp.stg)
+[(set! + -), (+ 1 2)]
+>>> interp.exec('(set! + -)')
+NIL
+>>> fold(lisp('(+ 1 2)'), interp.stg)
+-1
+
+Neither is a name bound locally, by a ``lambda``, a ``let``, or a
+``define`` inside a function:
+
+>>> fold(lisp('(lambda (*) (* 2 3))'), interp.stg)
+(lambda (*) (* 2 3))
+
+Programs evaluated later are not seen by the pass, so code folded in one
+program keeps using the builtins as they were bound then, even if a later
+program rebinds them.
+"""
+from slyther.types import (Quoted, NIL, SExpression, Symbol, String, Boolean,
+                           BuiltinFunction, UserFunction,
+                           LexicalVarStorage)
+from slyther.evaluator import lisp_eval
+from slyther import builtins
+
+__all__ = ['fold', 'fold_program', 'assigned_names', 'Folder']
+
+
+def assigned_names(exprs):
+    """
+    Find the names which ``exprs`` ``define`` or ``set!`` anywhere, even
+    inside quoted code, which might be ``eval``-ed. Returns the names
+    ``define``-d only as functions, and all the others.
+    """
+    functions, others = set(), set()
+
+    def walk(expr):
+        if isinstance(expr, Quoted):
+            walk(expr.elem)
+        if not isinstance(expr, SExpression):
+            return
+        if expr.car in ('define', 'set!') and expr.cdr is not NIL:
+            target = expr.cdr.car
+            if isinstance(target, SExpression):
+                functions.add(target.car)
+            elif expr.car == 'define' and is_lambda(expr.cdr.cdr.car):
+                functions.add(target)
+            else:
+                others.add(target)
+        for elem in expr:
+            walk(elem)
+
+    for expr in exprs:
+        walk(expr)
+    return functions - others, others
+
+
+def is_lambda(expr):
+    return isinstance(expr, SExpression) and expr.car == 'lambda'
+
+
+def body_names(body):
+    """
+    The names ``define``-d directly in ``body``.
+    """
+    names = set()
+    for expr in body:
+        if (isinstance(expr, SExpression) and expr.car == 'define'
+                and expr.cdr is not NIL):
+            target = expr.cdr.car
+            names.add(target.car if isinstance(target, SExpression)
+                      else target)
+    return names
+
+
+def param_names(params):
+    if isinstance(params, Symbol):
+        return {params}
+    return {name for name in params if name != '.'}
+
+
+def constant(expr):
+    """
+    Return whether ``expr`` is a constant, and if so, its value.
+    """
+    if expr is NIL or type(expr) in (int, float, String):
+        return True, expr
+    if isinstance(expr, Quoted):
+        return True, lisp_eval(expr, None)
+    return False, None
+
+
+def to_ast(value):
+    """
+    Return an expression evaluating to ``value``.
+    """
+    if value is NIL or type(value) in (int, float, String):
+        return value
+    return Quoted(value)
+
+
+class Folder:
+    """
+    Folds the expressions of a program, given the names it defines as
+    functions and the names it otherwise rebinds (see ``assigned_names``).
+    """
+    def __init__(self, stg: LexicalVarStorage, functions=(), assigned=()):
+        self.stg = stg
+        self.functions = set(functions)
+        self.assigned = set(assigned)
+
+    def lookup(self, name, scope):
+        """
+        Return the value ``name`` is bound to for sure, or ``None`` if it
+        is bound locally, rebound in the program, or not bound.
+        """
+        if name in scope or name in self.assigned or name in self.functions:
+            return None
+        try:
+            return self.stg[name].value
+        except KeyError:
+            return None
+
+    def fold(self, expr, scope=frozenset()):
+        """
+        Fold ``expr``, in which the names in ``scope`` are bound locally.
+        """
+        if isinstance(expr, Symbol):
+            value = self.lookup(expr, scope)
+            if value is NIL or isinstance(
+                    value, (Boolean.LispTrue, Boolean.LispFalse)):
+                return to_ast(value)
+            return expr
+        if not isinstance(expr, SExpression):
+            return expr
+
+        head = expr.car
+        args = list(expr.cdr)
+        if not isinstance(head, Symbol):
+            head = self.fold(head, scope)
+            if is_lambda(head):
+                args = self.fold_all(args, scope)
+            return SExpression.from_iterable([head] + args)
+
+        value = self.lookup(head, scope)
+        if value is builtins.lambda_func and args:
+            inner = scope | param_names(args[0]) | body_names(args[1:])
+            return self.rebuild(
+                expr, args[:1] + self.fold_all(args[1:], inner))
+        if value is builtins.define and args:
+            if isinstance(args[0], SExpression):
+                inner = (scope | param_names(args[0].cdr)
+                         | body_names(args[1:]))
+                return self.rebuild(
+                    expr, args[:1] + self.fold_all(args[1:], inner))
+            return self.rebuild(
+                expr, args[:1] + self.fold_all(args[1:], scope))
+        if value is builtins.let and args:
+            bindings = SExpression.from_iterable(
+                SExpression.from_iterable(
+                    [binding.car] + self.fold_all(binding.cdr, scope))
+                for binding in args[0])
+            inner = (scope | {binding.car for binding in args[0]}
+                     | body_names(args[1:]))
+            return self.rebuild(
+                expr, [bindings] + self.fold_all(args[1:], inner))
+        if value is builtins.if_expr and args:
+            args = self.fold_all(args, scope)
+            is_constant, predicate = constant(args[0])
+            if is_constant:
+                branch = args[1:2] if predicate else args[2:3]
+                return branch[0] if branch else NIL
+            return self.rebuild(expr, args)
+        if value is builtins.cond:
+            return self.rebuild(expr, [
+                SExpression.from_iterable(self.fold_all(clause, scope))
+                for clause in args])
+        if value is builtins.setbang and args:
+            return self.rebuild(
+                expr, args[:1] + self.fold_all(args[1:], scope))
+        if (value is builtins.and_ or value is builtins.or_
+                or value is builtins.eval_):
+            return self.rebuild(expr, self.fold_all(args, scope))
+
+        if isinstance(value, BuiltinFunction) and value.pure:
+            args = self.fold_all(args, scope)
+            values = [constant(arg) for arg in args]
+            if all(is_constant for is_constant, _ in values):
+                try:
+                    return to_ast(value(*(v for _, v in values)))
+                except Exception:
+                    # leave it to fail when it is evaluated
+                    pass
+            return self.rebuild(expr, args)
+        if (isinstance(value, (BuiltinFunction, UserFunction))
+                or (head in self.functions and head not in scope)):
+            return self.rebuild(expr, self.fold_all(args, scope))
+        # a macro, or something which might be one: leave its arguments be
+        return expr
+
+    def fold_all(self, exprs, scope):
+        return [self.fold(expr, scope) for expr in exprs]
+
+    @staticmethod
+    def rebuild(expr, args):
+        return SExpression(expr.car, SExpression.from_iterable(args))
+
+
+def fold(expr, stg: LexicalVarStorage):
+    """
+    Fold the single expression ``expr``, as a program of its own.
+    """
+    return fold_program([expr], stg)[0]
+
+
+def fold_program(exprs, stg: LexicalVarStorage):
+    """
+    Fold each of the expressions in the program ``exprs``, which is about
+    to be evaluated in ``stg``.
+    """
+    functions, assigned = assigned_names(exprs)
+    folder = Folder(stg, functions, assigned)
+    return [folder.fold(expr) for expr in exprs]
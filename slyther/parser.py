@@ -9,11 +9,43 @@ This module defines parsing utilities in SlytherLisp.
 <class 'slyther.types.SExpression'>
 
 """
+import io
 import re
+import mmap
+from contextlib import contextmanager
+from functools import partial
+from string import hexdigits, octdigits
 from slyther.types import SExpression, Symbol, String, Quoted, NIL
 
-__all__ = ['lex', 'parse', 'lisp', 'parse_strlit', 'ControlToken', 'LParen',
-           'RParen', 'Quote']
+__all__ = ['lex', 'lex_buffer', 'mapped', 'LexState', 'parse', 'lisp',
+           'parse_strlit', 'ControlToken', 'LParen', 'RParen', 'Quote',
+           'Interner']
+
+# Single character escape sequences understood by ``parse_strlit``
+escapes = {
+    '0': '\0',
+    'a': '\a',
+    'b': '\b',
+    'e': '\x1b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+    'v': '\v',
+    '"': '"',
+    '\\': '\\',
+}
+
+# Every escape sequence ``parse_strlit`` understands, and its value
+escape_table = {'\\' + c: value for c, value in escapes.items()}
+escape_table.update(('\\0' + a + b, chr(int(a + b, 8)))
+                    for a in octdigits for b in octdigits)
+escape_table.update(('\\x' + a + b, chr(int(a + b, 16)))
+                    for a in hexdigits for b in hexdigits)
+# Splits the body of a literal into text and the escape sequences in it
+escape_pattern = re.compile(
+    r'(\\(?:0[0-7]{{2}}|x[0-9A-Fa-f]{{2}}|[{}]))'.format(
+        re.escape(''.join(escapes))))
 
 
 class ControlToken:
@@ -51,7 +83,52 @@ class Quote(ControlToken):
     pass
 
 
-def lex(code):
+# The kinds of token, in order of precedence: the name of the group for
+# each in ``master_pattern``, its pattern, and what to emit for it. That is
+# the token itself for a control token, a function which converts the
+# matched text into the token otherwise, or ``None`` if nothing should be
+# emitted. Text which matches none of the others is an ``error``.
+token_table = [
+    ('skip', r'(?:\s+|;[^\n]*)+', None),
+    ('lparen', r'\(', LParen()),
+    ('rparen', r'\)', RParen()),
+    ('quote', r"'", Quote()),
+    ('string', r'"(?:\\"|[^"])*?(?<!\\)"', lambda text: parse_strlit(text)),
+    ('float', r'-?(?:[0-9]*\.[0-9]+|[0-9]+\.[0-9]*)', float),
+    ('int', r'-?[0-9]+', int),
+    ('symbol', r'[^\s"\'();0-9.][^\s"\'();]*', Symbol),
+    ('error', r'.', None),
+]
+
+# All of the kinds of token as one pattern, with a group for each, so that
+# each token is found by a single match. None of the patterns have groups
+# of their own, so ``lastindex`` is the index of the kind in ``emitters``.
+master_pattern = re.compile('|'.join(
+    '(?P<{}>{})'.format(name, pattern) for name, pattern, _ in token_table),
+    re.DOTALL)
+emitters = [None] + [emit for _, _, emit in token_table]
+error_index = len(token_table)
+symbol_index = [name for name, _, _ in token_table].index('symbol') + 1
+symbol_pattern = re.compile(token_table[symbol_index - 1][1])
+
+shebang_pattern = re.compile(r'#![^\n]*')
+
+# The kinds of token which may go on after the end of a chunk (see
+# ``lex``), and what ends a symbol, a number or a string.
+open_ended = {index for index, (name, _, _) in enumerate(token_table, 1)
+              if name in ('skip', 'float', 'int', 'symbol', 'error')}
+skip_index = [name for name, _, _ in token_table].index('skip') + 1
+delimiter_pattern = re.compile(r'[\s"\'();]')
+string_end_pattern = re.compile(r'(?<!\\)"')
+
+# The same patterns, for lexing UTF-8 encoded buffers without decoding all
+# of them (see ``lex_buffer``). In bytes patterns, ``\s`` only matches
+# ASCII whitespace, so other whitespace ends up inside symbols.
+master_bytes_pattern = re.compile(master_pattern.pattern.encode(), re.DOTALL)
+shebang_bytes_pattern = re.compile(shebang_pattern.pattern.encode())
+
+
+def lex(code, chunk_size=65536):
     r"""
     IMPORTANT: read this entire docstring before implementing this function!
     Please ask for help on Piazza or come to office hours if you don't
@@ -207,8 +284,266 @@ def lex(code):
     [LParen, Quote, RParen]
     >>> list(lex("'"))
     [Quote]
+
+    Rather than a string, ``code`` may also be a text file object, which is
+    read ``chunk_size`` characters at a time, or any iterable of strings.
+    Tokens may cross the boundaries between the chunks, and only the text
+    of the token being lexed is kept, so lexing a large file takes no more
+    memory than its largest token:
+
+    >>> from io import StringIO
+    >>> list(lex(StringIO('#!slyther\n(print "a;b" 12.5)'), chunk_size=3))
+    [LParen, print, "a;b", 12.5, RParen]
+    >>> list(lex(['(pri', 'nt 1', '2', ')']))
+    [LParen, print, 12, RParen]
+
+    A bytes-like object, including an ``mmap``, is lexed as UTF-8 encoded
+    code by ``lex_buffer``.
+    """
+    if isinstance(code, (bytes, bytearray, memoryview, mmap.mmap)):
+        yield from lex_buffer(code)
+        return
+    if isinstance(code, str):
+        chunks = iter((code,))
+    elif hasattr(code, 'read'):
+        chunks = iter(partial(code.read, chunk_size), '')
+    else:
+        chunks = iter(code)
+    # A match which reaches the end of the buffer might continue in the
+    # next chunk, so the chunk after the buffer is read before lexing it.
+    buf = next(chunks, '')
+    following = next(chunks, None)
+    while following is not None and (
+            len(buf) < 2 or buf.startswith('#!') and '\n' not in buf):
+        buf += following
+        following = next(chunks, None)
+    m = shebang_pattern.match(buf)
+    pos = m.end() if m else 0
+    while True:
+        # where a match must end for it to be cut short, if it may be
+        end = len(buf) if following is not None else -1
+        for m in master_pattern.finditer(buf, pos):
+            emit = emitters[m.lastindex]
+            if m.end() == end and m.lastindex in open_ended:
+                break
+            if emit is None:
+                if m.lastindex == error_index:
+                    # an error at a double quote may be a string which is
+                    # not closed yet
+                    if end >= 0 and m.group() == '"':
+                        break
+                    raise SyntaxError("malformed tokens in input")
+            elif isinstance(emit, ControlToken):
+                yield emit
+            else:
+                yield emit(m.group())
+        else:
+            m = None
+        if following is None:
+            return
+        pos = 0
+        if m is not None and m.lastindex == skip_index:
+            # Nothing is kept of whitespace and comments, but a comment
+            # in the last line goes on up to the next newline.
+            line = max(buf.rfind('\n', m.start()) + 1, m.start())
+            if ';' in buf[line:]:
+                while following is not None and '\n' not in following:
+                    following = next(chunks, None)
+                if following is None:
+                    return
+                following = following[following.index('\n'):]
+            m = None
+        if m is None:
+            buf = following
+            following = next(chunks, None)
+            continue
+        # The token at m.start() may go on in the next chunks. Each of them
+        # is searched once for where it ends, and the token is only
+        # matched again after that.
+        pieces = [buf[m.start():]]
+        string = m.group() == '"'
+        while following is not None:
+            pieces.append(following)
+            if string:
+                found = string_end_pattern.search(following)
+                if (found and found.start() == 0
+                        and pieces[-2].endswith('\\')):
+                    found = string_end_pattern.search(following, 1)
+            else:
+                found = delimiter_pattern.search(following)
+            following = next(chunks, None)
+            if found:
+                break
+            if not pieces[-1]:
+                pieces.pop()
+        buf = ''.join(pieces)
+
+
+def lex_buffer(buf):
+    r"""
+    Lex the UTF-8 encoded code in the bytes-like object ``buf``, like
+    ``lex``. The patterns are matched on the bytes, and only the text of
+    each token is decoded, so ``buf`` may be an ``mmap`` of a file much
+    larger than would fit in memory as a ``str``:
+
+    >>> list(lex_buffer('(print "λ" ¯\\_(ツ)_/¯ 1.5)'.encode()))
+    [LParen, print, "λ", ¯\_, LParen, ツ, RParen, _/¯, 1.5, RParen]
+
+    A symbol which is not one by the ``str`` patterns holds whitespace
+    which is not ASCII, so its text is lexed again as a ``str``:
+
+    >>> list(lex_buffer('a\u3000b'.encode()))
+    [a, b]
+    """
+    m = shebang_bytes_pattern.match(buf)
+    pos = m.end() if m else 0
+    for m in master_bytes_pattern.finditer(buf, pos):
+        emit = emitters[m.lastindex]
+        if emit is None:
+            if m.lastindex == error_index:
+                raise SyntaxError("malformed tokens in input")
+        elif isinstance(emit, ControlToken):
+            yield emit
+        elif m.lastindex != symbol_index:
+            yield emit(m.group().decode('utf-8'))
+        else:
+            text = m.group().decode('utf-8')
+            if symbol_pattern.fullmatch(text):
+                yield Symbol(text)
+            else:
+                yield from lex_fragment(text)
+
+
+def lex_fragment(text):
+    """
+    Lex the ``str`` ``text``, taken from the middle of some code. Unlike
+    ``lex``, a ``#!`` at its start is not a shebang line:
+
+    >>> list(lex_fragment('#!a\u3000b'))
+    [#!a, b]
+    """
+    for m in master_pattern.finditer(text):
+        emit = emitters[m.lastindex]
+        if emit is None:
+            if m.lastindex == error_index:
+                raise SyntaxError("malformed tokens in input")
+        elif isinstance(emit, ControlToken):
+            yield emit
+        else:
+            yield emit(m.group())
+
+
+@contextmanager
+def mapped(f):
     """
-    raise NotImplementedError("Deliverable 2")
+    Map the open file ``f`` into memory, read only, for ``lex``. Yields
+    the ``mmap``, or ``f`` itself if it cannot be mapped, like a pipe or an
+    empty file. The mapping is closed on leaving the context, so the
+    tokens must be lexed in it.
+    """
+    try:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        yield f
+        return
+    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+        buf.madvise(mmap.MADV_SEQUENTIAL)
+    with buf:
+        yield buf
+
+
+# The next character which changes the state of a ``LexState`` outside of
+# strings and comments, or a run of those which only end a pending quote.
+balance_pattern = re.compile(r'''[()";']|[^()";'\s]+''')
+
+
+class LexState:
+    r"""
+    What ``lex`` would know after the code fed so far, which is enough to
+    tell whether it is a complete sequence of expressions: how deeply
+    nested in parentheses it is, and whether it ends inside a string, a
+    comment, or after a quote with nothing quoted yet. Each piece of code
+    is only looked at once, so a REPL can feed it line by line, and not
+    lex everything typed so far again for each line:
+
+    >>> state = LexState()
+    >>> state.feed('(define (f x) ; "comment\n')
+    >>> state.depth, state.in_string, state.in_comment, state.complete
+    (1, False, False, False)
+    >>> state.feed('  (print "(x\\"")')
+    >>> state.in_string, state.complete
+    (False, False)
+    >>> state.feed(')')
+    >>> state.complete
+    True
+
+    A string is closed by the first double quote which does not follow a
+    backslash, as in ``lex``, even across the pieces fed:
+
+    >>> state = LexState()
+    >>> state.feed('"a\\')
+    >>> state.feed('"')
+    >>> state.in_string
+    True
+
+    Code with too many closing parentheses is complete too, for ``parse``
+    to raise an error on. Code with no tokens in it is ``blank``.
+    """
+    __slots__ = ('depth', 'in_string', 'in_comment', 'quoted', 'escaped',
+                 'blank')
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.in_comment = False
+        self.quoted = False
+        # whether the last character fed, inside a string, is a backslash
+        self.escaped = False
+        self.blank = True
+
+    @property
+    def complete(self):
+        return not (self.in_string or self.quoted) and self.depth <= 0
+
+    def feed(self, code):
+        """
+        Update the state with the next piece of ``code``.
+        """
+        pos = 0
+        while pos < len(code):
+            if self.in_comment:
+                pos = code.find('\n', pos)
+                if pos < 0:
+                    return
+                self.in_comment = False
+            elif self.in_string:
+                end = code.find('"', pos)
+                while end >= 0 and (code[end - 1] == '\\' if end > pos
+                                    else self.escaped):
+                    end = code.find('"', end + 1)
+                if end < 0:
+                    self.escaped = code[-1] == '\\'
+                    return
+                self.in_string = False
+                pos = end + 1
+            else:
+                m = balance_pattern.search(code, pos)
+                if m is None:
+                    return
+                pos = m.end()
+                c = m.group()
+                if c == ';':
+                    self.in_comment = True
+                    continue
+                self.blank = False
+                self.quoted = c == "'"
+                if c == '(':
+                    self.depth += 1
+                elif c == ')':
+                    self.depth -= 1
+                elif c == '"':
+                    self.in_string = True
+                    self.escaped = False
 
 
 def parse_strlit(tok):
@@ -275,11 +610,83 @@ def parse_strlit(tok):
     Even though this is similar to Python's string literal format,
     you should not use any of Python's string literal processing
     utilities for this: tl;dr do it yourself.
+
+    A literal with no backslash in it is returned as it is. Otherwise, it
+    is split around its escape sequences by one pattern, in a single pass,
+    and each is replaced by its value in ``escape_table``.
     """
-    raise NotImplementedError("Deliverable 2")
+    body = tok[1:-1]
+    if '\\' not in body:
+        return String(body)
+    parts = escape_pattern.split(body)
+    parts[1::2] = map(escape_table.__getitem__, parts[1::2])
+    return String(''.join(parts))
 
 
-def parse(tokens):
+class Interner:
+    """
+    Hash-conses the elements ``parse`` creates when it is given an
+    ``Interner``: each atom, ``Quoted`` and ``SExpression`` cell is
+    replaced by the first equal one seen by the interner, so identical
+    code shares the same objects, and the caches kept on its nodes (see
+    ``SExpression``):
+
+    >>> interner = Interner()
+    >>> a, b = parse(lex('(f (g x) 1.0) (h (g x) 1)'), interner)
+    >>> a.cdr.car is b.cdr.car
+    True
+    >>> a.cdr.cdr.car is b.cdr.cdr.car
+    False
+    >>> next(parse(lex('(g x)'), interner)) is a.cdr.car
+    True
+    >>> len(interner)
+    14
+
+    The elements are never mutated by the interpreter, which is what makes
+    sharing them safe. Code built by other means is left as it is.
+    """
+    __slots__ = ('atoms', 'cells')
+
+    def __init__(self):
+        self.atoms = {}
+        self.cells = {}
+
+    def __len__(self):
+        return len(self.atoms) + len(self.cells)
+
+    def atom(self, value):
+        """
+        Return the shared atom equal to ``value`` (of the same type, as
+        ``1 == 1.0``; and a float by its bits, as ``0.0 == -0.0``).
+        """
+        key = (type(value), value.hex() if type(value) is float else value)
+        return self.atoms.setdefault(key, value)
+
+    def quote(self, elem):
+        """
+        Return the shared quotation of the shared element ``elem``.
+        """
+        key = (Quoted, id(elem))
+        quoted = self.cells.get(key)
+        if quoted is None:
+            quoted = self.cells[key] = Quoted(elem)
+        return quoted
+
+    def sexpression(self, elements):
+        """
+        Return the shared ``SExpression`` of the shared ``elements``.
+        """
+        se = NIL
+        for elem in reversed(elements):
+            key = (id(elem), id(se))
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = SExpression(elem, se)
+            se = cell
+        return se
+
+
+def parse(tokens, interner=None):
     r"""
     This *generator function* takes a generator object from the ``lex``
     function and generates AST elements.
@@ -394,8 +801,50 @@ def parse(tokens):
     Traceback (most recent call last):
         ...
     SyntaxError: invalid quotation
+
+    If an ``Interner`` is given, identical elements are shared (see
+    ``Interner``).
+
+    The parser does not recurse: the lists which are still open are kept
+    on a stack of their own, so code may be nested as deeply as memory
+    allows, and each list is built once its closing paren is reached.
     """
-    raise NotImplementedError("Deliverable 2")
+    # for each open list, its elements so far, and the number of quotes
+    # in front of it
+    stack = []
+    quotes = 0
+    for tok in tokens:
+        if isinstance(tok, Quote):
+            quotes += 1
+            continue
+        if isinstance(tok, LParen):
+            stack.append(([], quotes))
+            quotes = 0
+            continue
+        if isinstance(tok, RParen):
+            if quotes:
+                raise SyntaxError("invalid quotation")
+            if not stack:
+                raise SyntaxError("too many closing parens")
+            elements, quotes = stack.pop()
+            if interner is not None:
+                elem = interner.sexpression(elements)
+            else:
+                elem = SExpression.from_iterable(elements)
+        elif interner is not None:
+            elem = interner.atom(tok)
+        else:
+            elem = tok
+        for _ in range(quotes):
+            elem = interner.quote(elem) if interner is not None \
+                else Quoted(elem)
+        quotes = 0
+        if stack:
+            stack[-1][0].append(elem)
+        else:
+            yield elem
+    if stack or quotes:
+        raise SyntaxError("incomplete parse")
 
 
 def lisp(code: str):
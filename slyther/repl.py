@@ -1,3 +1,7 @@
+import traceback
+from slyther.parser import LexState
+
+
 def repl(interpreter, debug=False):
     """
     Take an interpreter object (see ``slyther/interpreter.py``) and give a REPL
@@ -29,5 +33,40 @@ def repl(interpreter, debug=False):
     If you do this, you should probably disable this behavior when ``debug``
     is set to ``True``, as it allows for easy post-mortem debugging with pdb
     or pudb.
+
+    Each line typed is fed to a ``LexState``, so telling whether the
+    expressions typed so far are complete only looks at the new line,
+    and pasting a long definition does not lex it again for each line.
     """
-    raise NotImplementedError("Deliverable 3")
+    state = LexState()
+    lines = []
+    while True:
+        try:
+            line = input('... ' if lines else '> ')
+        except EOFError:
+            print()
+            return
+        except KeyboardInterrupt:
+            print()
+            state = LexState()
+            lines = []
+            continue
+        line += '\n'
+        state.feed(line)
+        lines.append(line)
+        if not state.complete:
+            continue
+        code = ''.join(lines)
+        blank = state.blank
+        state = LexState()
+        lines = []
+        if blank:
+            continue
+        try:
+            print(repr(interpreter.exec(code)))
+        except KeyboardInterrupt:
+            print()
+        except Exception:
+            if debug:
+                raise
+            traceback.print_exc(limit=10, chain=False)
@@ -0,0 +1,228 @@
+"""
+A fourth evaluation engine: it walks the syntax tree like ``lisp_eval``,
+but rather than recursing in Python to evaluate a subexpression, it keeps
+what is left to do once the subexpression has a value (its *continuation*)
+on a stack of its own, which lives on the heap. The depth of recursion is
+then only limited by memory, and by ``max_depth``:
+
+>>> from slyther.interpreter import Interpreter
+>>> interp = Interpreter(engine='stackless')
+>>> interp.exec('''
+... (define (count-up n)
+...   (if (= n 0) 0 (+ 1 (count-up (- n 1)))))
+... (count-up 100000)''')
+100000
+>>> from slyther import stackless
+>>> from slyther.parser import lisp
+>>> stackless.max_depth = 1000
+>>> stackless_eval(lisp('(count-up 100000)'), interp.stg)
+Traceback (most recent call last):
+    ...
+RecursionError: maximum depth of continuations exceeded
+>>> stackless.max_depth = 1000000
+
+The continuations are tuples (lists, for the arguments of a call, which
+are filled in as they are evaluated) starting with one of the kinds below.
+Each kind is what is left of evaluating a call once one of its
+subexpressions has a value.
+
+The builtin ``if``, ``cond``, ``and``, ``or``, ``define``, ``set!`` and
+``eval`` are done by the engine itself, so that what they evaluate does
+not recurse either. Any other macro is expanded by calling it, as
+``lisp_eval`` does, and the expression it returns is evaluated by the
+engine. Calls to a ``UserFunction`` bind its parameters and evaluate its
+body without calling it, so they are never compiled by ``slyther.jit``.
+"""
+from slyther.types import (Quoted, NIL, SExpression, ConsList, Symbol,
+                           Macro, LexicalVarStorage, UserFunction)
+from slyther.evaluator import lisp_eval, callee, expand
+from slyther import builtins
+
+__all__ = ['stackless_eval', 'max_depth']
+
+# the number of continuations which may wait on the stack at once
+max_depth = 1000000
+
+# the kinds of continuations
+HEAD = 0        # (HEAD, expr, stg): call the value with the arguments of expr
+ARGS = 1        # [ARGS, func, cells, args, stg]: add to args, evaluate cells
+BODY = 2        # (BODY, cells, stg): drop the value, evaluate cells
+IF = 3          # (IF, se, stg): evaluate the branch it picks
+COND = 4        # (COND, clauses, stg): the test of the first clause
+AND = 5         # (AND, cells, stg): stop if falsy, else evaluate cells
+OR = 6          # (OR, cells, stg): stop if truthy, else evaluate cells
+DEFINE = 7      # (DEFINE, name, stg): define name to the value
+SET = 8         # (SET, var): set var to the value
+EVAL = 9        # (EVAL, stg): evaluate the value as code
+
+# stands for the expression to evaluate when there is a value to return
+RETURN = object()
+
+
+def enter(func, args, conts):
+    """
+    Start a call to ``func`` with ``args``. Returns the expression to
+    evaluate next and its storage, or ``RETURN`` and the result.
+    """
+    if type(func) is not UserFunction:
+        return RETURN, func(*args)
+    stg = func.bind(args)
+    body = func.body
+    if body is NIL:
+        return RETURN, NIL
+    if body.cdr is not NIL:
+        conts.append((BODY, body.cdr, stg))
+    return body.car, stg
+
+
+def stackless_eval(expr, stg: LexicalVarStorage):
+    """
+    Evaluate ``expr`` in ``stg``, just like ``lisp_eval``, without
+    recursing in Python.
+    """
+    conts = []
+    func = value = None
+    while True:
+        if expr is RETURN:
+            if not conts:
+                return value
+            cont = conts.pop()
+            kind = cont[0]
+            if kind == ARGS:
+                cont[3].append(value)
+                cells = cont[2]
+                if cells is NIL:
+                    expr, result = enter(cont[1], cont[3], conts)
+                    if expr is RETURN:
+                        value = result
+                    else:
+                        stg = result
+                    continue
+                cont[2] = cells.cdr
+                conts.append(cont)
+                expr, stg = cells.car, cont[4]
+            elif kind == BODY:
+                cells, stg = cont[1], cont[2]
+                if cells.cdr is not NIL:
+                    conts.append((BODY, cells.cdr, stg))
+                expr = cells.car
+            elif kind == HEAD:
+                func, expr, stg = value, cont[1], cont[2]
+            elif kind == IF:
+                se, stg = cont[1], cont[2]
+                expr = se.cdr.car if value else se.cdr.cdr.car
+            elif kind == COND:
+                clauses, stg = cont[1], cont[2]
+                if value:
+                    clause = clauses.car
+                    if clause.cdr is NIL:
+                        continue
+                    if clause.cdr.cdr is NIL:
+                        expr = clause.cdr.car
+                    else:
+                        # the same as the builtin cond does
+                        expr = SExpression(SExpression(
+                            Symbol('lambda'), SExpression(NIL, clause.cdr)))
+                elif clauses.cdr is NIL:
+                    value = NIL
+                else:
+                    conts.append((COND, clauses.cdr, stg))
+                    expr = clauses.cdr.car.car
+            elif kind == AND or kind == OR:
+                if (not value) if kind == AND else value:
+                    continue
+                cells, stg = cont[1], cont[2]
+                if cells.cdr is not NIL:
+                    conts.append((kind, cells.cdr, stg))
+                expr = cells.car
+            elif kind == DEFINE:
+                name, stg = cont[1], cont[2]
+                stg.put(name, value)
+                if isinstance(value, UserFunction):
+                    # make the function visible to itself, like define
+                    value.environ[name] = stg[name]
+                value = NIL
+            elif kind == SET:
+                cont[1].set(value)
+                value = NIL
+            else:   # EVAL
+                stg = cont[1]
+                expr = value
+                if isinstance(value, ConsList):
+                    expr = builtins.to_sexpression(value)
+            continue
+
+        if isinstance(expr, Symbol):
+            value = stg[expr].value
+            expr = RETURN
+            continue
+        if isinstance(expr, Quoted):
+            value = lisp_eval(expr, stg)
+            expr = RETURN
+            continue
+        if not isinstance(expr, SExpression):
+            value = expr
+            expr = RETURN
+            continue
+
+        if len(conts) >= max_depth:
+            raise RecursionError("maximum depth of continuations exceeded")
+        if func is None:
+            if not isinstance(expr.car, Symbol):
+                conts.append((HEAD, expr, stg))
+                expr = expr.car
+                continue
+            func = callee(expr, stg)
+        se = expr.cdr
+        if isinstance(func, Macro):
+            if func is builtins.if_expr:
+                conts.append((IF, se, stg))
+                expr = se.car
+            elif func is builtins.cond:
+                if se is NIL:
+                    value, expr = NIL, RETURN
+                else:
+                    conts.append((COND, se, stg))
+                    expr = se.car.car
+            elif func is builtins.and_ or func is builtins.or_:
+                if se is NIL:
+                    value, expr = NIL, RETURN
+                else:
+                    if se.cdr is not NIL:
+                        conts.append((
+                            AND if func is builtins.and_ else OR,
+                            se.cdr, stg))
+                    expr = se.car
+            elif func is builtins.define and not isinstance(
+                    se.car, SExpression):
+                conts.append((DEFINE, se.car, stg))
+                expr = se.cdr.car
+            elif func is builtins.setbang:
+                try:
+                    var = stg[se.car]
+                except KeyError:
+                    raise KeyError(
+                        'Undefined variable {}'.format(se.car)) from None
+                conts.append((SET, var))
+                expr = se.cdr.car
+            elif func is builtins.eval_:
+                conts.append((EVAL, stg))
+                expr = se.car
+            else:
+                expr = expand(func, expr, stg)
+            func = None
+            continue
+
+        if not callable(func):
+            raise TypeError("{!r} object is not callable".format(
+                type(func).__name__))
+        if se is NIL:
+            expr, result = enter(func, [], conts)
+            if expr is RETURN:
+                value = result
+            else:
+                stg = result
+        else:
+            conts.append([ARGS, func, se.cdr, [], stg])
+            expr = se.car
+        func = None
@@ -1,6 +1,9 @@
 import collections.abc as abc
 from typing import Dict
 from functools import partial, update_wrapper
+from itertools import islice, chain
+from collections import defaultdict
+from weakref import WeakSet
 
 
 class ConsCell:
@@ -15,9 +18,15 @@ class ConsCell:
     >>> cell.car = 4
     >>> cell.car
     4
+
+    Cells have ``__slots__`` rather than a ``__dict__``, as long lists are
+    made of very many of them (see ``benchmarks/memory.py``).
     """
+    __slots__ = ('car', 'cdr')
+
     def __init__(self, car, cdr):
-        raise NotImplementedError("Deliverable 1")
+        self.car = car
+        self.cdr = cdr
 
     def __eq__(self, other):
         """
@@ -41,8 +50,21 @@ class ConsCell:
 
         Should return ``False`` if ``other`` is not an instance of a
         ``ConsCell``.
+
+        The comparison does not recurse (see ``equal``), so it works on
+        structures of any length or depth, and on cyclic ones.
+        """
+        return equal(self, other)
+
+    def __hash__(self):
         """
-        raise NotImplementedError("Deliverable 1")
+        Cells are hashed by their structure, consistently with ``==``
+        (see ``structural_hash``):
+
+        >>> hash(ConsCell(1, 2)) == hash(ConsCell(1.0, 2))
+        True
+        """
+        return structural_hash(self)
 
     def __repr__(self):
         """
@@ -59,7 +81,7 @@ class ConsCell:
             The string formatting specifier ``!r`` will get you the
             ``repr`` of an object.
         """
-        raise NotImplementedError("Deliverable 1")
+        return '(cons {!r} {!r})'.format(self.car, self.cdr)
 
 
 class ConsList(ConsCell, abc.Sequence):
@@ -77,6 +99,8 @@ class ConsList(ConsCell, abc.Sequence):
         ...
     TypeError: cdr must be a ConsList
     """
+    __slots__ = ()
+
     def __init__(self, car, cdr=None):
         """
         If the ``cdr`` was not provided, assume to be ``NIL``.
@@ -85,7 +109,12 @@ class ConsList(ConsCell, abc.Sequence):
         >>> cell.cdr
         NIL
         """
-        raise NotImplementedError("Deliverable 1")
+        if cdr is None:
+            cdr = NIL
+        if not isinstance(cdr, ConsList):
+            raise TypeError("cdr must be a ConsList")
+        self.car = car
+        self.cdr = cdr
 
     @classmethod
     def from_iterable(cls, it):
@@ -105,7 +134,15 @@ class ConsList(ConsCell, abc.Sequence):
         :Space complexity: O(n) ``ConsList`` objects,
                            O(1) everything else (including stack frames!)
         """
-        raise NotImplementedError("Deliverable 1")
+        it = iter(it)
+        try:
+            head = tail = cls(next(it))
+        except StopIteration:
+            return NIL
+        for item in it:
+            tail.cdr = cls(item)
+            tail = tail.cdr
+        return head
 
     def __getitem__(self, idx):
         """
@@ -116,7 +153,13 @@ class ConsList(ConsCell, abc.Sequence):
         >>> [lst[i] == clst[i] for i in range(len(lst))]
         [True, True, True, True, True, True]
         """
-        raise NotImplementedError("Deliverable 1")
+        if idx < 0:
+            idx += len(self)
+        if idx >= 0:
+            for i, item in enumerate(self):
+                if i == idx:
+                    return item
+        raise IndexError("list index out of range")
 
     def __iter__(self):
         """
@@ -137,7 +180,8 @@ class ConsList(ConsCell, abc.Sequence):
         :Time complexity: O(1) for each yield
         :Space complexity: O(1)
         """
-        raise NotImplementedError("Deliverable 1")
+        for cell in self.cells():
+            yield cell.car
 
     def cells(self):
         """
@@ -158,7 +202,10 @@ class ConsList(ConsCell, abc.Sequence):
         :Time complexity: O(1) for each yield
         :Space complexity: O(1)
         """
-        raise NotImplementedError("Deliverable 1")
+        cell = self
+        while cell is not NIL:
+            yield cell
+            cell = cell.cdr
 
     def __len__(self):
         """
@@ -173,7 +220,7 @@ class ConsList(ConsCell, abc.Sequence):
         :Time complexity: O(n), where n is the length of the list.
         :Space complexity: O(1)
         """
-        raise NotImplementedError("Deliverable 1")
+        return sum(1 for _ in self.cells())
 
     def __contains__(self, p):
         """
@@ -199,7 +246,7 @@ class ConsList(ConsCell, abc.Sequence):
         :Time complexity: O(n), where n is the length of the list.
         :Space complexity: O(1)
         """
-        raise NotImplementedError("Deliverable 1")
+        return any(item == p for item in self)
 
     def __reversed__(self):
         """
@@ -221,7 +268,7 @@ class ConsList(ConsCell, abc.Sequence):
         :Time complexity: O(n), where n is the length of the list.
         :Space complexity: O(n)
         """
-        raise NotImplementedError("Deliverable 1")
+        return reversed(list(self))
 
     def __bool__(self):
         """ NilType overrides this to be ``False``. """
@@ -255,8 +302,14 @@ class ConsList(ConsCell, abc.Sequence):
         False
         >>> SExpression.from_iterable(l2) == NIL
         False
+
+        Once both lists reach the same cell, the rest of them is the same,
+        so lists sharing their cells (see ``slyther.parser.Interner``) are
+        compared in O(1).
         """
-        raise NotImplementedError("Deliverable 1")
+        return equal(self, other)
+
+    __hash__ = ConsCell.__hash__
 
     def __repr__(self):
         """
@@ -265,13 +318,15 @@ class ConsList(ConsCell, abc.Sequence):
         >>> ConsList.from_iterable([1, 2, 3])
         (list 1 2 3)
         """
-        raise NotImplementedError("Deliverable 1")
+        return '(list {})'.format(' '.join(map(repr, self)))
 
 
 class NilType(ConsList):
     """
     The type for the global ``NIL`` object.
     """
+    __slots__ = ()
+
     def __new__(cls):
         """
         If already constructed, don't make another. Just
@@ -300,6 +355,8 @@ class NilType(ConsList):
         """
         return self is other
 
+    __hash__ = ConsCell.__hash__
+
     def __repr__(self):
         """
         Represent ourselves in SlytherLisp evaluable format
@@ -348,11 +405,176 @@ class SExpression(ConsList):
 
     >>> SExpression(4)
     (4)
+
+    When an s-expression is a call to a macro which does not depend on the
+    state at runtime, ``lisp_eval`` caches the macro and the expression it
+    returned in ``expansion``. When it is a call to a function named by a
+    symbol, ``lisp_eval`` caches the variable the name refers to in
+    ``callee``. When it is the body of a function compiled to Python, the
+    ``slyther.jit.Translation`` is cached in ``translation``. Its hash
+    (see ``structural_hash``) is cached in ``digest``, as the code is
+    never changed once parsed. Each of these starts out as ``None``.
     """
+    __slots__ = ('expansion', 'callee', 'translation', 'digest')
+
+    def __init__(self, car, cdr=None):
+        super().__init__(car, cdr)
+        self.expansion = self.callee = self.translation = self.digest = None
+
+    @classmethod
+    def from_iterable(cls, it):
+        """
+        Like ``ConsList.from_iterable``, but as the parser makes very many
+        cells, each is made without ``__init__`` checking its ``cdr``,
+        which is a list by construction:
+
+        >>> SExpression.from_iterable(range(3))
+        (0 1 2)
+        """
+        se = NIL
+        for item in reversed(list(it)):
+            cell = object.__new__(cls)
+            cell.car = item
+            cell.cdr = se
+            cell.expansion = cell.callee = cell.translation = None
+            cell.digest = None
+            se = cell
+        return se
+
     def __repr__(self):
         return '({})'.format(' '.join(map(repr, self)))
 
 
+class PackedList(ConsList):
+    """
+    A ``ConsList`` whose elements are stored in a Python list, so that
+    ``len`` and indexing are O(1), and making one from a Python list does
+    not create a cell for each element:
+
+    >>> lst = PackedList.from_iterable(range(5))
+    >>> lst
+    (list 0 1 2 3 4)
+    >>> len(lst), lst[3], lst[-1]
+    (5, 3, 4)
+    >>> lst.cdr.cdr
+    (list 2 3 4)
+
+    Each cell is a view of an element of the Python list, created when it
+    is needed. Views of the same element are the same cell, so that a
+    ``car`` set through one of them is seen by all the others:
+
+    >>> tail = lst.cdr
+    >>> tail.car = 10
+    >>> lst
+    (list 0 10 2 3 4)
+
+    When a ``cdr`` is set, the cell it is set on is recorded in ``tails``,
+    so that the list continues with the new ``cdr`` after that cell,
+    while older references to what followed it are left as they were:
+
+    >>> rest = lst.cdr.cdr
+    >>> lst.cdr.cdr = ConsList(5)
+    >>> lst, len(lst), lst[2]
+    ((list 0 10 5), 3, 5)
+    >>> rest
+    (list 2 3 4)
+
+    Consing onto a ``PackedList`` makes a plain ``ConsList``:
+
+    >>> cons(-1, lst)
+    (list -1 0 10 5)
+    """
+    __slots__ = ('items', 'tails', 'index')
+
+    def __new__(cls, car, cdr=None):
+        return ConsList(car, cdr)
+
+    @classmethod
+    def view(cls, items, tails, index):
+        """
+        Return the cell for ``items[index]``.
+        """
+        obj = object.__new__(cls)
+        obj.items = items
+        obj.tails = tails
+        obj.index = index
+        return obj
+
+    @classmethod
+    def from_iterable(cls, it):
+        """
+        Create a ``PackedList`` of the elements of ``it``, or ``NIL`` if it
+        is empty.
+        """
+        items = list(it)
+        if not items:
+            return NIL
+        return cls.view(items, {}, 0)
+
+    @property
+    def car(self):
+        return self.items[self.index]
+
+    @car.setter
+    def car(self, value):
+        self.items[self.index] = value
+
+    @property
+    def cdr(self):
+        index = self.index
+        if index in self.tails:
+            return self.tails[index]
+        if index + 1 == len(self.items):
+            return NIL
+        # the same as view, inlined as lists are often walked by cdr
+        obj = object.__new__(type(self))
+        obj.items = self.items
+        obj.tails = self.tails
+        obj.index = index + 1
+        return obj
+
+    @cdr.setter
+    def cdr(self, value):
+        if not isinstance(value, ConsList):
+            raise TypeError("cdr must be a ConsList")
+        self.tails[self.index] = value
+
+    def run(self):
+        """
+        Return the index after the last element stored from here on, and
+        the list which follows that element.
+        """
+        stop, rest = len(self.items), NIL
+        for index, tail in self.tails.items():
+            if self.index <= index < stop:
+                stop, rest = index + 1, tail
+        return stop, rest
+
+    def __getitem__(self, idx):
+        stop, rest = self.run()
+        if idx < 0:
+            idx += len(self)
+        if 0 <= idx < stop - self.index:
+            return self.items[self.index + idx]
+        if idx < 0 or rest is NIL:
+            raise IndexError("list index out of range")
+        return rest[idx - (stop - self.index)]
+
+    def __iter__(self):
+        stop, rest = self.run()
+        yield from islice(self.items, self.index, stop)
+        yield from rest
+
+    def __len__(self):
+        stop, rest = self.run()
+        return stop - self.index + len(rest)
+
+    def __reversed__(self):
+        stop, rest = self.run()
+        return chain(reversed(rest),
+                     reversed(self.items[self.index:stop]))
+
+
 def cons(car, cdr) -> ConsCell:
     """
     Factory for cons cell like things. Tries to make a ``ConsList`` or
@@ -368,7 +590,202 @@ def cons(car, cdr) -> ConsCell:
     >>> cons(5, SExpression(4, NIL))
     (5 4)
     """
-    raise NotImplementedError("Deliverable 1")
+    if cdr is NIL:
+        return ConsList(car, cdr)
+    if isinstance(cdr, ConsList):
+        return type(cdr)(car, cdr)
+    return ConsCell(car, cdr)
+
+
+def same(a, b):
+    """
+    Return whether ``a`` and ``b`` are the same cell. Views of the same
+    element of a ``PackedList`` are.
+    """
+    return a is b or (
+        isinstance(a, PackedList) and isinstance(b, PackedList)
+        and a.items is b.items and a.index == b.index)
+
+
+def cell_key(cell):
+    """
+    A key which is the same for the same cell (see ``same``).
+    """
+    if isinstance(cell, PackedList):
+        return id(cell.items), cell.index
+    return id(cell)
+
+
+def equal(a, b):
+    """
+    Compare ``a`` and ``b`` like ``==`` does, without recursing. Cons
+    cells are equal if their ``car`` and ``cdr`` are, and both or neither
+    of them are a ``ConsList``. Each pair of lists is compared along its
+    ``cdr`` in a loop, and the pairs of lists in their ``car`` are kept on
+    a stack to compare later. The same lists are equal without looking at
+    them, as the same Python lists are, so structures which share them are
+    compared quickly. Anything else is compared with ``==``, so a plain
+    cell holding ``nan`` is not equal even to itself:
+
+    >>> deep = NIL
+    >>> for _ in range(100000):
+    ...     deep = ConsList(deep)
+    >>> equal(deep, ConsList(deep.car))
+    True
+    >>> equal(ConsList.from_iterable([1, 2]), ConsCell(1, ConsList(2)))
+    False
+    >>> cell = ConsCell(1, float('nan'))
+    >>> equal(cell, cell)
+    False
+
+    Cyclic structures are equal if they can't be told apart by following
+    their ``car`` and ``cdr``. Cycles along the ``cdr`` of a pair are found
+    with Brent's algorithm, and each pair of lists in a ``car`` is only
+    compared once:
+
+    >>> ones = ConsList(1)
+    >>> ones.cdr = ones
+    >>> more_ones = ConsList(1, ConsList(1))
+    >>> more_ones.cdr.cdr = more_ones
+    >>> equal(ones, more_ones)
+    True
+    >>> ones.car = ones
+    >>> equal(ones, more_ones)
+    False
+    """
+    stack = [(a, b)]
+    seen = {}
+
+    def later(x, y):
+        key = (cell_key(x), cell_key(y))
+        if key not in seen:
+            # keep the cells, so that their keys are not reused
+            seen[key] = x, y
+            stack.append((x, y))
+
+    while stack:
+        a, b = stack.pop()
+        if not isinstance(a, ConsCell) or not isinstance(b, ConsCell):
+            if isinstance(a, ConsCell) or isinstance(b, ConsCell):
+                return False
+            if not a == b:
+                return False
+            continue
+        if a is b and isinstance(a, ConsList):
+            continue
+        if a is NIL or b is NIL:
+            return False
+        if not isinstance(a, ConsList) or not isinstance(b, ConsList):
+            if isinstance(a, ConsList) or isinstance(b, ConsList):
+                return False
+            # the cdr of a plain cell may be anything
+            later(a.car, b.car)
+            later(a.cdr, b.cdr)
+            continue
+        saved_a, saved_b, packed = a, b, False
+        power = steps = 1
+        while a is not b:
+            if a is NIL or b is NIL:
+                return False
+            car_a = a.car
+            if isinstance(car_a, ConsCell):
+                # a cell is never equal to anything else, so this is enough
+                later(car_a, b.car)
+            elif not car_a == b.car:
+                return False
+            a, b = a.cdr, b.cdr
+            if (a is saved_a and b is saved_b) or (
+                    packed and same(a, saved_a) and same(b, saved_b)):
+                break
+            if steps == power:
+                saved_a, saved_b = a, b
+                packed = isinstance(a, PackedList) or isinstance(b, PackedList)
+                power, steps = 2 * power, 0
+            steps += 1
+    return True
+
+
+# the hash of NIL, and the hash of where a cycle closes
+nil_hash = hash('NIL')
+cycle_hash = hash('cycle')
+
+
+def mix(h, x):
+    return ((h ^ x) * 1000003) & 0xffffffffffffffff
+
+
+def structural_hash(cell):
+    """
+    Hash ``cell`` by its structure, without recursing, so that cells which
+    are ``equal`` have the same hash, like ``hash`` does for tuples. The
+    hash of each list in a ``car`` is folded into the hash of the list it
+    is in, keeping a stack of the lists being hashed. The hash of an
+    ``SExpression`` is cached on it:
+
+    >>> code = SExpression.from_iterable([1, SExpression(2)])
+    >>> structural_hash(code) == hash(ConsList.from_iterable([1, ConsList(2)]))
+    True
+    >>> code.digest == structural_hash(code)
+    True
+
+    A cycle is hashed as ``cycle_hash`` where it closes, so the hash of a
+    cyclic structure agrees with those of equal structures of the same
+    shape:
+
+    >>> ones = ConsList(1)
+    >>> ones.cdr = ones
+    >>> structural_hash(ones) == structural_hash(ones.cdr)
+    True
+    """
+    if cell is NIL:
+        return nil_hash
+    if not isinstance(cell, ConsCell):
+        return hash(cell)
+    if type(cell) is SExpression and cell.digest is not None:
+        return cell.digest
+    cycles = False
+    # each frame is the first cell of a list, the next cell along it, its
+    # hash so far, the state of Brent's algorithm, and whether it was found
+    # to close a cycle; path holds the first cell of each frame
+    frames = [[cell, cell, 0x345678, cell, 1, 0, False]]
+    path = {cell_key(cell)}
+    result = None
+    while frames:
+        frame = frames[-1]
+        first, cell, h, saved, power, steps, closed = frame
+        if result is not None:
+            h = mix(h, result)
+            result = None
+        child = None
+        while not closed and isinstance(cell, ConsCell) and cell is not NIL:
+            car, cell = cell.car, cell.cdr
+            steps += 1
+            if same(cell, saved):
+                closed = cycles = True
+            elif steps == power:
+                saved, power, steps = cell, 2 * power, 0
+            if not isinstance(car, ConsCell) or car is NIL:
+                h = mix(h, hash(car))
+            elif type(car) is SExpression and car.digest is not None:
+                h = mix(h, car.digest)
+            elif cell_key(car) in path:
+                cycles = True
+                h = mix(h, cycle_hash)
+            else:
+                child = car
+                break
+        if child is not None:
+            frame[1:] = cell, h, saved, power, steps, closed
+            frames.append([child, child, 0x345678, child, 1, 0, False])
+            path.add(cell_key(child))
+            continue
+        h = mix(h, cycle_hash if closed else hash(cell))
+        result = hash(h)
+        if type(first) is SExpression and not cycles:
+            first.digest = result
+        frames.pop()
+        path.discard(cell_key(first))
+    return result
 
 
 class Variable:
@@ -383,6 +800,8 @@ class Variable:
     Note: ``Variable`` will never appear in an abstract syntax tree. Its sole
     purpose is to be used with the ``LexicalVariableStorage``.
     """
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.set(value)
 
@@ -390,18 +809,101 @@ class Variable:
         self.value = value
 
 
+class Environment(abc.Mapping):
+    """
+    The environment a ``UserFunction`` was created in, made by calling
+    ``.share()`` on a ``LexicalVarStorage``. Rather than a copy of all the
+    visible variables, it is a link in a chain: the ``local`` part of the
+    storage, followed by the storage's own ``environ``.
+
+    >>> environ = {k: Variable(v) for k, v in (('x', 10), ('y', 11))}
+    >>> stg = LexicalVarStorage(environ)
+    >>> stg.put('y', 12)
+    >>> env = stg.share()
+    >>> env['x'].value, env['y'].value
+    (10, 12)
+    >>> env['z']
+    Traceback (most recent call last):
+        ...
+    KeyError: 'z'
+
+    Names may be put in an environment (for example, so that a function
+    can see itself), without changing the storage it came from.
+
+    >>> env['z'] = Variable(13)
+    >>> sorted(env)
+    ['x', 'y', 'z']
+    >>> 'z' in stg.share()
+    False
+    """
+    __slots__ = ('local', 'parent', 'own', '__weakref__')
+
+    # Counts the times each name was put in any environment. Otherwise, the
+    # variable a name refers to in an environment never changes, as the
+    # storage it came from copies ``local`` before putting a variable in it.
+    changes = defaultdict(int)
+
+    def __init__(self, local: Dict[str, Variable], parent):
+        self.local = local
+        self.parent = parent
+        self.own = None
+
+    def get(self, key: str, default=None):
+        env = self
+        while type(env) is Environment:
+            if env.own is not None and key in env.own:
+                return env.own[key]
+            var = env.local.get(key)
+            if var is not None:
+                return var
+            env = env.parent
+        return env.get(key, default)
+
+    def __getitem__(self, key: str) -> Variable:
+        var = self.get(key)
+        if var is None:
+            raise KeyError(key)
+        return var
+
+    def __setitem__(self, key: str, var: Variable):
+        if self.own is None:
+            self.own = {}
+        self.own[key] = var
+        Environment.changes[key] += 1
+
+    def __iter__(self):
+        seen = set()
+        env = self
+        while type(env) is Environment:
+            for key in (*(env.own or ()), *env.local):
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+            env = env.parent
+        for key in env:
+            if key not in seen:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
 class LexicalVarStorage:
     """
     Storage for lexically scoped variables. Has two parts:
 
-    * An ``environ`` part: a dictionary of the containing
-      environment (closure).
+    * An ``environ`` part: a dictionary (or ``Environment``) of the
+      containing environment (closure).
     * A ``local`` part: a dictionary of the local variables
       in the function.
     """
     def __init__(self, environ: Dict[str, Variable]):
         self.environ = environ
         self.local = {}
+        # the environments sharing ``local``, see ``share``
+        self.sharing = None
+        # the inline caches to clear when a name is put, see ``watch``
+        self.watchers = None
 
     def fork(self) -> Dict[str, Variable]:
         """
@@ -418,13 +920,78 @@ class LexicalVarStorage:
         y 12
         z 13
         """
-        raise NotImplementedError("Deliverable 1")
+        result = dict(self.environ)
+        result.update(self.local)
+        return result
+
+    def share(self) -> Environment:
+        """
+        Like ``fork``, but rather than copying each variable, return an
+        ``Environment`` which refers to the ``local`` and ``environ``
+        parts. Variables ``put`` in the storage afterwards are not visible
+        from the environment, just like a fork.
+
+        >>> environ = {k: Variable(v) for k, v in (('x', 10), ('y', 11))}
+        >>> stg = LexicalVarStorage(environ)
+        >>> stg.put('y', 12)
+        >>> env = stg.share()
+        >>> stg.put('y', 13)
+        >>> stg.put('z', 14)
+        >>> for k, v in sorted(env.items()):
+        ...     print(k, v.value)
+        x 10
+        y 12
+        >>> stg['x'].set(11)
+        >>> env['x'].value
+        11
+        """
+        env = Environment(self.local, self.environ)
+        if self.sharing is None:
+            self.sharing = [env]
+        else:
+            self.sharing.append(env)
+        return env
+
+    def watch(self, name: str, cache) -> None:
+        """
+        Set ``cache.var`` to ``None`` when ``name`` is next put in the
+        storage, as ``name`` may then refer to a different variable. Only
+        a weak reference to ``cache`` is kept.
+
+        >>> class Cache:
+        ...     var = 'cached'
+        >>> stg = LexicalVarStorage({})
+        >>> cache = Cache()
+        >>> stg.watch('x', cache)
+        >>> stg.put('y', 1)
+        >>> cache.var
+        'cached'
+        >>> stg.put('x', 1)
+        >>> cache.var is None
+        True
+        """
+        if self.watchers is None:
+            self.watchers = {}
+        caches = self.watchers.get(name)
+        if caches is None:
+            caches = self.watchers[name] = WeakSet()
+        caches.add(cache)
 
     def put(self, name: str, value) -> None:
         """
         Put a **new** variable in the local environment, giving
         it a value ``value``.
         """
+        if self.watchers is not None:
+            for cache in self.watchers.pop(name, ()):
+                cache.var = None
+        if self.sharing is not None:
+            # copy on write: give the environments sharing the local
+            # part a copy which the new variable is not put in
+            local = dict(self.local)
+            for env in self.sharing:
+                env.local = local
+            self.sharing = None
         self.local[name] = Variable(value)
 
     def __getitem__(self, key: str) -> Variable:
@@ -453,13 +1020,20 @@ class LexicalVarStorage:
             ...
         KeyError: "Undefined variable 'bar'"
         """
-        raise NotImplementedError("Deliverable 1")
+        var = self.local.get(key)
+        if var is None:
+            var = self.environ.get(key)
+            if var is None:
+                raise KeyError("Undefined variable '{}'".format(key))
+        return var
 
 
 class Quoted:
     """
     A simple wrapper for a quoted element in the abstract syntax tree.
     """
+    __slots__ = ('elem',)
+
     def __init__(self, elem):
         self.elem = elem
 
@@ -469,6 +1043,9 @@ class Quoted:
     def __eq__(self, other):
         return isinstance(other, self.__class__) and self.elem == other.elem
 
+    def __hash__(self):
+        return hash((Quoted, self.elem))
+
 
 class Symbol(str):
     """
@@ -492,6 +1069,65 @@ class String(str):
         return r
 
 
+class Vector(list):
+    """
+    A type for SlytherLisp vectors: a ``list`` of fixed length, which is
+    indexed in O(1), represented as a call to the ``vector`` builtin:
+
+    >>> Vector([1, String("two"), NIL])
+    (vector 1 "two" NIL)
+    >>> Vector()
+    (vector)
+
+    Builtin functions return a ``Vector`` as it is, not as a ``ConsList``
+    like they do a ``list``.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return '(vector{})'.format(''.join(' ' + repr(x) for x in self))
+
+
+class Promise:
+    """
+    The value of an expression which is only computed when it is first
+    needed, by calling ``thunk`` with no arguments, and then remembered:
+
+    >>> calls = []
+    >>> p = Promise(lambda: calls.append(1) or len(calls))
+    >>> p
+    #<promise>
+    >>> p.force(), p.force(), calls
+    (1, 1, [1])
+    >>> p
+    #<promise 1>
+
+    Once forced, the promise lets go of ``thunk``, and so of everything
+    it would have needed to compute the value.
+    """
+    __slots__ = ('thunk', 'value')
+
+    def __init__(self, thunk):
+        self.thunk = thunk
+        self.value = None
+
+    def force(self):
+        thunk = self.thunk
+        if thunk is not None:
+            value = thunk()
+            # the thunk may have forced this promise itself: the first
+            # value computed wins
+            if self.thunk is not None:
+                self.thunk = None
+                self.value = value
+        return self.value
+
+    def __repr__(self):
+        if self.thunk is not None:
+            return '#<promise>'
+        return '#<promise {!r}>'.format(self.value)
+
+
 class Function(abc.Callable):
     """
     Base class for user and builtin functions. No implementation needed.
@@ -507,10 +1143,17 @@ class UserFunction(Function):
     * ``body`` is an SExpression with the body of the function. The
       result of the last element in the body should be returned when
       the function is called.
-    * ``environ`` is a dictionary created by calling ``.fork()`` on a
+    * ``environ`` is a dictionary created by calling ``.fork()`` (or an
+      ``Environment`` created by calling ``.share()``) on a
       ``LexicalVarStorage`` when the function was created.
 
+    ``calls`` counts the calls made to the function, until it is compiled
+    to the Python function ``jitted``, or is found not to be compilable
+    (when it is ``None``).
     """
+    calls = 0
+    jitted = None
+
     def __init__(self, params: SExpression, body: SExpression, environ: dict):
         """
         >>> from slyther.parser import lisp
@@ -527,7 +1170,27 @@ class UserFunction(Function):
         >>> f.environ
         {}
         """
-        raise NotImplementedError("Deliverable 3")
+        self.params = params
+        self.body = body
+        self.environ = environ
+
+        # A bare symbol, as in ``(lambda args args)``, takes all of the
+        # arguments as a list.
+        if isinstance(params, Symbol):
+            self.names = []
+            self.rest = params
+            return
+
+        # Split off a variadic ``(a b . c)`` parameter now, rather than
+        # on each call.
+        self.names = list(params)
+        self.rest = None
+        if '.' in self.names:
+            idx = self.names.index('.')
+            if idx != len(self.names) - 2:
+                raise SyntaxError("exactly one parameter must follow '.'")
+            self.rest = self.names[-1]
+            self.names = self.names[:idx]
 
     def __call__(self, *args):
         """
@@ -541,25 +1204,119 @@ class UserFunction(Function):
         Warning: Do not make any attempt to modify ``environ`` here. That is
         not how lexical scoping works. Instead, construct a new
         ``LexicalVarStorage`` from the existing environ.
+
+        >>> f = UserFunction(
+        ...     params=SExpression.from_iterable(map(Symbol, 'a.r')),
+        ...     body=SExpression(Symbol('r')),
+        ...     environ={})
+        >>> f(1, 2, 3)
+        (list 2 3)
+        >>> f()
+        Traceback (most recent call last):
+            ...
+        TypeError: expected at least 1 argument(s), got 0
         """
         # avoid circular imports
         from slyther.evaluator import lisp_eval
 
-        raise NotImplementedError("Deliverable 3")
+        return lisp_eval(*self.tail_call(args))
+
+    def check_args(self, args):
+        """
+        Raise a ``TypeError`` unless this function can be called with
+        ``args``.
+        """
+        if self.rest is None and len(args) != len(self.names):
+            raise TypeError("expected {} argument(s), got {}".format(
+                len(self.names), len(args)))
+        if len(args) < len(self.names):
+            raise TypeError("expected at least {} argument(s), got {}".format(
+                len(self.names), len(args)))
+
+    def bind(self, args) -> 'LexicalVarStorage':
+        """
+        Create a new ``LexicalVarStorage`` for a call to this function,
+        with each parameter bound to the corresponding argument in
+        ``args``.
+        """
+        self.check_args(args)
+        stg = LexicalVarStorage(self.environ)
+        for name, value in zip(self.names, args):
+            stg.put(name, value)
+        if self.rest is not None:
+            stg.put(self.rest,
+                    PackedList.from_iterable(args[len(self.names):]))
+        return stg
+
+    def tail_call(self, args):
+        """
+        Start a call to this function with arguments ``args``: bind the
+        parameters in a new ``LexicalVarStorage`` and evaluate all but
+        the last expression in the body.
+
+        Returns the last expression in the body and the storage it must
+        be evaluated in. The caller does the final evaluation itself, so
+        that ``lisp_eval`` can evaluate a call in tail position without
+        growing the Python stack.
+
+        >>> from slyther.parser import lisp
+        >>> f = UserFunction(
+        ...     params=lisp('(x y)'),
+        ...     body=lisp('(x y)'),
+        ...     environ={})
+        >>> expr, stg = f.tail_call([1, 2])
+        >>> expr
+        y
+        >>> stg['y'].value
+        2
+
+        Once the function has been called more than ``jit.threshold``
+        times, or as soon as another function with the same body has been,
+        its body is compiled to Python, and the call is run by the compiled
+        code. See ``slyther.jit``.
+        """
+        from slyther.evaluator import lisp_eval
+        from slyther import jit
+
+        if self.jitted is not None:
+            return jit.tail_call(self, args)
+        if self.calls is not None:
+            self.calls += 1
+            if (jit.threshold is not None
+                    and (self.calls > jit.threshold
+                         or self.body.translation is not None)
+                    and jit.compile_function(self)):
+                return jit.tail_call(self, args)
+        stg = self.bind(args)
+        expr = NIL
+        for cell in self.body.cells():
+            if cell.cdr is NIL:
+                expr = cell.car
+            else:
+                lisp_eval(cell.car, stg)
+        return expr, stg
 
     def __repr__(self):
         """
         Represent in self-evaluable form.
         """
-        return "(lambda ({}) {})".format(
-            ' '.join(self.params),
-            ' '.join(repr(x) for x in self.body))
+        if isinstance(self.params, Symbol):
+            params = self.params
+        else:
+            params = '({})'.format(' '.join(self.params))
+        return "(lambda {} {})".format(
+            params, ' '.join(repr(x) for x in self.body))
 
 
 class Macro(abc.Callable):
     """
     Base class for all macros. No implementation needed.
+
+    If ``runtime`` is false, the expression the macro returns only depends
+    on the expression it was given, not on the storage or anything else at
+    runtime, so that the evaluator may cache it.
     """
+    runtime = True
 
 
 class BuiltinCallable(abc.Callable):
@@ -569,8 +1326,8 @@ class BuiltinCallable(abc.Callable):
     py_translations = {
         bool: Boolean,
         str: String,
-        list: ConsList.from_iterable,
-        tuple: ConsList.from_iterable,
+        list: PackedList.from_iterable,
+        tuple: PackedList.from_iterable,
     }
 
     def __new__(cls, arg=None, name=None):
@@ -597,13 +1354,46 @@ class BuiltinFunction(BuiltinCallable, Function):
     """
     Builtin functions have this type. Unlike macros, functions cannot
     return s-expressions, and they should be downgraded to cons lists.
+
+    A function created with ``pure=True`` is declared to have no side
+    effects, and to always return the same result given the same
+    arguments, so that a call to it on constants may be computed ahead of
+    time (see ``slyther.optimizer``):
+
+    >>> import operator
+    >>> BuiltinFunction(operator.add, '+', pure=True).pure
+    True
+    >>> BuiltinFunction(print).pure
+    False
     """
 
     py_translations = dict(BuiltinCallable.py_translations)
-    py_translations.update({SExpression: ConsList.from_iterable})
+    py_translations.update({SExpression: PackedList.from_iterable})
+
+    def __new__(cls, arg=None, name=None, pure=False):
+        if isinstance(arg, str):
+            return partial(cls, name=arg, pure=pure)
+        obj = super().__new__(cls, arg, name)
+        obj.pure = pure
+        return obj
 
 
 class BuiltinMacro(BuiltinCallable, Macro):
     """
-    Builtin macros have this type. No implementation needed.
+    Builtin macros have this type. A macro is assumed to depend on the
+    state at runtime, unless it is created with ``runtime=False``:
+
+    >>> @BuiltinMacro('swap', runtime=False)
+    ... def swap(se, stg):
+    ...     return SExpression(se.cdr.car, SExpression(se.car))
+    >>> swap.runtime
+    False
+    >>> BuiltinMacro(swap.func).runtime
+    True
     """
+    def __new__(cls, arg=None, name=None, runtime=True):
+        if isinstance(arg, str):
+            return partial(cls, name=arg, runtime=runtime)
+        obj = super().__new__(cls, arg, name)
+        obj.runtime = runtime
+        return obj
@@ -0,0 +1,804 @@
+"""
+A third evaluation engine: expressions are compiled to a compact bytecode,
+which a stack based virtual machine runs.
+
+>>> from slyther.interpreter import Interpreter
+>>> interp = Interpreter(engine='vm')
+>>> interp.exec('(define (square x) (* x x)) (square 12)')
+144
+
+Each function is compiled to a ``Code`` object. Its bytecode is a flat list
+of ``opcode, argument`` pairs, and operands are passed on a value stack:
+
+>>> from slyther.parser import lisp
+>>> code = compile_toplevel(lisp('(lambda (x) (if (< x 0) (- x) x))'),
+...                         interp.stg)
+>>> print(dis(code.consts[1]))
+    0 TAIL_GUARD       0 (if)
+    2 LOAD_GLOBAL      1 (<)
+    4 LOAD_LOCAL       2 (x)
+    6 LOAD_CONST       2 (0)
+    8 CALL             2
+   10 JUMP_IF_FALSE   18
+   12 LOAD_GLOBAL      3 (-)
+   14 LOAD_LOCAL       2 (x)
+   16 TAIL_CALL        1
+   18 LOAD_LOCAL       2 (x)
+   20 RETURN           0
+
+Names are resolved when the code is compiled. Variables bound by a function
+(its parameters, its internal ``define``s, and the names bound by a ``let``
+in its body) live in numbered slots of the function's *frame*, a Python
+list. Slot 0 of a frame is the frame of the enclosing function, so a free
+variable is found by following a known number of links. Only names which
+are not bound lexically are looked up by name, at the time they are used,
+in slot 1 of the frame: the ``Environment`` the function was created in,
+as for the closure compiler (see ``slyther.compiler``).
+
+A special form is compiled after a ``GUARD``, which checks that its name is
+still bound to the builtin macro, and runs it as an ordinary call if not.
+
+Calls to functions made by the VM do not recurse in Python: ``execute``
+keeps its own stack of suspended calls, and a call in tail position
+replaces the current frame rather than suspending it. The depth of
+non-tail calls is only limited by ``max_depth``.
+
+Macros other than the builtin special forms are expanded when the call is
+run, as are calls to a local variable which holds a macro, and ``eval``
+compiles its argument when it is run. The resulting code
+runs in a frame of its own, nested inside the frame of the code that
+expanded it, so it may use the local variables which are in scope, and a
+name it ``define``s is put in the block it was run from.
+"""
+from slyther.types import (Quoted, NIL, SExpression, ConsList, Symbol, String,
+                           Macro, Environment, LexicalVarStorage, UserFunction,
+                           BuiltinFunction, PackedList)
+from slyther.evaluator import lisp_eval, expansions
+from slyther.compiler import (Scope, UNBOUND, GlobalSite, special_form_name,
+                              frame_storage, define_in_frame)
+from slyther import evaluator, builtins
+
+__all__ = ['Code', 'VMFunction', 'MacroCall', 'CodeCompiler',
+           'compile_toplevel', 'execute', 'vm_eval', 'dis', 'max_depth',
+           'opnames']
+
+# The opcodes. An instruction is an opcode and one integer argument. The
+# argument of LOAD_FREE and STORE_FREE is the index of a constant
+# ``(depth, slot, name)``: the variable is in ``slot`` of the frame
+# ``depth`` links up. The argument of DEFINE_FREE is the index of a
+# constant ``(depth, name)``.
+LOAD_LOCAL = 0              # push frame[arg]
+LOAD_GLOBAL = 1             # push the variable looked up by consts[arg]
+LOAD_CONST = 2              # push consts[arg]
+CALL = 3                    # call with the top arg values as arguments
+TAIL_CALL = 4               # same, but the result is returned
+RETURN = 5                  # return the top of the stack
+JUMP_IF_FALSE = 6           # pop, and jump to arg if it is falsy
+JUMP = 7                    # jump to arg
+JUMP_IF_FALSE_OR_POP = 8    # jump to arg if the top is falsy, else pop it
+JUMP_IF_TRUE_OR_POP = 9     # jump to arg if the top is truthy, else pop it
+POP = 10                    # discard the top of the stack
+LOAD_FREE = 11              # push a slot of an enclosing frame, consts[arg]
+STORE_LOCAL = 12            # pop into frame[arg]
+STORE_FREE = 13             # pop into a slot of an enclosing frame
+STORE_GLOBAL = 14           # pop into the variable looked up by consts[arg]
+DEFINE_GLOBAL = 15          # pop into a new global named consts[arg]
+MAKE_CLOSURE = 16           # push a VMFunction running the Code consts[arg]
+EVAL = 17                   # pop an expression, compile it and run it
+TAIL_EVAL = 18              # same, but the result is returned
+EXPAND = 19                 # expand the macro call consts[arg] and run it
+TAIL_EXPAND = 20            # same, but the result is returned
+# If the top is a macro, pop it, expand the call consts[arg] with it and
+# run that, going on past the end of the call. Otherwise, do nothing.
+EXPAND_IF_MACRO = 21
+TAIL_EXPAND_IF_MACRO = 22   # same, but the result is returned
+# If the name of the special form consts[arg] is no longer bound to the
+# builtin macro, run the call as EXPAND does, going on past the form.
+# Otherwise, do nothing, going on to the compiled form.
+GUARD = 23
+TAIL_GUARD = 24             # same, but the result of the call is returned
+DEFINE_FREE = 25            # pop into a new variable, see define_in_frame
+
+opnames = {value: name for name, value in globals().items()
+           if name.isupper() and isinstance(value, int)}
+
+# the maximum number of non-tail calls made by the VM which can be running
+# at once
+max_depth = 100000
+
+
+class Code:
+    """
+    A compiled function.
+
+    * ``ops`` is the bytecode, a flat list of opcodes and their arguments.
+    * ``consts`` is the list of constants the bytecode refers to.
+    * ``names`` is the name of the variable in each slot of the frame, for
+      error messages and ``dis``.
+    * ``nparams`` is the number of (non-variadic) parameters, and ``rest``
+      is true if the function is variadic.
+    * ``padding`` is the value of the slots following the parameters when
+      the frame is created.
+    * ``params`` and ``body`` are the source of the function.
+    """
+    __slots__ = ('ops', 'consts', 'names', 'nparams', 'rest', 'padding',
+                 'params', 'body')
+
+    def __init__(self, ops, consts, names, nparams, rest, params, body):
+        self.ops = ops
+        self.consts = consts
+        self.names = names
+        self.nparams = nparams
+        self.rest = rest
+        self.padding = [UNBOUND] * (len(names) - 2 - nparams - rest)
+        self.params = params
+        self.body = body
+
+    def frame(self, parent, env, args):
+        """
+        Create the frame for a call with the list of arguments ``args``,
+        nested in ``parent``, with the environment ``env``.
+        """
+        n = self.nparams
+        if len(args) != n or self.rest:
+            if not self.rest:
+                raise TypeError("expected {} argument(s), got {}".format(
+                    n, len(args)))
+            if len(args) < n:
+                raise TypeError(
+                    "expected at least {} argument(s), got {}".format(
+                        n, len(args)))
+            args = args[:n] + [PackedList.from_iterable(args[n:])]
+        return [parent, env, *args, *self.padding]
+
+    def unbound(self, slot):
+        return KeyError("Undefined variable '{}'".format(self.names[slot]))
+
+
+class VMFunction(UserFunction):
+    """
+    A ``UserFunction`` created by the VM. ``environ`` is the frame the
+    function was created in, ``env`` is the ``Environment`` its free names
+    are looked up in, ``code`` is the compiled ``Code`` for the function,
+    and ``stg`` is the storage for global variables.
+    """
+    def __init__(self, code: Code, environ: list, env: Environment,
+                 stg: LexicalVarStorage):
+        # The parameters were checked when the code was compiled, so skip
+        # UserFunction.__init__, which is too slow to run on each lambda.
+        self.params = code.params
+        self.body = code.body
+        self.environ = environ
+        self.env = env
+        self.code = code
+        self.stg = stg
+
+    def __call__(self, *args):
+        frame = self.code.frame(self.environ, self.env, list(args))
+        return execute(self.code, frame, self.stg)
+
+    def tail_call(self, args):
+        # When lisp_eval calls this function, the VM runs it to completion
+        # here, and there is no expression left over for lisp_eval.
+        return Quoted(self(*args)), None
+
+
+def call_value(func, args):
+    """
+    Call a function which the VM does not run itself.
+    """
+    if isinstance(func, Macro):
+        raise TypeError(
+            "a macro can only be called by its global name, got {!r}".format(
+                func))
+    if not callable(func):
+        raise TypeError("{!r} object is not callable".format(
+            type(func).__name__))
+    return func(*args)
+
+
+def execute(code: Code, frame: list, stg: LexicalVarStorage):
+    """
+    Run ``code`` in ``frame``, with the global variables in ``stg``, and
+    return the result.
+    """
+    count_hits = evaluator.count_hits
+    stats = evaluator.inline_caches
+    ops = code.ops
+    consts = code.consts
+    pc = 0
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    # the (code, pc, frame) of each suspended call
+    calls = []
+
+    while True:
+        op = ops[pc]
+        arg = ops[pc + 1]
+        pc += 2
+        if op == LOAD_LOCAL:
+            value = frame[arg]
+            if value is UNBOUND:
+                raise code.unbound(arg)
+            push(value)
+        elif op == LOAD_GLOBAL:
+            site = consts[arg]
+            var = site.var
+            if var is None or frame[1] is not site.env:
+                var = site.lookup(frame[1])
+            elif count_hits:
+                stats.hits += 1
+            push(var.value)
+        elif op == LOAD_CONST:
+            push(consts[arg])
+        elif op == CALL or op == TAIL_CALL:
+            if arg:
+                args = stack[-arg:]
+                del stack[-arg:]
+            else:
+                args = []
+            func = pop()
+            if type(func) is VMFunction and func.stg is stg:
+                if op == CALL:
+                    if len(calls) >= max_depth:
+                        raise RecursionError("maximum call depth exceeded")
+                    calls.append((code, pc, frame))
+                code = func.code
+                if len(args) == code.nparams and not code.rest:
+                    frame = [func.environ, func.env, *args, *code.padding]
+                else:
+                    frame = code.frame(func.environ, func.env, args)
+                ops = code.ops
+                consts = code.consts
+                pc = 0
+                continue
+            if type(func) is BuiltinFunction:
+                push(func(*args))
+            else:
+                push(call_value(func, args))
+            if op == TAIL_CALL:
+                if not calls:
+                    return pop()
+                code, pc, frame = calls.pop()
+                ops = code.ops
+                consts = code.consts
+        elif op == RETURN:
+            if not calls:
+                return pop()
+            code, pc, frame = calls.pop()
+            ops = code.ops
+            consts = code.consts
+        elif op == JUMP_IF_FALSE:
+            if not pop():
+                pc = arg
+        elif op == GUARD or op == TAIL_GUARD:
+            guard = consts[arg]
+            if guard.site.find(frame).value is not guard.form:
+                # rebound: make the call, and go on past the compiled form
+                nested = guard.expand(frame, stg)
+                if op == GUARD:
+                    if len(calls) >= max_depth:
+                        raise RecursionError("maximum call depth exceeded")
+                    calls.append((code, guard.resume, frame))
+                code = nested
+                frame = [frame, frame[1], *code.padding]
+                ops = code.ops
+                consts = code.consts
+                pc = 0
+        elif op == JUMP:
+            pc = arg
+        elif op == JUMP_IF_FALSE_OR_POP:
+            if stack[-1]:
+                pop()
+            else:
+                pc = arg
+        elif op == JUMP_IF_TRUE_OR_POP:
+            if stack[-1]:
+                pc = arg
+            else:
+                pop()
+        elif op == POP:
+            pop()
+        elif op == LOAD_FREE:
+            depth, slot, name = consts[arg]
+            f = frame
+            for _ in range(depth):
+                f = f[0]
+            value = f[slot]
+            if value is UNBOUND:
+                raise KeyError("Undefined variable '{}'".format(name))
+            push(value)
+        elif op == STORE_LOCAL:
+            frame[arg] = pop()
+        elif op == STORE_FREE:
+            depth, slot, name = consts[arg]
+            f = frame
+            for _ in range(depth):
+                f = f[0]
+            f[slot] = pop()
+        elif op == STORE_GLOBAL:
+            try:
+                var = consts[arg].find(frame)
+            except KeyError:
+                raise KeyError('Undefined variable {}'.format(
+                    consts[arg].name)) from None
+            var.set(pop())
+        elif op == DEFINE_GLOBAL:
+            name = consts[arg]
+            value = pop()
+            stg.put(name, value)
+            if type(value) is VMFunction:
+                # make the function visible to itself, so it can recurse
+                value.env = Environment({name: stg.local[name]}, value.env)
+        elif op == DEFINE_FREE:
+            depth, name = consts[arg]
+            value = pop()
+            var = define_in_frame(frame, depth, name, value, stg)
+            if type(value) is VMFunction:
+                value.env = Environment({name: var}, value.env)
+        elif op == MAKE_CLOSURE:
+            env = frame[1]
+            if env is None:
+                env = stg.share()
+            push(VMFunction(consts[arg], frame, env, stg))
+        else:
+            # EVAL, EXPAND, EXPAND_IF_MACRO or their TAIL_ variants: compile
+            # an expression and run it as the body of a function with no
+            # parameters
+            resume = pc
+            if op == EVAL or op == TAIL_EVAL:
+                expr = pop()
+                if isinstance(expr, ConsList):
+                    expr = builtins.to_sexpression(expr)
+                nested = compile_nested(expr, consts[arg], stg)
+            elif op == EXPAND or op == TAIL_EXPAND:
+                nested = consts[arg].expand(frame, stg)
+            elif isinstance(stack[-1], Macro):
+                nested = consts[arg].expand_with(pop(), frame, stg)
+                resume = consts[arg].resume
+            else:
+                continue
+            if op == EVAL or op == EXPAND or op == EXPAND_IF_MACRO:
+                if len(calls) >= max_depth:
+                    raise RecursionError("maximum call depth exceeded")
+                calls.append((code, resume, frame))
+            code = nested
+            frame = [frame, frame[1], *code.padding]
+            ops = code.ops
+            consts = code.consts
+            pc = 0
+
+
+class MacroCall:
+    """
+    A call to the global macro ``name`` with the arguments ``source``, made
+    in ``scope``: the argument of ``EXPAND`` and ``TAIL_EXPAND``. ``site``
+    looks up the macro. Unless the macro depends on the state at runtime,
+    the compiled expansion is kept in ``code``, along with the ``macro`` it
+    came from.
+
+    If ``name`` is no longer a macro when the call is run, the call is
+    compiled again as an ordinary call, which is kept in ``call``.
+
+    It is also the argument of ``GUARD`` and ``TAIL_GUARD``, for a special
+    form compiled while ``name`` was bound to the builtin macro ``form``,
+    and of ``EXPAND_IF_MACRO`` and ``TAIL_EXPAND_IF_MACRO``, for a call to
+    a local variable ``name``. ``resume`` is the position just past the
+    compiled form or the ordinary call.
+    """
+    __slots__ = ('name', 'source', 'scope', 'site', 'form', 'resume',
+                 'macro', 'code', 'call')
+
+    def __init__(self, name, source, scope, site=None, form=None):
+        self.name = name
+        self.source = source
+        self.scope = scope
+        self.site = site
+        self.form = form
+        self.resume = None
+        self.macro = None
+        self.code = None
+        self.call = None
+
+    def expand(self, frame: list, stg: LexicalVarStorage) -> Code:
+        """
+        Expand the call, made in ``frame``, returning the compiled
+        expansion.
+        """
+        macro = self.site.find(frame).value
+        if not isinstance(macro, Macro):
+            if self.call is None:
+                self.call = compile_plain_call(
+                    SExpression(self.name, self.source), self.scope, stg)
+            return self.call
+        return self.expand_with(macro, frame, stg)
+
+    def expand_with(self, macro: Macro, frame: list,
+                    stg: LexicalVarStorage) -> Code:
+        """
+        Expand the call with ``macro``, returning the compiled expansion.
+        The macro sees the variables in scope in ``frame``.
+        """
+        if not macro.runtime:
+            if macro is self.macro:
+                expansions.hits += 1
+                return self.code
+            expansions.misses += 1
+        code = compile_nested(
+            macro(self.source, frame_storage(frame, self.scope, stg)),
+            self.scope, stg)
+        if not macro.runtime:
+            self.macro, self.code = macro, code
+        return code
+
+
+class CodeCompiler:
+    """
+    Compiles the body of one function to bytecode. ``stg`` is the storage
+    for global variables, used at compile time to find the special forms.
+    ``scope`` is the function's ``Scope``.
+    """
+    def __init__(self, stg: LexicalVarStorage, scope: Scope):
+        self.stg = stg
+        self.scope = scope
+        self.ops = []
+        self.consts = []
+        self.const_index = {}
+
+    def emit(self, op, arg=0):
+        """
+        Append an instruction, returning its position.
+        """
+        self.ops += (op, arg)
+        return len(self.ops) - 2
+
+    def patch(self, at):
+        """
+        Point the jump at position ``at`` to the next instruction.
+        """
+        self.ops[at + 1] = len(self.ops)
+
+    def const(self, value):
+        """
+        Return the index of ``value`` in the constants.
+        """
+        if isinstance(value, (int, float, str)):
+            # a float by its bits, as ``0.0 == -0.0``
+            key = (type(value), value.hex() if type(value) is float
+                   else value)
+        else:
+            key = id(value)
+        if key not in self.const_index:
+            self.const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return self.const_index[key]
+
+    def assemble(self, params, body, nparams=0, rest=False):
+        return Code(self.ops, self.consts, self.scope.names, nparams, rest,
+                    params, body)
+
+    def global_value(self, name):
+        if self.scope.resolve(name) is not None:
+            return None
+        try:
+            return self.stg[name].value
+        except KeyError:
+            return None
+
+    def special_form(self, expr):
+        """
+        If ``expr`` is a special form, return the method which compiles it,
+        otherwise return ``None``.
+        """
+        if not isinstance(expr.car, Symbol):
+            return None
+        name = special_form_name(self.global_value(expr.car))
+        if name is None:
+            return None
+        return getattr(CodeCompiler, 'compile_' + name)
+
+    def compile(self, expr, tail=False):
+        """
+        Compile ``expr``, leaving its value on the stack. If ``tail`` is
+        true, return its value instead.
+        """
+        if isinstance(expr, SExpression):
+            form = self.special_form(expr)
+            if form is not None:
+                guard = MacroCall(expr.car, expr.cdr, self.scope.snapshot(),
+                                  GlobalSite(expr.car, self.stg),
+                                  self.global_value(expr.car))
+                self.emit(TAIL_GUARD if tail else GUARD, self.const(guard))
+                form(self, expr.cdr, tail)
+                guard.resume = len(self.ops)
+            else:
+                self.compile_call(expr, tail)
+            return
+        if isinstance(expr, Symbol):
+            self.compile_load(expr)
+        elif isinstance(expr, Quoted):
+            # quotes don't depend on the storage, just compute them now
+            self.emit(LOAD_CONST, self.const(lisp_eval(expr, self.stg)))
+        else:
+            self.emit(LOAD_CONST, self.const(expr))
+        if tail:
+            self.emit(RETURN)
+
+    def compile_load(self, name):
+        found = self.scope.resolve(name)
+        if found is None:
+            self.emit(LOAD_GLOBAL, self.const(GlobalSite(name, self.stg)))
+        elif found[0] == 0:
+            self.emit(LOAD_LOCAL, found[1])
+        else:
+            self.emit(LOAD_FREE, self.const(found + (name,)))
+
+    def compile_nil(self, tail):
+        self.emit(LOAD_CONST, self.const(NIL))
+        if tail:
+            self.emit(RETURN)
+
+    def compile_call(self, expr, tail, plain=False):
+        """
+        Compile a call. Unless ``plain`` is true, a call to a global macro
+        is expanded when it is run.
+        """
+        head = expr.car
+        if (not plain and isinstance(head, Symbol)
+                and isinstance(self.global_value(head), Macro)):
+            self.emit(TAIL_EXPAND if tail else EXPAND, self.const(
+                MacroCall(head, expr.cdr, self.scope.snapshot(),
+                          GlobalSite(head, self.stg))))
+            return
+        self.compile(head)
+        macro_call = None
+        if (isinstance(head, Symbol)
+                and self.scope.resolve(head) is not None):
+            # a local variable may hold a macro
+            macro_call = MacroCall(head, expr.cdr, self.scope.snapshot())
+            self.emit(TAIL_EXPAND_IF_MACRO if tail else EXPAND_IF_MACRO,
+                      self.const(macro_call))
+        for arg in expr.cdr:
+            self.compile(arg)
+        self.emit(TAIL_CALL if tail else CALL, len(expr.cdr))
+        if macro_call is not None:
+            macro_call.resume = len(self.ops)
+
+    def declare(self, body):
+        """
+        Give each variable ``define``d in ``body`` a slot, so that code
+        in the body can refer to it before the ``define`` runs.
+        """
+        scope, depth = self.scope.defining_scope()
+        if depth or scope.defines_globally():
+            return
+        define = CodeCompiler.compile_define
+        for expr in body:
+            if (isinstance(expr, SExpression)
+                    and self.special_form(expr) is define):
+                name = expr.cdr.car
+                if isinstance(name, SExpression):
+                    name = name.car
+                if name not in self.scope.blocks[-1]:
+                    self.scope.add(name)
+
+    def compile_body(self, body, tail):
+        """
+        Compile a sequence of expressions, leaving the value of the last.
+        """
+        if body is NIL:
+            self.compile_nil(tail)
+            return
+        for cell in body.cells():
+            if cell.cdr is NIL:
+                self.compile(cell.car, tail)
+            else:
+                self.compile(cell.car)
+                self.emit(POP)
+
+    def compile_function(self, params, body):
+        """
+        Compile a function, returning its ``Code``.
+        """
+        # checks the parameter list, and splits off a variadic parameter
+        signature = UserFunction(params, body, None)
+        scope = Scope(self.scope)
+        for name in signature.names:
+            scope.add(name)
+        if signature.rest is not None:
+            scope.add(signature.rest)
+        compiler = CodeCompiler(self.stg, scope)
+        compiler.declare(body)
+        compiler.compile_body(body, True)
+        return compiler.assemble(params, body, len(signature.names),
+                                 signature.rest is not None)
+
+    def compile_define(self, se, tail):
+        if isinstance(se.car, SExpression):
+            name = se.car.car
+            self.compile_lambda(SExpression(se.car.cdr, se.cdr), False)
+        else:
+            name = se.car
+            self.compile(se.cdr.car)
+        scope, depth = self.scope.defining_scope()
+        if scope.defines_globally():
+            self.emit(DEFINE_GLOBAL, self.const(name))
+        elif depth:
+            slot = scope.blocks[-1].get(name)
+            if slot is None:
+                self.emit(DEFINE_FREE, self.const((depth, name)))
+            else:
+                self.emit(STORE_FREE, self.const((depth, slot, name)))
+        else:
+            slot = self.scope.blocks[-1].get(name)
+            if slot is None:
+                slot = self.scope.add(name)
+            self.emit(STORE_LOCAL, slot)
+        self.compile_nil(tail)
+
+    def compile_lambda(self, se, tail):
+        code = self.compile_function(se.car, se.cdr)
+        self.emit(MAKE_CLOSURE, self.const(code))
+        if tail:
+            self.emit(RETURN)
+
+    def compile_let(self, se, tail):
+        bindings = list(se.car)
+        for binding in bindings:
+            self.compile(binding.cdr.car)
+        self.scope.blocks.append({})
+        slots = [self.scope.add(binding.car) for binding in bindings]
+        for slot in reversed(slots):
+            self.emit(STORE_LOCAL, slot)
+        self.declare(se.cdr)
+        self.compile_body(se.cdr, tail)
+        self.scope.blocks.pop()
+
+    def compile_if(self, se, tail):
+        self.compile(se.car)
+        alternative = self.emit(JUMP_IF_FALSE)
+        self.compile(se.cdr.car, tail)
+        if not tail:
+            end = self.emit(JUMP)
+        self.patch(alternative)
+        self.compile(se.cdr.cdr.car, tail)
+        if not tail:
+            self.patch(end)
+
+    def compile_cond(self, se, tail):
+        ends = []
+        for clause in se:
+            self.compile(clause.car)
+            if clause.cdr is NIL:
+                ends.append(self.emit(JUMP_IF_TRUE_OR_POP))
+            else:
+                skip = self.emit(JUMP_IF_FALSE)
+                self.compile_body(clause.cdr, tail)
+                if not tail:
+                    ends.append(self.emit(JUMP))
+                self.patch(skip)
+        self.emit(LOAD_CONST, self.const(NIL))
+        for end in ends:
+            self.patch(end)
+        if tail:
+            self.emit(RETURN)
+
+    def compile_and(self, se, tail, jump=JUMP_IF_FALSE_OR_POP):
+        if se is NIL:
+            self.compile_nil(tail)
+            return
+        ends = []
+        for cell in se.cells():
+            if cell.cdr is NIL:
+                self.compile(cell.car, tail)
+            else:
+                self.compile(cell.car)
+                ends.append(self.emit(jump))
+        for end in ends:
+            self.patch(end)
+        if tail and ends:
+            self.emit(RETURN)
+
+    def compile_or(self, se, tail):
+        self.compile_and(se, tail, JUMP_IF_TRUE_OR_POP)
+
+    def compile_setbang(self, se, tail):
+        name = se.car
+        self.compile(se.cdr.car)
+        found = self.scope.resolve(name)
+        if found is None:
+            self.emit(STORE_GLOBAL, self.const(GlobalSite(name, self.stg)))
+        elif found[0] == 0:
+            self.emit(STORE_LOCAL, found[1])
+        else:
+            self.emit(STORE_FREE, self.const(found + (name,)))
+        self.compile_nil(tail)
+
+    def compile_eval(self, se, tail):
+        self.compile(se.car)
+        self.emit(TAIL_EVAL if tail else EVAL,
+                  self.const(self.scope.snapshot()))
+
+
+def compile_nested(expr, scope: Scope, stg: LexicalVarStorage) -> Code:
+    """
+    Compile ``expr`` as the body of a function with no parameters, nested
+    in ``scope``.
+    """
+    compiler = CodeCompiler(stg, Scope(scope, nested=True))
+    body = SExpression(expr)
+    compiler.declare(body)
+    compiler.compile_body(body, True)
+    return compiler.assemble(NIL, body)
+
+
+def compile_plain_call(expr, scope: Scope, stg: LexicalVarStorage) -> Code:
+    """
+    Like ``compile_nested``, but compile the call ``expr`` as an ordinary
+    call, even if its name was bound to a macro when it was compiled.
+    """
+    compiler = CodeCompiler(stg, Scope(scope, nested=True))
+    compiler.compile_call(expr, True, plain=True)
+    return compiler.assemble(NIL, SExpression(expr))
+
+
+def compile_toplevel(expr, stg: LexicalVarStorage) -> Code:
+    """
+    Compile ``expr`` to run at the top level of the storage ``stg``.
+    ``define`` creates global variables in ``stg``.
+
+    >>> from slyther.interpreter import Interpreter
+    >>> from slyther.parser import lisp
+    >>> print(dis(compile_toplevel(lisp('(define x 10)'), Interpreter().stg)))
+        0 TAIL_GUARD       0 (define)
+        2 LOAD_CONST       1 (10)
+        4 DEFINE_GLOBAL    2 (x)
+        6 LOAD_CONST       3 (NIL)
+        8 RETURN           0
+    """
+    compiler = CodeCompiler(stg, Scope(toplevel=True))
+    compiler.compile(expr, True)
+    return compiler.assemble(NIL, SExpression(expr))
+
+
+def vm_eval(expr, stg: LexicalVarStorage):
+    """
+    Compile and run a single AST element. This is a drop-in replacement
+    for ``lisp_eval``.
+
+    >>> from slyther.types import *
+    >>> from slyther.parser import lisp
+    >>> stg = LexicalVarStorage({'x': Variable(2), 'NIL': Variable(NIL)})
+    >>> vm_eval(lisp("'(x y z (a b c))"), stg)
+    (list x y z (list a b c))
+    >>> vm_eval(Symbol('x'), stg)
+    2
+    """
+    code = compile_toplevel(expr, stg)
+    return execute(code, [None, None, *code.padding], stg)
+
+
+def dis(code: Code) -> str:
+    """
+    Disassemble ``code``, for debugging the compiler.
+    """
+    lines = []
+    for pc in range(0, len(code.ops), 2):
+        op, arg = code.ops[pc], code.ops[pc + 1]
+        line = '{:>5} {:<16}{:>2}'.format(pc, opnames[op], arg)
+        if op in (LOAD_LOCAL, STORE_LOCAL):
+            line += ' ({})'.format(code.names[arg])
+        elif op in (LOAD_GLOBAL, LOAD_CONST, STORE_GLOBAL, DEFINE_GLOBAL,
+                    GUARD, TAIL_GUARD):
+            value = code.consts[arg]
+            if isinstance(value, (GlobalSite, MacroCall)):
+                value = value.name
+            line += ' ({})'.format(
+                value if isinstance(value, (Symbol, String)) else repr(value))
+        elif op in (LOAD_FREE, STORE_FREE):
+            line += ' ({2}, up {0}, slot {1})'.format(*code.consts[arg])
+        elif op == DEFINE_FREE:
+            line += ' ({1}, up {0})'.format(*code.consts[arg])
+        lines.append(line)
+    return '\n'.join(lines)
@@ -0,0 +1,95 @@
+import os
+import pytest
+from slyther.types import SExpression
+from slyther.interpreter import Interpreter
+from slyther.parser import Interner
+from slyther import cache
+from test_engines import examples, examples_dir
+
+library = '''
+(define (square x) (* x x))
+(define table '(1 2.5 "three" (four) #t))
+(define (f x) (if x 'yes 'no))
+'''
+
+
+@pytest.fixture
+def source(tmpdir):
+    path = tmpdir.join('lib.scm')
+    path.write_text(library, encoding='utf-8')
+    return str(path)
+
+
+def test_hit(source, monkeypatch):
+    exprs = cache.load(source)
+    slyc = cache.cache_path(source)
+    assert os.path.isfile(slyc)
+
+    def fail(*args):
+        raise AssertionError('parsed again')
+
+    monkeypatch.setattr(cache, 'parse', fail)
+    cached = cache.load(source)
+    assert cached == exprs
+    assert all(type(e) is SExpression for e in cached)
+
+
+def test_stale(source):
+    cache.load(source)
+    with open(source, 'a') as f:
+        f.write('(square 7)')
+    assert Interpreter().exec_cached(source) == 49
+    assert Interpreter().exec_cached(source) == 49
+
+
+@pytest.mark.parametrize('data', [b'', b'SLYC', b'garbage' * 20])
+def test_corrupt(source, data):
+    cache.load(source)
+    with open(cache.cache_path(source), 'wb') as f:
+        f.write(data)
+    assert len(cache.load(source)) == 3
+
+
+def test_version(source, monkeypatch):
+    cache.load(source)
+    monkeypatch.setattr(cache, 'version', cache.version + 1)
+    program = cache.read_cache(
+        cache.cache_path(source), b'\0' * 32)
+    assert program is None
+    assert len(cache.load(source)) == 3
+
+
+def test_cache_dir(source, tmpdir):
+    cache_dir = str(tmpdir.join('cache'))
+    cache.load(source, cache_dir)
+    assert os.listdir(cache_dir) == [
+        os.path.basename(cache.cache_path(source, cache_dir))]
+    assert not os.path.exists(os.path.dirname(cache.cache_path(source)))
+
+
+def test_unwritable(source, tmpdir):
+    cache_dir = tmpdir.join('file')
+    cache_dir.write('not a directory')
+    assert len(cache.load(source, str(cache_dir))) == 3
+
+
+def test_interner(source):
+    cache.load(source)
+    interner = Interner()
+    a = cache.load(source, interner=interner)
+    b = cache.load(source, interner=interner)
+    assert a[0] is b[0]
+
+
+def test_large(source, monkeypatch):
+    monkeypatch.setattr(cache, 'max_size', 10)
+    assert len(list(cache.load(source))) == 3
+    assert not os.path.exists(cache.cache_path(source))
+
+
+@pytest.mark.parametrize('name', sorted(examples))
+def test_examples(name, tmpdir):
+    path = os.path.join(examples_dir, name)
+    cache_dir = str(tmpdir)
+    parsed = cache.load(path, cache_dir)
+    assert cache.load(path, cache_dir) == parsed
@@ -0,0 +1,59 @@
+import sys
+import itertools
+import pytest
+from slyther.types import SExpression, Quoted, Symbol, NIL
+from slyther.parser import lex, parse, Interner, LParen, RParen, Quote
+
+depth = 20 * sys.getrecursionlimit()
+
+
+def nesting(expr):
+    """
+    The number of lists around the innermost one, found without recursing.
+    """
+    n = 0
+    while isinstance(expr, SExpression):
+        expr = expr.cdr.car if expr.cdr is not NIL else expr.car
+        n += 1
+    return n, expr
+
+
+@pytest.mark.parametrize('interner', [None, Interner()])
+def test_deep_lists(interner):
+    code = '(f ' * depth + 'x' + ')' * depth
+    expr, = parse(lex(code), interner)
+    assert nesting(expr) == (depth, 'x')
+
+
+@pytest.mark.parametrize('interner', [None, Interner()])
+def test_deep_quotes(interner):
+    expr, = parse(lex("'" * depth + '(x)'), interner)
+    for _ in range(depth):
+        assert type(expr) is Quoted
+        expr = expr.elem
+    assert expr == SExpression(Symbol('x'))
+
+
+def test_long_list():
+    n = 2 * 10 ** 5
+    expr, = parse(itertools.chain([LParen()], range(n), [RParen()]))
+    assert len(expr) == n
+
+
+def test_lazy():
+    # an endless stream of forms: the first ones come out anyway
+    tokens = itertools.cycle([Quote(), LParen(), Symbol('a'), RParen(), 1])
+    assert list(itertools.islice(parse(tokens), 4)) == [
+        Quoted(SExpression(Symbol('a'))), 1,
+        Quoted(SExpression(Symbol('a'))), 1]
+
+
+@pytest.mark.parametrize('code, message', [
+    ('(' * depth + ')' * (depth - 1), 'incomplete parse'),
+    ('(' * depth + ')' * (depth + 1), 'too many closing parens'),
+    ('(' * depth + "')" + ')' * depth, 'invalid quotation'),
+    ("'" * depth, 'incomplete parse'),
+])
+def test_errors(code, message):
+    with pytest.raises(SyntaxError, match=message):
+        list(parse(lex(code)))
@@ -0,0 +1,191 @@
+import os
+import pytest
+from slyther.types import BuiltinFunction, String, NIL
+from slyther.interpreter import Interpreter, engines
+
+examples_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'examples')
+
+# how many lines of output to compare, and what to type in, for each example
+examples = {
+    'bmi.scm': (10, ['150', '70']),
+    'calculator.scm': (10, ['+', '1', '2', '3', '', '#t',
+                            '*', '2', '3', '', '#f']),
+    'carmichael.scm': (2, []),
+    'carmichael-stream.scm': (2, []),
+    'fib-iter.scm': (50, []),
+    'fib-recursive.scm': (16, []),
+    'gcd.scm': (50, []),
+    'hello-world.scm': (10, []),
+    'is-prime.scm': (50, []),
+    'prng.scm': (40, []),
+    'sieve-list.scm': (3, []),
+    'sieve-vector.scm': (5, []),
+    'triangle.scm': (10, ['3', '4']),
+}
+
+
+class OutputLimitError(Exception):
+    pass
+
+
+def run_example(name, engine, **options):
+    lines, inputs = examples[name]
+    inputs = iter(inputs)
+    output = []
+
+    @BuiltinFunction('print')
+    def print_(*args):
+        output.append(' '.join(map(str, args)))
+        if len(output) == lines:
+            raise OutputLimitError
+
+    @BuiltinFunction('input')
+    def input_(prompt=''):
+        return String(next(inputs))
+
+    interp = Interpreter(engine=engine, **options)
+    interp.stg['print'].set(print_)
+    interp.stg['input'].set(input_)
+    with open(os.path.join(examples_dir, name)) as f:
+        try:
+            interp.exec(f.read())
+        except OutputLimitError:
+            pass
+    return output
+
+
+def test_all_examples_listed():
+    assert set(examples) == {
+        f for f in os.listdir(examples_dir) if f.endswith('.scm')}
+
+
+@pytest.mark.parametrize('engine', sorted(set(engines) - {'tree'}))
+@pytest.mark.parametrize('name', sorted(examples))
+def test_example(name, engine):
+    assert run_example(name, engine) == run_example(name, 'tree')
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_tail_calls(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('''
+        (define (loop n acc)
+          (cond
+            ((= n 0) acc)
+            (#t (let ((m (- n 1)))
+                  (and #t (or #f (if #t (loop m (+ acc 1)))))))))''')
+    assert interp.exec('(loop 20000 0)') == 20000
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_scoping(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('''
+        (define (counter)
+          (define count 0)
+          (lambda () (set! count (+ count 1)) count))
+        (define c1 (counter))
+        (define c2 (counter))
+        (c1) (c1) (c2)''')
+    assert interp.exec('(list (c1) (c2))') == interp.exec("'(3 2)")
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_shadowed_special_form(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('(define (f if) (if 1 2))')
+    assert interp.exec('(f +)') == 3
+    assert interp.exec("(f list)") == interp.exec("'(1 2)")
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_errors(engine):
+    interp = Interpreter(engine=engine)
+    with pytest.raises(KeyError):
+        interp.exec('(undefined-function 1 2)')
+    with pytest.raises(KeyError):
+        interp.exec('(set! undefined-variable 1 2)')
+    with pytest.raises(TypeError):
+        interp.exec('(1 2)')
+    with pytest.raises(TypeError):
+        interp.exec('((lambda (x) x) 1 2)')
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_let_scoping(engine):
+    interp = Interpreter(engine=engine)
+    assert (interp.exec('(let ((x 1)) (let ((x 2) (y x)) (list x y)))')
+            == interp.exec("'(2 1)"))
+    with pytest.raises(KeyError):
+        interp.exec('(define (f) (let ((x 1)) x) x) (f)')
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_eval_sees_locals(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec("(define (f x) (let ((y 2)) (eval '(+ x y))))")
+    assert interp.exec('(f 1)') == 3
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_macro_sees_locals(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('''
+        (define (f x)
+          (let ((g if))
+            (g (< x 0) (set! x (- x)) 0)
+            x))''')
+    assert interp.exec('(f -3)') == 3
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_symbol_params(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('(define s (lambda args args))')
+    assert list(interp.exec('(s 1 2)')) == [1, 2]
+    assert interp.exec('(s)') is NIL
+    assert repr(interp.exec('s')) == '(lambda args args)'
+    # often enough for the JIT to compile it
+    for n in range(50):
+        assert list(interp.exec('(s {} 1)'.format(n))) == [n, 1]
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_rebound_special_form(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('(define (f x) (if x 1 2))')
+    # often enough for the JIT to compile it
+    for _ in range(30):
+        assert interp.exec('(f #t)') == 1
+    interp.exec('(set! if (lambda (a b c) c))')
+    assert interp.exec('(f #t)') == 2
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_defined_later(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('(define x 1) (define (f) x) (define x 2)')
+    assert interp.exec('(f)') == 1
+    interp.exec('(define (g x) (+ x 1))')
+    for _ in range(30):
+        assert interp.exec('(g 1)') == 2
+    interp.exec('(define + *)')
+    assert interp.exec('(g 3)') == 4
+    assert interp.exec('(+ 2 3)') == 6
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_eval_defines(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec("(define (g a) (eval '(define a 9)) a)")
+    assert interp.exec('(g 1)') == 9
+    interp.exec("(define (f x) (eval (list 'define 'y x)) y)")
+    assert interp.exec('(f 3)') == 3
+    interp.exec('''
+        (define (h)
+          (eval '(define (down n) (if (= n 0) 0 (down (- n 1)))))
+          (down 5))''')
+    assert interp.exec('(h)') == 0
+    with pytest.raises(KeyError):
+        interp.exec('y')
@@ -0,0 +1,56 @@
+import pytest
+from slyther.types import LexicalVarStorage, Variable, Environment
+from slyther.interpreter import Interpreter
+
+
+def test_share_is_a_snapshot():
+    stg = LexicalVarStorage({'x': Variable(1)})
+    stg.put('y', 2)
+    first = stg.share()
+    second = stg.share()
+    stg.put('y', 3)
+    stg.put('z', 4)
+    for env in (first, second):
+        assert isinstance(env, Environment)
+        assert env['y'].value == 2
+        assert 'z' not in env
+    assert stg['y'].value == 3
+
+
+def test_share_does_not_copy():
+    stg = LexicalVarStorage({'x': Variable(1)})
+    stg.put('y', 2)
+    env = stg.share()
+    assert env.local is stg.local
+    assert env.parent is stg.environ
+
+
+def test_nested_environments():
+    outer = LexicalVarStorage({'x': Variable(1)})
+    outer.put('y', 2)
+    inner = LexicalVarStorage(outer.share())
+    inner.put('x', 3)
+    env = inner.share()
+    assert env['x'].value == 3
+    assert env['y'].value == 2
+    assert dict(env) == {'x': inner['x'], 'y': outer['y']}
+    with pytest.raises(KeyError):
+        env['z']
+
+
+def test_define_visibility():
+    interp = Interpreter()
+    interp.exec('(define (f) x) (define x 10)')
+    with pytest.raises(KeyError):
+        interp.exec('(f)')
+
+
+def test_setbang_through_closure():
+    interp = Interpreter()
+    interp.exec('''
+        (define (counter)
+          (define count 0)
+          (lambda () (set! count (+ count 1)) count))
+        (define c (counter))
+        (c) (c)''')
+    assert interp.exec('(c)') == 3
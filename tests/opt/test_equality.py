@@ -0,0 +1,115 @@
+import pytest
+from slyther.types import (ConsCell, ConsList, PackedList, SExpression, NIL,
+                           Quoted, Symbol, equal, structural_hash)
+from slyther.parser import lisp
+
+depth = 100000
+
+
+def nested(n, cls=ConsList):
+    lst = NIL
+    for _ in range(n):
+        lst = cls(lst)
+    return lst
+
+
+def test_deep():
+    a, b = nested(depth), nested(depth)
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a != nested(depth - 1)
+    assert a != nested(depth, cls=lambda x: ConsCell(x, NIL))
+
+
+def test_long_cells():
+    a = b = NIL
+    for n in range(depth):
+        a, b = ConsCell(n, a), ConsCell(n, b)
+    assert a == b and hash(a) == hash(b)
+    assert a != ConsCell(-1, b)
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    (ConsList.from_iterable([1, 2]), SExpression.from_iterable([1.0, 2]),
+     True),
+    (ConsList.from_iterable([1, 2]), PackedList.from_iterable([1, 2]), True),
+    (ConsList.from_iterable([1, 2]), ConsList.from_iterable([1]), False),
+    (ConsList.from_iterable([1, 2]), ConsCell(1, ConsList(2)), False),
+    (ConsCell(1, 2), ConsCell(1, 2), True),
+    (ConsCell(1, 2), ConsCell(1, 3), False),
+    (ConsList(ConsList(1)), ConsList(1), False),
+    (ConsList(1), 1, False),
+    (ConsList(Quoted(ConsList(1))), ConsList(Quoted(ConsList(1))), True),
+    (NIL, ConsList(NIL), False),
+])
+def test_equal(a, b, expected):
+    assert (a == b) is expected
+    assert (b == a) is expected
+    assert equal(a, b) is expected
+    if expected:
+        assert hash(a) == hash(b)
+
+
+def test_cdr_cycles():
+    ones = ConsList(1)
+    ones.cdr = ones
+    more = ConsList.from_iterable([1, 1, 1])
+    more.cdr.cdr.cdr = more.cdr
+    assert ones == more and more == ones
+    assert hash(ones) == hash(ones)
+    twos = ConsList(2)
+    twos.cdr = twos
+    assert ones != twos
+
+
+def test_car_cycles():
+    a, b = ConsList(1, ConsList(2)), ConsList(1, ConsList(2))
+    a.cdr.car, b.cdr.car = a, b
+    assert a == b
+    assert hash(a) == hash(b)
+    b.car = 3
+    assert a != b
+
+
+def test_packed_cycles():
+    a = PackedList.from_iterable([1, 2, 3])
+    a.cdr.cdr.cdr = a
+    b = PackedList.from_iterable([1, 2, 3, 1, 2, 3])
+    b.cdr.cdr.cdr.cdr.cdr.cdr = b
+    assert a == b
+    assert hash(a) == hash(a)
+    c = PackedList.from_iterable([1, 2])
+    c.cdr.cdr = c
+    assert a != c
+
+
+def test_hash_cached_on_code():
+    code = lisp('(define (f x) (if (< x 0) (- x) x))')
+    assert code.digest is None
+    h = hash(code)
+    assert code.digest == h
+    assert code.cdr.car.digest is not None
+    assert h == hash(ConsList.from_iterable([
+        Symbol('define'),
+        ConsList.from_iterable(map(Symbol, ['f', 'x'])),
+        lisp('(if (< x 0) (- x) x)')]))
+
+
+def test_keys():
+    table = {lisp('(f 1 (g 2))'): 'a', ConsList.from_iterable([1, 2]): 'b',
+             NIL: 'c', Quoted(lisp('(x)')): 'd'}
+    key = ConsList.from_iterable([Symbol('f'), 1, lisp('(g 2)')])
+    assert table[key] == 'a'
+    assert table[PackedList.from_iterable([1.0, 2])] == 'b'
+    assert table[NIL] == 'c'
+    assert table[Quoted(ConsList(Symbol('x')))] == 'd'
+    assert structural_hash(5) == hash(5)
+
+
+def test_nan():
+    nan = float('nan')
+    cell = ConsCell(nan, NIL)
+    assert cell != cell
+    lst = ConsList(nan)
+    assert lst == lst
+    assert lst != ConsList(nan)
@@ -0,0 +1,81 @@
+import pytest
+from slyther.types import BuiltinMacro, SExpression
+from slyther.interpreter import Interpreter, engines
+from slyther.evaluator import expansions
+from slyther import jit
+
+
+def make_swap(runtime):
+    calls = []
+
+    @BuiltinMacro('swap', runtime=runtime)
+    def swap(se, stg):
+        calls.append(se)
+        return SExpression(se.cdr.car, SExpression(se.car))
+    return swap, calls
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_cached(engine):
+    interp = Interpreter(engine=engine)
+    swap, calls = make_swap(runtime=False)
+    interp.stg.put('swap', swap)
+    interp.exec('(define (f x) (swap x -))')
+    expansions.reset()
+    assert [interp.exec('(f {})'.format(n)) for n in range(5)] == [
+        0, -1, -2, -3, -4]
+    assert len(calls) == 1
+    assert (expansions.hits, expansions.misses) == (4, 1)
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_runtime(engine):
+    interp = Interpreter(engine=engine)
+    swap, calls = make_swap(runtime=True)
+    interp.stg.put('swap', swap)
+    interp.exec('(define (f x) (swap x -))')
+    expansions.reset()
+    for n in range(5):
+        interp.exec('(f {})'.format(n))
+    assert len(calls) == 5
+    assert (expansions.hits, expansions.misses) == (0, 0)
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_rebound(engine):
+    interp = Interpreter(engine=engine)
+    swap, _ = make_swap(runtime=False)
+    interp.stg.put('swap', swap)
+    interp.exec('(define (f x) (swap x -))')
+    assert interp.exec('(f 1)') == -1
+
+    @BuiltinMacro('twice', runtime=False)
+    def twice(se, stg):
+        return SExpression.from_iterable([se.cdr.car, se.car, se.car])
+    interp.stg['swap'].set(twice)
+    assert interp.exec('(f 1)') == 0
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_rebound_to_function(engine):
+    interp = Interpreter(engine=engine)
+    swap, _ = make_swap(runtime=False)
+    interp.stg.put('swap', swap)
+    interp.exec('(define (f x) (swap x -))')
+    interp.exec('(set! swap (lambda (x y) (list y x)))')
+    assert interp.exec('(f 1)') == interp.exec("(list - 1)")
+    interp.stg['swap'].set(swap)
+    assert interp.exec('(f 1)') == -1
+
+
+def test_let_is_cached(monkeypatch):
+    monkeypatch.setattr(jit, 'threshold', None)
+    interp = Interpreter()
+    interp.exec('''
+        (define (loop n acc)
+          (let ((m (- n 1)))
+            (if (= n 0) acc (loop m (+ acc 1)))))''')
+    expansions.reset()
+    assert interp.exec('(loop 100 0)') == 100
+    assert expansions.misses == 1
+    assert expansions.hits == 100
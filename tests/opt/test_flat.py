@@ -0,0 +1,80 @@
+import os
+import pytest
+from slyther.types import (SExpression, ConsCell, Quoted, Symbol, String,
+                           Boolean, NIL)
+from slyther.interpreter import Interpreter
+from slyther.parser import lex, parse
+from slyther.optimizer import fold_program
+from slyther.flat import FlatProgram
+from test_engines import examples, examples_dir
+
+
+def same_types(a, b):
+    if isinstance(a, Quoted):
+        return type(b) is Quoted and same_types(a.elem, b.elem)
+    if isinstance(a, ConsCell) and a is not NIL:
+        return (type(a) is type(b) and same_types(a.car, b.car)
+                and same_types(a.cdr, b.cdr))
+    return type(a) is type(b) and repr(a) == repr(b)
+
+
+@pytest.mark.parametrize('name', sorted(examples))
+def test_examples(name):
+    with open(os.path.join(examples_dir, name)) as f:
+        exprs = list(parse(lex(f.read())))
+    program = FlatProgram.encode(exprs)
+    assert list(program) == exprs
+    assert all(map(same_types, program, exprs))
+    assert FlatProgram.frombytes(program.tobytes()) == program
+
+
+def test_atoms():
+    code = '''(a "a" 1 1.0 -1 -0.0 0.0 NIL () '#t
+               99999999999999999999999 "\\u2603\\n" a 1 "a")'''
+    expr, = parse(lex(code))
+    program = FlatProgram.frombytes(FlatProgram.encode([expr]).tobytes())
+    decoded, = program
+    assert same_types(decoded, expr)
+    assert len(program.consts) == 11
+
+
+def test_folded():
+    interp = Interpreter()
+    code = '(list 1 2) (cons 1 2) (< 1 2) (> 1 2) (cons 1 (cons 2 3))'
+    exprs = fold_program(list(parse(lex(code))), interp.stg)
+    program = FlatProgram.frombytes(FlatProgram.encode(exprs).tobytes())
+    decoded = list(program)
+    assert [interp.eval(e) for e in decoded] == [
+        interp.eval(e) for e in exprs]
+    assert repr(decoded[4]) == "'(cons 1 (cons 2 3))"
+    assert decoded[2].elem is Boolean(True)
+
+
+def test_walk():
+    program = FlatProgram.encode(parse(lex("(f (g x) 'y) 3 (h)")))
+    roots = list(program.roots())
+    assert roots == [0, 14, 16]
+    g, quote = list(program.children(0))[1:]
+    assert [program.atom(i) for i in program.children(g)] == ['g', 'x']
+    assert program.decode(quote) == Quoted(Symbol('y'))
+    assert program.atom(roots[1]) == 3
+    assert program.decode(roots[2]) == SExpression(Symbol('h'))
+
+
+def test_deep():
+    depth = 50000
+    expr = NIL
+    for _ in range(depth):
+        expr = SExpression(Symbol('f'), SExpression(expr))
+    program = FlatProgram.encode([expr])
+    assert len(program) == 4 * depth + 2
+    assert program.decode() == expr
+
+
+def test_errors():
+    with pytest.raises(TypeError):
+        FlatProgram.encode([Quoted(print)])
+    with pytest.raises(ValueError):
+        FlatProgram.frombytes(b'not a program')
+    with pytest.raises(ValueError):
+        FlatProgram.frombytes(String('SLYX').encode() + bytes(10))
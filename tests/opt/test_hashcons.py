@@ -0,0 +1,65 @@
+import pytest
+from slyther.types import SExpression, String
+from slyther.interpreter import Interpreter, engines
+from slyther.parser import lex, parse, Interner
+from test_engines import examples, run_example
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+@pytest.mark.parametrize('name', sorted(examples))
+def test_example(name, engine):
+    expected = run_example(name, 'tree')
+    assert run_example(name, engine, hashcons=True) == expected
+
+
+def test_shared():
+    code = '''
+        (define (f x) (if (< x 0) (- x) x))
+        (define (g x) (if (< x 0) (- x) x))
+        '(a "a" 1 1.0 -0.0 0.0 (a))'''
+    f, g, quoted = parse(lex(code), Interner())
+    assert f.cdr.cdr is g.cdr.cdr
+    assert f.cdr.car.cdr is g.cdr.car.cdr
+    assert f.cdr.car is not g.cdr.car
+    elems = list(quoted.elem)
+    assert elems[0] is elems[-1].car
+    assert [type(e) for e in elems[1:4]] == [String, int, float]
+    assert repr(elems[4]) == '-0.0' and repr(elems[5]) == '0.0'
+
+
+def test_equal():
+    interner = Interner()
+    a, b = parse(lex('(f (g (h 1 2) 3)) (f (g (h 1 2) 3))'), interner)
+    assert a is b
+    c, = parse(lex('(f (g (h 1 2) 3.0))'))
+    assert a == c and c == a
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_same_code_in_different_scopes(engine):
+    interp = Interpreter(engine=engine, hashcons=True)
+    interp.exec('''
+        (define (make-adder n) (lambda (x) (+ x n)))
+        (define (make-subber n) (lambda (x) (- x n)))
+        (define add1 (make-adder 1))
+        (define sub1 (make-subber 1))
+        (define (loop f n acc)
+          (if (= n 0) acc (loop f (- n 1) (f acc))))''')
+    assert interp.exec('(loop add1 100 0)') == 100
+    assert interp.exec('(loop sub1 100 0)') == -100
+    interp.exec('(define (twice x) (+ x x))')
+    interp.exec('(define (other y) (define x 5) (+ x x))')
+    for _ in range(30):
+        assert interp.exec('(twice 2)') == 4
+        assert interp.exec('(other 2)') == 10
+
+
+def test_quoted_data_is_copied():
+    interp = Interpreter(hashcons=True)
+    interp.exec('''
+        (define (f) '(1 2 3))
+        (define (g) '(1 2 3))''')
+    lst = interp.exec('(f)')
+    lst.car = 5
+    assert repr(interp.exec('(g)')) == '(list 1 2 3)'
+    assert isinstance(interp.interner.sexpression([1]), SExpression)
@@ -0,0 +1,91 @@
+import gc
+import pytest
+from slyther.interpreter import Interpreter, engines
+from slyther import evaluator, jit
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(evaluator, 'count_hits', True)
+    # keep the loops below in lisp_eval
+    monkeypatch.setattr(jit, 'threshold', None)
+    evaluator.inline_caches.reset()
+    return evaluator.inline_caches
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_setbang(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('(define (f x) (let ((y 1)) (+ x y)))')
+    assert interp.exec('(f 1)') == 2
+    interp.exec('(set! + -)')
+    assert interp.exec('(f 1)') == 0
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_define(engine):
+    # a function only sees what was defined before it, cached or not
+    interp = Interpreter(engine=engine)
+    interp.exec('(define (g x) (+ x 1)) (define (f x) (g x))')
+    assert interp.exec('(f 1)') == 2
+    interp.exec('(define (g x) (+ x 2))')
+    assert interp.exec('(f 1)') == 2
+    assert interp.exec('(g 1)') == 3
+    interp.exec('(define + -)')
+    assert interp.exec('(f 1)') == 2
+    assert interp.exec('(g 1)') == 3
+    interp.exec('(define (h x) (+ x 1))')
+    assert interp.exec('(h 1)') == 0
+
+
+def test_local_shadows_cached():
+    interp = Interpreter()
+    interp.exec('''
+        (define (f op) (op 3 2))
+        (define (g) (f +))''')
+    assert interp.exec('(g)') == 5
+    interp.exec('(define (h op) (define (k) (op 3 2)) (k))')
+    assert interp.exec('(h -)') == 1
+    assert interp.exec('(h *)') == 6
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_hits(engine, stats):
+    interp = Interpreter(engine=engine)
+    interp.exec('''
+        (define (loop n acc)
+          (if (= n 0) acc (loop (- n 1) (+ acc 1))))''')
+    assert interp.exec('(loop 100 0)') == 100
+    assert stats.misses <= 10
+    assert stats.hits >= 300
+    assert stats.hit_rate() > 0.9
+
+
+def test_hits_not_counted():
+    interp = Interpreter(engine='closure')
+    evaluator.inline_caches.reset()
+    interp.exec('(define (f) (+ 1 2)) (f) (f)')
+    assert evaluator.inline_caches.hits == 0
+    assert evaluator.inline_caches.misses > 0
+
+
+def test_define_keeps_other_names(stats):
+    interp = Interpreter()
+    interp.exec('(define (g x) x) (define (f x) (g x))')
+    interp.exec('(f 1)')
+    misses = stats.misses
+    interp.exec('(f 1)')
+    assert stats.misses == misses
+    # only a put of g itself is seen by the cache for g
+    interp.exec('(define (h x) x)')
+    interp.exec('(f 1)')
+    assert stats.misses == misses
+
+
+def test_environment_not_kept():
+    interp = Interpreter()
+    interp.exec('(define (make) (lambda () (list 1)))')
+    assert list(interp.exec('((make))')) == [1]
+    call = interp.stg['make'].value.body.car.cdr.cdr.car
+    gc.collect()
+    assert call.callee[0]() is None
@@ -0,0 +1,136 @@
+import pytest
+from slyther.types import String
+from slyther.interpreter import Interpreter
+from slyther import jit
+from test_engines import examples, run_example
+
+
+@pytest.fixture
+def compile_all(monkeypatch):
+    monkeypatch.setattr(jit, 'threshold', 0)
+
+
+def interpreted(code):
+    old = jit.threshold
+    jit.threshold = None
+    try:
+        return Interpreter().exec(code)
+    finally:
+        jit.threshold = old
+
+
+@pytest.mark.parametrize('name', sorted(examples))
+def test_example(name, monkeypatch):
+    monkeypatch.setattr(jit, 'threshold', None)
+    expected = run_example(name, 'tree')
+    monkeypatch.setattr(jit, 'threshold', 0)
+    assert run_example(name, 'tree') == expected
+
+
+def test_compiled_after_threshold():
+    interp = Interpreter()
+    interp.exec('(define (f x) (* x x))')
+    f = interp.stg['f'].value
+    for n in range(jit.threshold):
+        assert interp.exec('(f {})'.format(n)) == n * n
+    assert f.jitted is None
+    assert interp.exec('(f 5)') == 25
+    assert f.jitted is not None
+    assert interp.exec('(f 6)') == 36
+
+
+def test_self_tail_call_is_a_loop(compile_all):
+    interp = Interpreter()
+    interp.exec('''
+        (define (loop n acc)
+          (cond
+            ((= n 0) acc)
+            (#t (let ((m (- n 1)))
+                  (and #t (or #f (if #t (loop m (+ acc 1)))))))))''')
+    assert interp.exec('(loop 100000 0)') == 100000
+    assert 'while True:' in interp.stg['loop'].value.jitted.source
+
+
+def test_mutual_tail_calls(compile_all):
+    interp = Interpreter()
+    interp.exec('''
+        (define odd? NIL)
+        (define (even? n) (if (= n 0) #t (odd? (- n 1))))
+        (set! odd? (lambda (n) (if (= n 0) #f (even? (- n 1)))))''')
+    assert repr(interp.exec('(even? 100001)')) == '#f'
+    assert interp.stg['even?'].value.jitted is not None
+
+
+def test_rebound_between_calls(compile_all):
+    interp = Interpreter()
+    interp.exec('(define (f x y) (if (< x y) (+ x y) (* x y)))')
+    assert interp.exec('(f 1 2)') == 3
+    interp.exec('(set! + -)')
+    assert interp.exec('(f 1 2)') == -1
+    interp.exec('(set! if (lambda (p c a) a))')
+    assert interp.exec('(f 1 2)') == 2
+
+
+def test_rebound_during_loop(compile_all):
+    code = '''
+        (define (rebind) (set! + *))
+        (define (loop n acc)
+          (if (= n 5) (rebind) NIL)
+          (if (= n 0) acc (loop (- n 1) (+ acc 2))))
+        (loop 10 1)'''
+    assert Interpreter().exec(code) == interpreted(code)
+
+
+def test_setbang(compile_all):
+    code = '''
+        (define total 0)
+        (define (loop n)
+          (set! total (+ total n))
+          (let ((m n))
+            (set! n (- m 1)))
+          (if (> n 0) (loop n) total))
+        (loop 100)'''
+    assert Interpreter().exec(code) == interpreted(code) == 5050
+
+
+def test_strings(compile_all):
+    interp = Interpreter()
+    interp.exec('(define (f a b) (list (+ a b) (* a 2) (< a b) (not a)))')
+    result = interp.exec('(f "a" "b")')
+    assert repr(result) == '(list "ab" "aa" #t #f)'
+    assert all(type(s) is String for s in list(result)[:2])
+
+
+def test_not_compiled(compile_all):
+    interp = Interpreter()
+    interp.exec('''
+        (define (f x) (define y x) y)
+        (define (g x) ((lambda () x)))''')
+    assert interp.exec('(f 1)') == 1
+    assert interp.exec('(g 1)') == 1
+    for name in 'fg':
+        func = interp.stg[name].value
+        assert func.jitted is None
+        assert func.calls is None
+
+
+def test_closures_share_translation(compile_all):
+    interp = Interpreter()
+    interp.exec('(define (make-adder n) (lambda (x) (+ x n)))')
+    interp.exec('(define add1 (make-adder 1)) (define add2 (make-adder 2))')
+    assert interp.exec('(add1 1)') == 2
+    assert interp.exec('(add2 1)') == 3
+    add1 = interp.stg['add1'].value
+    add2 = interp.stg['add2'].value
+    assert add1.jitted is not add2.jitted
+    assert add1.jitted.source is add2.jitted.source
+
+
+def test_errors(compile_all):
+    interp = Interpreter()
+    interp.exec('(define (f x) (+ x 1))')
+    with pytest.raises(TypeError, match='expected 1 argument'):
+        interp.exec('(f)')
+    assert interp.exec('(f 1)') == 2
+    with pytest.raises(TypeError):
+        interp.exec('(f NIL)')
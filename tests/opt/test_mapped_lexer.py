@@ -0,0 +1,57 @@
+import os
+import pytest
+from slyther.types import NIL
+from slyther.parser import lex, lex_buffer, mapped
+from slyther.interpreter import Interpreter
+from test_engines import examples, examples_dir
+from test_streaming_lexer import tricky
+
+unicode = [
+    '(print "λ → ツ" ¯\\_(ツ)_/¯)',
+    'a b c　　d',
+    '1 2 x\x1cy',
+    '(\x1f)',
+    ' 5.5 ',
+    '; comment λ\n"λ;λ"',
+    '(f #!a\u3000b)',
+    '#!x\n#!a\u3000b',
+]
+
+
+@pytest.mark.parametrize('code', tricky + unicode)
+def test_same_as_str(code):
+    assert list(lex_buffer(code.encode())) == list(lex(code))
+    assert list(lex(bytearray(code.encode()))) == list(lex(code))
+
+
+@pytest.mark.parametrize('name', sorted(examples))
+def test_examples(name):
+    path = os.path.join(examples_dir, name)
+    with open(path, encoding='utf-8') as f:
+        expected = list(lex(f.read()))
+    with open(path, 'rb') as f, mapped(f) as buf:
+        assert list(lex(buf)) == expected
+
+
+@pytest.mark.parametrize('code', [r'(print "unclosed)', '(.x)', '1 . 3'])
+def test_errors(code):
+    with pytest.raises(SyntaxError):
+        list(lex_buffer(code.encode()))
+
+
+def test_exec_file(tmpdir):
+    path = tmpdir.join('code.scm')
+    path.write_text('#!/usr/bin/env slyther\n(define λ 4)\n(* λ λ)',
+                    encoding='utf-8')
+    interp = Interpreter()
+    assert interp.exec_file(str(path)) == 16
+    with open(str(path)) as f:
+        assert interp.exec_file(f) == 16
+
+
+def test_unmappable(tmpdir):
+    path = tmpdir.join('empty.scm')
+    path.write_text('', encoding='utf-8')
+    with open(str(path)) as f, mapped(f) as code:
+        assert code is f
+    assert Interpreter().exec_file(str(path)) is NIL
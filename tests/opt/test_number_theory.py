@@ -0,0 +1,42 @@
+import pytest
+from slyther.interpreter import Interpreter, engines
+
+
+@pytest.mark.parametrize('fold', [False, True])
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_builtins(engine, fold):
+    interp = Interpreter(engine=engine, fold=fold)
+    assert interp.exec('(expt 2 10)') == 1024
+    assert interp.exec('(expt 4 0.5)') == 2.0
+    assert interp.exec('(expt 561 (expt 10 30) 1105)') == pow(
+        561, 10 ** 30, 1105)
+    assert interp.exec('(exact-integer-sqrt 99)') == 9
+    assert interp.exec('(gcd 12 18)') == 6
+    assert interp.exec('(lcm 4 6)') == 12
+
+
+@pytest.mark.parametrize('n', list(range(200)) + [
+    2 ** 52 - 1, 2 ** 52, 10 ** 30, 10 ** 30 - 1, 3 ** 101])
+def test_exact_integer_sqrt(n):
+    interp = Interpreter()
+    s = interp.exec('(exact-integer-sqrt {})'.format(n))
+    assert type(s) is int and s * s <= n < (s + 1) * (s + 1)
+
+
+def test_exact_integer_sqrt_negative():
+    with pytest.raises(ValueError):
+        Interpreter().exec('(exact-integer-sqrt -1)')
+
+
+@pytest.mark.parametrize('args, gcd, lcm', [
+    ((), 0, 1),
+    ((7,), 7, 7),
+    ((0, 5), 5, 0),
+    ((-4, 6), 2, 12),
+    ((30, 42, 70), 2, 210),
+])
+def test_gcd_lcm(args, gcd, lcm):
+    interp = Interpreter()
+    args = ''.join(' {}'.format(a) for a in args)
+    assert interp.exec('(gcd{})'.format(args)) == gcd
+    assert interp.exec('(lcm{})'.format(args)) == lcm
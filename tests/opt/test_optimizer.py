@@ -0,0 +1,83 @@
+import pytest
+from slyther.types import BuiltinMacro, String
+from slyther.parser import lisp
+from slyther.interpreter import Interpreter, engines
+from slyther.optimizer import fold, fold_program
+from test_engines import examples, run_example
+
+
+@pytest.fixture
+def stg():
+    return Interpreter().stg
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+@pytest.mark.parametrize('name', sorted(examples))
+def test_example(name, engine):
+    assert run_example(name, engine, fold=True) == run_example(name, 'tree')
+
+
+@pytest.mark.parametrize('code, folded', [
+    ('(* 60 60 24)', '86400'),
+    ('(list (- (expt 2 31) 1) x)', '(list 2147483647 x)'),
+    ('(f (+ 1 2))', '(f (+ 1 2))'),
+    ('(+ "a" "b")', '"ab"'),
+    ('(< 1 2 x)', '(< 1 2 x)'),
+    ('(print (+ 1 2))', '(print 3)'),
+    ('(if (= 1 1) (f 1) (f 2))', '(f 1)'),
+    ('(if #f (f 1))', 'NIL'),
+    ('(if x (+ 1 1) (+ 2 2))', '(if x 2 4)'),
+    ('(cond ((> x 1) (* 2 2)))', '(cond ((> x 1) 4))'),
+    ('(let ((a (+ 1 1))) (+ a 1))', '(let ((a 2)) (+ a 1))'),
+    ('(lambda (x) (+ x (* 2 3)))', '(lambda (x) (+ x 6))'),
+    ("'(+ 1 2)", "'(+ 1 2)"),
+    ('(/ 1 0)', '(/ 1 0)'),
+])
+def test_fold(stg, code, folded):
+    assert repr(fold(lisp(code), stg)) == folded
+
+
+def test_string_result(stg):
+    assert type(fold(lisp('(+ "a" "b")'), stg)) is String
+
+
+@pytest.mark.parametrize('code', [
+    '(lambda (+) (+ 1 2))',
+    '(let ((+ -)) (+ 1 2))',
+    '(define (f) (define + -) (+ 1 2))',
+])
+def test_shadowed(stg, code):
+    assert repr(fold(lisp(code), stg)) == code
+
+
+@pytest.mark.parametrize('program', [
+    ['(set! + -)', '(+ 1 2)'],
+    ['(define (f) (+ 1 2))', '(define + -)', '(f)'],
+    ['(define (+ a b) a)', '(+ 1 2)'],
+    ['(define (f) (+ 1 2))', "(eval '(set! + -))", '(f)'],
+])
+def test_rebound_in_program(stg, program):
+    exprs = [lisp(code) for code in program]
+    assert fold_program(exprs, stg) == exprs
+
+
+def test_rebound_before(stg):
+    interp = Interpreter(fold=True)
+    interp.exec('(set! + -)')
+    assert interp.exec('(+ 1 2)') == -1
+
+
+def test_macro_arguments(stg):
+    stg.put('quote-it', BuiltinMacro(lambda se, stg: se))
+    assert repr(fold(lisp('(quote-it (+ 1 2))'), stg)) == '(quote-it (+ 1 2))'
+
+
+def test_impure(stg):
+    assert repr(fold(lisp('(print 1)'), stg)) == '(print 1)'
+
+
+def test_errors_at_runtime():
+    interp = Interpreter(fold=True)
+    interp.exec('(define (f) (/ 1 0))')
+    with pytest.raises(ZeroDivisionError):
+        interp.exec('(f)')
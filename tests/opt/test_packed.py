@@ -0,0 +1,82 @@
+import pytest
+from slyther.types import (ConsList, PackedList, SExpression, NIL, Symbol,
+                           cons)
+from slyther.interpreter import Interpreter, engines
+from slyther.parser import lisp
+
+
+def test_same_as_conslist():
+    items = [1, 2, 3, 'x', NIL]
+    packed = PackedList.from_iterable(items)
+    cells = ConsList.from_iterable(items)
+    assert packed == cells and cells == packed
+    assert repr(packed) == repr(cells)
+    assert len(packed) == len(items)
+    assert [packed[i] for i in range(-5, 5)] == items + items
+    assert list(reversed(packed)) == items[::-1]
+    assert 'x' in packed and 4 not in packed
+    assert [cell.car for cell in packed.cells()] == items
+    assert PackedList.from_iterable([]) is NIL
+    assert packed != PackedList.from_iterable(items[:-1])
+    assert PackedList.from_iterable(items[:-1]) != packed
+
+
+def test_index_errors():
+    packed = PackedList.from_iterable([1, 2])
+    for idx in (2, -3):
+        with pytest.raises(IndexError):
+            packed[idx]
+
+
+def test_set_cdr():
+    packed = PackedList.from_iterable(range(6))
+    old = packed.cdr.cdr.cdr
+    packed.cdr.cdr.cdr = ConsList.from_iterable('ab')
+    assert list(packed) == [0, 1, 2, 'a', 'b']
+    assert list(reversed(packed)) == ['b', 'a', 2, 1, 0]
+    assert len(packed) == 5
+    assert packed[3] == 'a' and packed[-1] == 'b'
+    assert list(old) == [3, 4, 5]
+    second = packed.cdr
+    packed.cdr = NIL
+    assert list(packed) == [0]
+    assert len(packed) == 1
+    assert list(second) == [1, 2, 'a', 'b']
+    with pytest.raises(TypeError):
+        packed.cdr = 5
+
+
+def test_cons():
+    packed = PackedList.from_iterable([1, 2])
+    cell = cons(0, packed)
+    assert type(cell) is ConsList
+    assert cell.cdr is packed
+    assert type(PackedList(0, packed)) is ConsList
+
+
+def test_from_builtins():
+    interp = Interpreter()
+    assert type(interp.exec('(list 1 2 3)')) is PackedList
+    assert type(interp.exec('(split "a b c")')) is PackedList
+    lst = interp.exec("'(1 (2 3))")
+    assert type(lst) is PackedList and type(lst[1]) is PackedList
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_rest(engine):
+    interp = Interpreter(engine=engine)
+    # the lexer has no syntax for a dot, so put it in by hand
+    define = lisp('(define (f a dot rest) rest)')
+    define.cdr.car.cdr.cdr.car = Symbol('.')
+    interp.eval(define)
+    rest = interp.exec('(f 1 2 3)')
+    assert rest == ConsList.from_iterable([2, 3])
+    assert interp.exec('(f 1)') is NIL
+    assert interp.exec("(eval (cons '+ (f 1 2 3)))") == 5
+
+
+def test_to_sexpression():
+    interp = Interpreter()
+    assert interp.exec("(eval (list '+ 1 (list '* 2 3)))") == 7
+    se = SExpression.from_iterable(PackedList.from_iterable([1, 2]))
+    assert type(se) is SExpression and repr(se) == '(1 2)'
@@ -0,0 +1,107 @@
+import os
+import builtins
+import pytest
+from slyther.parser import lex, parse, LexState
+from slyther.interpreter import Interpreter
+from slyther.repl import repl
+from test_engines import examples, examples_dir
+from test_streaming_lexer import tricky
+
+
+def state_of(*pieces):
+    state = LexState()
+    for piece in pieces:
+        state.feed(piece)
+    return tuple(getattr(state, name) for name in LexState.__slots__)
+
+
+@pytest.mark.parametrize('code', tricky + [
+    '(a "b\\\\" c) d', '("x\\', "'(1 ;)\n 2)", "'", ')(', '"\\"'])
+def test_every_split(code):
+    whole = state_of(code)
+    for i in range(len(code) + 1):
+        assert state_of(code[:i], code[i:]) == whole
+    assert state_of(*code) == whole
+
+
+@pytest.mark.parametrize('name', sorted(examples))
+def test_examples(name):
+    with open(os.path.join(examples_dir, name)) as f:
+        code = f.read()
+    state = LexState()
+    for i, c in enumerate(code):
+        state.feed(c)
+        try:
+            list(parse(lex(code[:i + 1])))
+        except SyntaxError as e:
+            assert not state.complete or str(e) != 'incomplete parse'
+        else:
+            assert state.complete
+    assert state.complete and not state.blank
+
+
+@pytest.mark.parametrize('code, complete', [
+    ('', True),
+    ('; (', True),
+    ('(f x) (g', False),
+    ('(f "))" \'(1))', True),
+    ("'", False),
+    ("' ; x\n", False),
+    ("'a", True),
+    ('"a\\"', False),
+    ('(a))', True),
+])
+def test_complete(code, complete):
+    state = LexState()
+    state.feed(code)
+    assert state.complete == complete
+
+
+def run_repl(monkeypatch, lines, debug=False):
+    lines = iter(lines)
+    prompts = []
+
+    def fake_input(prompt=''):
+        prompts.append(prompt)
+        line = next(lines, None)
+        if line is None:
+            raise EOFError
+        if line is KeyboardInterrupt:
+            raise KeyboardInterrupt
+        return line
+
+    monkeypatch.setattr(builtins, 'input', fake_input)
+    repl(Interpreter(), debug=debug)
+    return prompts
+
+
+def test_repl(monkeypatch, capsys):
+    prompts = run_repl(monkeypatch, [
+        '(print "Hello, World!")',
+        '(define (f x)',
+        '  ; "(',
+        '  (* x 2))',
+        '',
+        '; nothing',
+        '(blah bla', KeyboardInterrupt,
+        '(f', '21)',
+    ])
+    assert capsys.readouterr().out.splitlines() == [
+        'Hello, World!', 'NIL', 'NIL', '', '42', '']
+    assert prompts == ['> ', '> ', '... ', '... ', '> ', '> ', '> ',
+                       '... ', '> ', '... ', '> ']
+
+
+def test_repl_errors(monkeypatch, capsys):
+    run_repl(monkeypatch, ['(car 1)', '(+ 1 1)'])
+    out, err = capsys.readouterr()
+    assert out.splitlines() == ['2', '']
+    assert 'AttributeError' in err
+    with pytest.raises(AttributeError):
+        run_repl(monkeypatch, ['(car 1)'], debug=True)
+
+
+def test_long_paste(monkeypatch, capsys):
+    lines = ['(define (f x)', '  (+ x'] + ['     1'] * 10000 + ['  ))']
+    run_repl(monkeypatch, lines + ['(f 0)'])
+    assert capsys.readouterr().out.splitlines() == ['NIL', '10000', '']
@@ -0,0 +1,47 @@
+import pytest
+from slyther.types import (ConsCell, ConsList, NilType, NIL, SExpression,
+                           Variable, Quoted)
+from slyther.compiler import SlotVariable
+
+
+@pytest.mark.parametrize('obj', [
+    ConsCell(1, 2),
+    ConsList(1),
+    NIL,
+    SExpression(1),
+    Variable(1),
+    Quoted(1),
+    SlotVariable([1], 0, 'x'),
+])
+def test_no_dict(obj):
+    assert not hasattr(obj, '__dict__')
+    with pytest.raises(AttributeError):
+        obj.other = 1
+
+
+def test_nil_singleton():
+    assert NilType() is NIL
+    assert NIL.car is NIL.cdr is NIL
+
+
+def test_mutable():
+    lst = ConsList.from_iterable([1, 2])
+    lst.car = 3
+    lst.cdr.cdr = ConsList(4)
+    assert list(lst) == [3, 2, 4]
+
+
+def test_sexpression_caches():
+    se = SExpression.from_iterable([1, 2])
+    assert se.expansion is se.callee is se.translation is None
+    assert se.cdr.expansion is se.cdr.callee is se.cdr.translation is None
+    se.callee = 'cached'
+    assert se.callee == 'cached'
+
+
+def test_slot_variable():
+    frame = [1]
+    var = SlotVariable(frame, 0, 'x')
+    assert var.value == 1
+    var.set(2)
+    assert frame == [2]
@@ -0,0 +1,74 @@
+import pytest
+from slyther.types import BuiltinMacro
+from slyther.interpreter import Interpreter
+from slyther import stackless
+
+deep = 20000
+
+
+@pytest.fixture
+def interp():
+    interp = Interpreter(engine='stackless')
+    interp.exec('''
+        (define (count-up n)
+          (if (= n 0) 0 (+ 1 (count-up (- n 1)))))
+        (define (build n acc)
+          (if (= n 0) acc (build (- n 1) (cons n acc))))
+        (define (length l)
+          (if (nil? l) 0 (+ 1 (length (cdr l)))))''')
+    return interp
+
+
+def test_deep_recursion(interp):
+    assert interp.exec('(count-up {})'.format(deep)) == deep
+
+
+def test_list_recursion(interp):
+    assert interp.exec('(length (build {} NIL))'.format(deep)) == deep
+
+
+@pytest.mark.parametrize('body', [
+    '(if (= (count-up N) N) 1 2)',
+    '(cond ((= (count-up N) 0) 2) ((> (count-up N) 0) 1))',
+    '(cond ((count-up N) (define y 1) y))',
+    '(and (count-up N) (or #f (- (count-up N) N -1)))',
+    '(define x (count-up N)) (- x N -1)',
+    "(eval (list '- (count-up N) N -1))",
+    '(let ((x (count-up N))) (set! x (- x N -1)) x)',
+    '((lambda (x) (- x N -1)) (count-up N))',
+])
+def test_deep_in_special_forms(interp, body):
+    interp.exec('(define (f) {})'.format(body.replace('N', str(deep))))
+    assert interp.exec('(f)') == 1
+
+
+def test_max_depth(interp, monkeypatch):
+    monkeypatch.setattr(stackless, 'max_depth', 1000)
+    assert interp.exec('(count-up 100)') == 100
+    with pytest.raises(RecursionError, match='Maximum recursion depth'):
+        interp.exec('(count-up 1000)')
+    # the interpreter is still usable afterwards
+    assert interp.exec('(count-up 10)') == 10
+
+
+def test_tail_calls(interp, monkeypatch):
+    monkeypatch.setattr(stackless, 'max_depth', 100)
+    interp.exec('''
+        (define (loop n)
+          (cond ((= n 0) 0) (#t (and #t (or #f (loop (- n 1)))))))''')
+    assert interp.exec('(loop 10000)') == 0
+
+
+def test_macros(interp):
+    interp.stg.put('swap', BuiltinMacro(
+        lambda se, stg: type(se)(se.cdr.car, type(se)(se.car))))
+    assert interp.exec('(swap 2 -)') == -2
+
+
+def test_errors(interp):
+    with pytest.raises(KeyError, match='Undefined variable'):
+        interp.exec('(set! nope 1)')
+    with pytest.raises(TypeError, match="'int' object is not callable"):
+        interp.exec('(1 2)')
+    with pytest.raises(TypeError, match='expected 1 argument'):
+        interp.exec('(count-up)')
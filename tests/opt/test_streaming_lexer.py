@@ -0,0 +1,98 @@
+import io
+import os
+import pytest
+import tracemalloc
+from slyther import parser
+from slyther.parser import lex
+from slyther.interpreter import Interpreter
+from test_engines import examples, examples_dir
+
+tricky = [
+    '#!/usr/bin/env slyther\n(print "hi")',
+    '#!x',
+    '#',
+    ' #!not-a-shebang',
+    r'("a\"b" "c\\" d" "" ;; comment "x\n ") ',
+    "'(1 -2 3.5 -.5 6. -x 8-dogcows λ-λ)",
+    '; just a comment',
+    '',
+    '(f .5 x. "" ")"\n ; a\n;b\n c)',
+]
+
+
+def chunked(code, size):
+    return [code[i:i + size] for i in range(0, len(code), size)]
+
+
+@pytest.mark.parametrize('code', tricky)
+def test_every_boundary(code):
+    expected = list(lex(code))
+    for size in range(1, len(code) + 1):
+        assert list(lex(chunked(code, size))) == expected
+        assert list(lex(io.StringIO(code), chunk_size=size)) == expected
+
+
+@pytest.mark.parametrize('name', sorted(examples))
+def test_examples(name):
+    with open(os.path.join(examples_dir, name)) as f:
+        code = f.read()
+    expected = list(lex(code))
+    for size in (1, 7, 64, 4096):
+        with open(os.path.join(examples_dir, name)) as f:
+            assert list(lex(f, chunk_size=size)) == expected
+
+
+@pytest.mark.parametrize('code', [
+    r'(print "unclosed)', '(.x)', '1 2 . 3', '"\\"'])
+def test_errors(code):
+    with pytest.raises(SyntaxError):
+        list(lex(code))
+    for size in range(1, len(code) + 1):
+        with pytest.raises(SyntaxError):
+            list(lex(chunked(code, size)))
+
+
+def test_empty_chunks():
+    assert list(lex(['', '(', '', '', 'a', '', ')', ''])) == list(lex('(a)'))
+
+
+def test_bounded_memory():
+    block = '(f "some; string" 12 -3.5 sym)\n; a comment\n' * 100
+    count = 200
+
+    tracemalloc.start()
+    tokens = sum(1 for _ in lex(block for _ in range(count)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert tokens == 700 * count
+    # a few chunks at a time, rather than the whole input
+    assert peak < count * len(block) / 20
+
+
+class CountingPattern:
+    """
+    Wraps a pattern, counting the characters ``finditer`` is given.
+    """
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.scanned = 0
+
+    def finditer(self, string, pos=0):
+        self.scanned += len(string) - pos
+        return self.pattern.finditer(string, pos)
+
+
+@pytest.mark.parametrize('code', [
+    '(f "{}")', '(f ; {}\n)', '(f {})', '(f   \n; {})'])
+def test_long_tokens_scanned_once(monkeypatch, code):
+    code = code.format('x' * 20000)
+    counting = CountingPattern(parser.master_pattern)
+    monkeypatch.setattr(parser, 'master_pattern', counting)
+    assert list(lex(chunked(code, 10))) == list(lex(code))
+    assert counting.scanned < 4 * len(code)
+
+
+def test_exec_file():
+    interp = Interpreter()
+    code = io.StringIO('(define x 4)\n(* x x)')
+    assert interp.exec(code) == 16
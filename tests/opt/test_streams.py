@@ -0,0 +1,52 @@
+import pytest
+from slyther.types import Promise, PackedList, NIL
+from slyther.interpreter import Interpreter, engines
+
+
+@pytest.mark.parametrize('fold', [False, True])
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_delay_force(engine, fold):
+    interp = Interpreter(engine=engine, fold=fold)
+    interp.exec('''
+        (define calls 0)
+        (define p (delay (set! calls (+ calls 1)) (* calls 10)))''')
+    assert isinstance(interp.exec('p'), Promise)
+    assert interp.exec('calls') == 0
+    assert list(interp.exec('(list (force p) (force p) calls)')) == [10, 10, 1]
+    assert interp.exec('(force 3)') == 3
+
+
+@pytest.mark.parametrize('fold', [False, True])
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_infinite_streams(engine, fold):
+    interp = Interpreter(engine=engine, fold=fold)
+    interp.exec('''
+        (define computed 0)
+        (define (ints n)
+          (set! computed (+ computed 1))
+          (cons-stream n (ints (+ n 1))))
+        (define s (ints 1))''')
+    assert interp.exec('(stream-car (stream-cdr s))') == 2
+    assert interp.exec('(stream-car (stream-cdr s))') == 2
+    assert interp.exec('computed') == 2
+    evens = interp.exec(
+        '(stream-take (stream-filter (lambda (x) (= 0 (remainder x 2))) s) 3)')
+    assert type(evens) is PackedList and list(evens) == [2, 4, 6]
+    assert interp.exec('computed') == 6
+    assert interp.exec('(stream-take (ints 1) 0)') is NIL
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_finite_streams(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('(define s (cons-stream 1 (cons-stream 2 NIL)))')
+    assert list(interp.exec('(stream-take s 5)')) == [1, 2]
+    assert interp.exec('(stream-filter (lambda (x) (> x 5)) s)') is NIL
+
+
+def test_filter_skips_in_constant_stack():
+    interp = Interpreter(engine='closure')
+    interp.exec('(define (ints n) (cons-stream n (ints (+ n 1))))')
+    assert list(interp.exec(
+        '(stream-take (stream-filter (lambda (x) (> x 50000)) (ints 1)) 2)'
+    )) == [50001, 50002]
@@ -0,0 +1,68 @@
+from string import hexdigits
+from hypothesis import given, example
+import hypothesis.strategies as st
+from slyther.types import String
+from slyther.parser import parse_strlit, escapes, lex
+
+
+def reference_parse_strlit(tok):
+    """
+    ``parse_strlit`` as it was, a character at a time.
+    """
+    body = tok[1:-1]
+    result = []
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c != '\\' or i + 1 == len(body):
+            result.append(c)
+            i += 1
+            continue
+        esc = body[i + 1]
+        if esc == '0' and all(d in '01234567' for d in body[i + 2:i + 4]) \
+                and len(body[i + 2:i + 4]) == 2:
+            result.append(chr(int(body[i + 2:i + 4], 8)))
+            i += 4
+        elif esc == 'x' and all(d in hexdigits for d in body[i + 2:i + 4]) \
+                and len(body[i + 2:i + 4]) == 2:
+            result.append(chr(int(body[i + 2:i + 4], 16)))
+            i += 4
+        elif esc in escapes:
+            result.append(escapes[esc])
+            i += 2
+        else:
+            result.append(c)
+            i += 1
+    return String(''.join(result))
+
+
+# mostly backslashes and what may follow them
+dense = st.text(alphabet='\\\\\\0x"nqe7789aFgX λ')
+
+
+@given(dense)
+@example('\\')
+@example('\\0\\x\\')
+@example('\\\\x41\\0777')
+def test_reference(body):
+    tok = '"' + body + '"'
+    result = parse_strlit(tok)
+    assert type(result) is String
+    assert result == reference_parse_strlit(tok)
+
+
+@given(st.text())
+def test_any_text(body):
+    tok = '"' + body + '"'
+    assert parse_strlit(tok) == reference_parse_strlit(tok)
+
+
+@given(st.text().filter(lambda body: '\\' not in body))
+def test_no_escapes(body):
+    result = parse_strlit('"' + body + '"')
+    assert type(result) is String
+    assert result == body
+
+
+def test_lexed():
+    assert list(lex(r'"a\x41\077\"\\ b" "plain"')) == ['aA?"\\ b', 'plain']
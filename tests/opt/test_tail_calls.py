@@ -0,0 +1,50 @@
+import sys
+import pytest
+from slyther.interpreter import Interpreter
+
+# deep enough that the loops below would exceed the recursion limit if
+# each iteration took a Python stack frame
+depth = 5 * sys.getrecursionlimit()
+
+loops = {
+    'body': '''
+        (define (loop n)
+          (if (= n 0)
+              'done
+              ((lambda () NIL (loop (- n 1))))))''',
+    'if': '''
+        (define (loop n)
+          (if (= n 0) 'done (loop (- n 1))))''',
+    'cond': '''
+        (define (loop n)
+          (cond
+            ((= n 0) 'done)
+            (#t (loop (- n 1)))))''',
+    'and': '''
+        (define (loop n)
+          (if (= n 0) 'done (and #t (loop (- n 1)))))''',
+    'or': '''
+        (define (loop n)
+          (if (= n 0) 'done (or #f (loop (- n 1)))))''',
+    'let': '''
+        (define (loop n)
+          (let ((m (- n 1)))
+            (if (< m 0) 'done (loop m))))''',
+    'eval': '''
+        (define (loop n)
+          (if (= n 0) 'done (eval (list 'loop (- n 1)))))''',
+}
+
+
+@pytest.mark.parametrize('form', sorted(loops))
+def test_tail_position(form):
+    interp = Interpreter()
+    interp.exec(loops[form])
+    assert interp.exec('(loop {})'.format(depth)) == 'done'
+
+
+def test_non_tail_recursion_still_limited():
+    interp = Interpreter()
+    interp.exec('(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1)))))')
+    with pytest.raises(RecursionError):
+        interp.exec('(count {})'.format(depth))
@@ -0,0 +1,45 @@
+import pytest
+from slyther.types import Vector, PackedList, NIL
+from slyther.interpreter import Interpreter, engines
+from slyther import jit
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_builtins(engine):
+    interp = Interpreter(engine=engine)
+    interp.exec('(define v (make-vector 3 0))')
+    assert interp.exec('(vector-set! v 1 "x")') is NIL
+    assert repr(interp.exec('v')) == '(vector 0 "x" 0)'
+    assert interp.exec('(vector-ref v 1)') == 'x'
+    assert interp.exec('(vector-length v)') == 3
+    lst = interp.exec('(vector->list v)')
+    assert type(lst) is PackedList and list(lst) == [0, 'x', 0]
+    vec = interp.exec("(list->vector '(1 (2 3)))")
+    assert type(vec) is Vector and repr(vec) == '(vector 1 (list 2 3))'
+    assert repr(interp.exec('(make-vector 2)')) == '(vector NIL NIL)'
+    with pytest.raises(IndexError):
+        interp.exec('(vector-ref v 3)')
+    for code in ('(vector-ref v -1)', '(vector-set! v -1 1)',
+                 '(vector-set! v 3 1)'):
+        with pytest.raises(IndexError):
+            interp.exec(code)
+    assert repr(interp.exec('v')) == '(vector 0 "x" 0)'
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_repr_is_evaluable(engine):
+    interp = Interpreter(engine=engine)
+    vec = interp.exec('(vector 1 "two" (vector) NIL)')
+    assert repr(vec) == '(vector 1 "two" (vector) NIL)'
+    assert interp.exec(repr(vec)) == vec
+
+
+@pytest.mark.parametrize('fold', [False, True])
+def test_fresh_each_time(fold, monkeypatch):
+    monkeypatch.setattr(jit, 'threshold', 0)
+    interp = Interpreter(fold=fold)
+    interp.exec('''
+        (define (fresh) (list->vector '(0 0)))
+        (define (bump v i) (vector-set! v i (+ (vector-ref v i) 1)) v)''')
+    for _ in range(3):
+        assert interp.exec('(bump (fresh) 1)') == [0, 1]
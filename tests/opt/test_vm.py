@@ -0,0 +1,91 @@
+import pytest
+from slyther.types import BuiltinMacro, SExpression, Symbol
+from slyther.interpreter import Interpreter
+from slyther.compiler import Scope
+import slyther.vm
+
+
+@pytest.fixture
+def interp():
+    return Interpreter(engine='vm')
+
+
+def test_deep_recursion(interp):
+    # non-tail calls don't use the Python stack
+    interp.exec('(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1)))))')
+    assert interp.exec('(count 50000)') == 50000
+
+
+def test_max_depth(interp, monkeypatch):
+    monkeypatch.setattr(slyther.vm, 'max_depth', 100)
+    interp.exec('(define (loop n) (+ 1 (loop n)))')
+    with pytest.raises(RecursionError):
+        interp.exec('(loop 0)')
+
+
+def test_mutual_recursion(interp):
+    interp.exec('''
+        (define (parity n)
+          (define (even? n) (if (= n 0) #t (odd? (- n 1))))
+          (define (odd? n) (if (= n 0) #f (even? (- n 1))))
+          (even? n))''')
+    assert interp.exec('(parity 10001)') == interp.exec('#f')
+
+
+def test_unbound_define(interp):
+    interp.exec('(define (f) (define y x) (define x 1) y)')
+    with pytest.raises(KeyError, match="'x'"):
+        interp.exec('(f)')
+
+
+def test_macro(interp):
+    @BuiltinMacro('swap')
+    def swap(se, stg):
+        return SExpression(se.cdr.car, SExpression(se.car))
+
+    interp.stg.put('swap', swap)
+    interp.exec('(define (f x) (swap x -))')
+    assert interp.exec('(f 3)') == -3
+
+
+def test_macro_as_value(interp):
+    assert interp.exec('((lambda (m) (m #t 1 (car NIL))) if)') == 1
+    with pytest.raises(TypeError):
+        interp.exec('((car (list if)) #t 1 2)')
+
+
+def test_dis(interp):
+    code = slyther.vm.compile_toplevel(
+        SExpression.from_iterable(map(Symbol, ['f', 'x'])), interp.stg)
+    assert slyther.vm.dis(code).split() == [
+        '0', 'LOAD_GLOBAL', '0', '(f)',
+        '2', 'LOAD_GLOBAL', '1', '(x)',
+        '4', 'TAIL_CALL', '1']
+
+
+def test_guard(interp):
+    interp.exec('(define (f x) (+ 1 (if x 1 2)))')
+    assert interp.exec('(f #t)') == 2
+    interp.exec('(set! if (lambda (a b c) c))')
+    # the call runs in place of the form, and f goes on past it
+    assert interp.exec('(f #t)') == 3
+    interp.exec('(set! if 2)')
+    with pytest.raises(TypeError):
+        interp.exec('(f #t)')
+
+
+def test_define_free(interp):
+    interp.exec("(define (f) (eval '(define y 1)) y)")
+    assert interp.exec('(f)') == 1
+    # run from a function, a define of a name without a slot
+    code = slyther.vm.compile_nested(
+        SExpression.from_iterable(map(Symbol, ['define', 'y', 'x'])),
+        Scope(Scope()), interp.stg)
+    assert slyther.vm.dis(code).split()[:12] == [
+        '0', 'TAIL_GUARD', '0', '(define)',
+        '2', 'LOAD_GLOBAL', '1', '(x)',
+        '4', 'DEFINE_FREE', '2', '(y,']
+
+
+def test_signed_zero(interp):
+    assert repr(interp.exec('(list 0.0 -0.0 0)')) == '(list 0.0 -0.0 0)'